@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+GrowMaster Pro - Scheduler Scale Benchmark
+Seeds a temporary database with a synthetic operation and times task generation,
+multi-garden coordination and notification scans end to end
+
+Usage:
+    python benchmark.py --gardens 10 100 1000 --output benchmark.json
+
+Each phase reports its wall time, how many items it produced and how many
+errors it logged, so results from different commits can be compared directly.
+A phase that logs errors only timed its error path, so it is marked invalid
+and the benchmark exits with status 1 unless --allow-errors is given.
+"""
+
+import argparse
+import json
+import logging
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime, date, timedelta
+from pathlib import Path
+from typing import Dict, Any, Callable
+
+# Add the project root to Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+logger = logging.getLogger(__name__)
+
+GROWING_METHODS = ['hydroponic', 'soil', 'aeroponic']
+TASK_TYPES = ['watering', 'feeding', 'monitoring', 'pruning', 'inspection', 'maintenance']
+PRIORITIES = ['low', 'medium', 'high', 'critical']
+
+@dataclass
+class FarmSpec:
+    """Shape of a synthetic operation"""
+    gardens: int = 10
+    plants_per_garden: int = 20
+    cohorts_per_garden: int = 1
+    cohort_size: int = 50
+    readings_per_garden: int = 96  # one day of 15-minute readings
+    years_of_tasks: float = 1.0
+    tasks_per_garden_per_week: int = 7
+    locations: int = 5
+    seed: int = 42
+
+class ErrorCounter(logging.Handler):
+    """Count ERROR records logged while a phase runs and keep the first message"""
+    
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+        self.count = 0
+        self.first_message = None
+    
+    def emit(self, record):
+        self.count += 1
+        if self.first_message is None:
+            self.first_message = record.getMessage()
+
+def seed_farm(db_manager, spec: FarmSpec) -> Dict[str, int]:
+    """Fill an empty database with gardens, plants, cohorts, readings and task history"""
+    rng = random.Random(spec.seed)
+    now = datetime.now()
+    today = date.today()
+    
+    with db_manager.get_connection() as conn:
+        conn.executemany("""
+            INSERT INTO gardens (name, garden_type, growing_method, location, dimensions_length,
+                                 dimensions_width, dimensions_height, environmental_settings,
+                                 created_date, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'active')
+        """, [(f"Garden {i + 1}", 'indoor', GROWING_METHODS[i % len(GROWING_METHODS)],
+               f"Room {i % spec.locations + 1}", 1.2, 1.2, 2.0, '{}', now.isoformat())
+              for i in range(spec.gardens)])
+        garden_ids = [row[0] for row in conn.execute("SELECT id FROM gardens ORDER BY id")]
+        
+        conn.executemany("""
+            INSERT INTO plants (garden_id, plant_name, strain_cultivar, plant_type, growth_stage,
+                                planting_date, location_in_garden, created_date)
+            VALUES (?, ?, ?, 'cannabis', 'vegetative', ?, ?, ?)
+        """, [(garden_id, f"Plant {garden_id}-{n + 1}", rng.choice(['Northern Lights', 'Blue Dream Auto']),
+               (now - timedelta(days=rng.randint(0, 120))).isoformat(), f"P{n + 1}", now.isoformat())
+              for garden_id in garden_ids for n in range(spec.plants_per_garden)])
+        
+        readings = []
+        for garden_id in garden_ids:
+            for n in range(spec.readings_per_garden):
+                readings.append((garden_id, rng.gauss(77, 5), rng.gauss(55, 8), rng.gauss(6.0, 0.4),
+                                 rng.gauss(900, 150), rng.gauss(600, 100), rng.gauss(800, 100),
+                                 (now - timedelta(minutes=15 * n)).isoformat()))
+        conn.executemany("""
+            INSERT INTO environmental_readings (garden_id, temperature, humidity, ph_level, ec_ppm,
+                                                light_ppfd, co2_ppm, reading_time)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, readings)
+        
+        # Weekly task history back over the requested years plus two weeks ahead;
+        # past tasks are completed except for a few overdue ones
+        weeks = int(spec.years_of_tasks * 52)
+        tasks = []
+        for garden_id in garden_ids:
+            for week in range(-weeks, 3):
+                for n in range(spec.tasks_per_garden_per_week):
+                    due_day = today + timedelta(days=7 * week + n % 7)
+                    completed = due_day < today and rng.random() > 0.02
+                    tasks.append((garden_id, f"{rng.choice(TASK_TYPES).title()} check {n + 1}",
+                                  rng.choice(TASK_TYPES), rng.choice(PRIORITIES), due_day.isoformat(),
+                                  completed, due_day.isoformat() if completed else None,
+                                  rng.choice([15, 30, 45, 60]), now.isoformat()))
+        conn.executemany("""
+            INSERT INTO tasks (garden_id, title, task_type, priority, due_date, completed,
+                               completed_date, estimated_duration, created_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, tasks)
+        
+        # Deliver notifications to a log file next to the database instead of the desktop
+        conn.execute("UPDATE user_settings SET setting_value = ? WHERE setting_name = 'notification_sinks'",
+                     (json.dumps({'log_file': {'path': 'notifications.log'}}),))
+        conn.commit()
+    
+    for garden_id in garden_ids:
+        for n in range(spec.cohorts_per_garden):
+            db_manager.add_plant_cohort({
+                'garden_id': garden_id,
+                'cohort_name': f"Cohort {garden_id}-{n + 1}",
+                'plant_type': 'cannabis',
+                'plant_count': spec.cohort_size,
+                'growth_stage': 'vegetative',
+                'planting_date': (now - timedelta(days=rng.randint(0, 60))).isoformat(),
+                'location_start': 'A1',
+                'location_end': f"A{spec.cohort_size}"
+            })
+    
+    return {
+        'gardens': len(garden_ids),
+        'plants': spec.gardens * (spec.plants_per_garden + spec.cohorts_per_garden * spec.cohort_size),
+        'readings': len(readings),
+        'tasks': len(tasks)
+    }
+
+def _count(result: Any) -> int:
+    """Number of items a phase produced"""
+    if isinstance(result, bool) or result is None:
+        return 0
+    if isinstance(result, int):
+        return result
+    if isinstance(result, dict):
+        for key in ('total_tasks', 'scheduled', 'tasks'):
+            if key in result:
+                return _count(result[key])
+    try:
+        return len(result)
+    except TypeError:
+        return 0
+
+def time_phase(phases: Dict[str, Dict[str, Any]], name: str, function: Callable[[], Any]) -> Any:
+    """Run one phase, record its time, output size and logged errors and return its result"""
+    counter = ErrorCounter()
+    logging.getLogger().addHandler(counter)
+    started = time.perf_counter()
+    try:
+        result = function()
+    except Exception as e:
+        logger.error(f"Phase {name} failed: {e}")
+        result = None
+    finally:
+        elapsed = time.perf_counter() - started
+        logging.getLogger().removeHandler(counter)
+    
+    phases[name] = {'seconds': round(elapsed, 6), 'items': _count(result), 'errors': counter.count,
+                    'valid': counter.count == 0}
+    if counter.count:
+        phases[name]['first_error'] = counter.first_message
+        print(f"Phase {name} is invalid: {counter.count} errors, first: {counter.first_message}", file=sys.stderr)
+    logger.info(f"{name}: {elapsed:.3f}s, {phases[name]['items']} items, {counter.count} errors")
+    return result
+
+def run_benchmark(spec: FarmSpec, horizon_days: int = 14) -> Dict[str, Any]:
+    """Seed a temporary database for one farm size and time every phase"""
+    from core.database.database_manager import DatabaseManager
+    from core.schedulers import (TaskScheduler, IntelligentTaskGenerator, MultiGardenTaskCoordinator,
+                                 BasicNotificationSystem, StageTimelineStore)
+    
+    with tempfile.TemporaryDirectory(prefix='growmaster-bench-') as temp_dir:
+        started = time.perf_counter()
+        db_manager = DatabaseManager(str(Path(temp_dir) / 'benchmark.db'))
+        counts = seed_farm(db_manager, spec)
+        seed_seconds = time.perf_counter() - started
+        
+        with db_manager.get_connection() as conn:
+            garden_ids = [row[0] for row in conn.execute("SELECT id FROM gardens ORDER BY id")]
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        phases: Dict[str, Dict[str, Any]] = {}
+        
+        # Task generation
+        time_phase(phases, 'generation.scheduler_init', lambda: [TaskScheduler(db_manager) for _ in range(100)])
+        scheduler = TaskScheduler(db_manager)
+        time_phase(phases, 'generation.intelligent_generator',
+                   lambda: IntelligentTaskGenerator(db_manager).generate_tasks_for_all_gardens())
+        time_phase(phases, 'generation.recurring_tasks', lambda: scheduler.save_scheduled_tasks([
+            task for garden_id in garden_ids
+            for task in scheduler.schedule_recurring_tasks(garden_id, today.date(), today.date() + timedelta(days=7))
+        ]))
+        time_phase(phases, 'generation.cohort_tasks',
+                   lambda: sum(scheduler.schedule_garden_cohorts(garden_id) for garden_id in garden_ids))
+        time_phase(phases, 'generation.stage_timelines', lambda: StageTimelineStore(db_manager).sync())
+        time_phase(phases, 'generation.environmental_triggers', scheduler.check_all_environmental_triggers)
+        
+        # Multi-garden coordination
+        coordinator = time_phase(phases, 'coordination.init', lambda: MultiGardenTaskCoordinator(db_manager))
+        time_phase(phases, 'coordination.daily', lambda: coordinator.coordinate_daily_tasks(today))
+        time_phase(phases, 'coordination.horizon',
+                   lambda: coordinator.plan_horizon(today, horizon_days=horizon_days))
+        
+        # Notification scans (the worker's steps, run inline)
+        notifications = time_phase(phases, 'notifications.init', lambda: BasicNotificationSystem(db_manager))
+        
+        def schedule_timers():
+            notifications._schedule_all_timers()
+            return notifications.timer_heap
+        
+        def fire_due_timers():
+            notifications._fire_due_timers()
+            return notifications.notification_queue
+        
+        def growth_milestones():
+            notifications._check_growth_milestones(datetime.now())
+            return notifications.notification_queue
+        
+        def process_queue():
+            notifications._process_notification_queue()
+            return sum(sink['pending'] + sink['delivered'] for sink in notifications.dispatcher.get_stats()['sinks'].values())
+        
+        time_phase(phases, 'notifications.schedule_timers', schedule_timers)
+        time_phase(phases, 'notifications.fire_due_timers', fire_due_timers)
+        time_phase(phases, 'notifications.growth_milestones', growth_milestones)
+        time_phase(phases, 'notifications.process_queue', process_queue)
+        notifications.dispatcher.stop()
+        
+        return {
+            'farm': asdict(spec),
+            'rows': counts,
+            'seed_seconds': round(seed_seconds, 6),
+            'phases': phases,
+            'invalid_phases': [name for name, phase in phases.items() if not phase['valid']],
+            'total_seconds': round(sum(phase['seconds'] for phase in phases.values()), 6)
+        }
+
+def _git_commit() -> str:
+    """Current commit of the checkout, if there is one"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root,
+                              capture_output=True, text=True, timeout=10).stdout.strip()
+    except Exception:
+        return ''
+
+def main():
+    """Benchmark entry point"""
+    parser = argparse.ArgumentParser(description="Time GrowMaster Pro schedulers on synthetic operations")
+    parser.add_argument('--gardens', type=int, nargs='+', default=[10, 100, 1000], help="farm sizes to run")
+    parser.add_argument('--plants', type=int, default=FarmSpec.plants_per_garden, help="plants per garden")
+    parser.add_argument('--cohorts', type=int, default=FarmSpec.cohorts_per_garden, help="cohorts per garden")
+    parser.add_argument('--cohort-size', type=int, default=FarmSpec.cohort_size, help="plants per cohort")
+    parser.add_argument('--readings', type=int, default=FarmSpec.readings_per_garden, help="readings per garden")
+    parser.add_argument('--years', type=float, default=FarmSpec.years_of_tasks, help="years of task history")
+    parser.add_argument('--tasks-per-week', type=int, default=FarmSpec.tasks_per_garden_per_week,
+                        help="tasks per garden per week")
+    parser.add_argument('--horizon-days', type=int, default=14, help="coordination horizon")
+    parser.add_argument('--seed', type=int, default=FarmSpec.seed, help="random seed")
+    parser.add_argument('--output', help="write JSON results to this file instead of stdout")
+    parser.add_argument('--verbose', action='store_true', help="show application logging")
+    parser.add_argument('--allow-errors', action='store_true',
+                        help="exit with status 0 even when phases logged errors")
+    args = parser.parse_args()
+    
+    if args.verbose:
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    else:
+        logging.getLogger().setLevel(logging.ERROR)
+    
+    runs = []
+    for gardens in args.gardens:
+        spec = FarmSpec(gardens=gardens, plants_per_garden=args.plants, cohorts_per_garden=args.cohorts,
+                        cohort_size=args.cohort_size, readings_per_garden=args.readings,
+                        years_of_tasks=args.years, tasks_per_garden_per_week=args.tasks_per_week,
+                        seed=args.seed)
+        print(f"Benchmarking {gardens} gardens...", file=sys.stderr)
+        runs.append(run_benchmark(spec, args.horizon_days))
+    
+    results = {
+        'benchmark': 'scheduler_scale',
+        'created_at': datetime.now().isoformat(),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'runs': runs
+    }
+    
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + '\n', encoding='utf-8')
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+    invalid = sum(len(run['invalid_phases']) for run in runs)
+    if invalid and not args.allow_errors:
+        print(f"{invalid} phases logged errors; their timings are not comparable", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
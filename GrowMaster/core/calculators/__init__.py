@@ -4,13 +4,14 @@ Comprehensive calculation systems for growing operations
 """
 
 from .nutrient_calculator import NutrientCalculator
-from .lighting_calculator import LightingCalculator
+from .lighting_calculator import LightingCalculator, CanopyPPFDGrid
 from .cost_calculator import CostCalculator
 from .environmental_calculator import EnvironmentalCalculator
 
 __all__ = [
     'NutrientCalculator',
     'LightingCalculator', 
+    'CanopyPPFDGrid',
     'CostCalculator',
     'EnvironmentalCalculator'
 ]
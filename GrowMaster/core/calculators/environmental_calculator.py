@@ -3,12 +3,55 @@ Environmental Calculator System
 VPD, climate control, and environmental optimization calculations
 """
 
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Optional, Sequence, Union
 import math
 import logging
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+# Saturation vapor pressure es = A * exp(B * T / (T + C)), es in kPa and T in °C
+SVP_A_KPA = 0.6108
+SVP_B = 17.27
+SVP_C = 237.3
+
+# Plant stages without their own VPD range that use another stage's range
+VPD_STAGE_ALIASES = {"germination": "seedling"}
+
+# VPD ratings by upper bound (kPa); a value on a bound gets the lower rating, except below the first
+VPD_RATING_BOUNDS = (0.4, 0.8, 1.2, 1.4)
+VPD_RATINGS = ("too_low", "good_for_seedlings", "good_for_vegetative", "good_for_flowering", "too_high")
+
+VPD_DTYPE = np.dtype([
+    ("temperature_f", "f8"),
+    ("temperature_c", "f8"),
+    ("relative_humidity", "f8"),
+    ("saturated_vapor_pressure_kpa", "f8"),
+    ("actual_vapor_pressure_kpa", "f8"),
+    ("vpd_kpa", "f8"),
+    ("vpd_rating", "U20")
+])
+
+OPTIMAL_HUMIDITY_DTYPE = np.dtype([
+    ("temperature_f", "f8"),
+    ("target_vpd", "f8"),
+    ("optimal_humidity", "f8"),
+    ("humidity_min", "f8"),
+    ("humidity_max", "f8")
+])
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+def fahrenheit_to_celsius(temperature_f: ArrayLike) -> np.ndarray:
+    """Convert Fahrenheit to Celsius (scalars or arrays)"""
+    return (np.asarray(temperature_f, dtype=float) - 32) * 5 / 9
+
+def saturation_vapor_pressure_kpa(temperature_c: ArrayLike) -> np.ndarray:
+    """Saturated vapor pressure in kPa (scalars or arrays)"""
+    temperature_c = np.asarray(temperature_c, dtype=float)
+    return SVP_A_KPA * np.exp((SVP_B * temperature_c) / (temperature_c + SVP_C))
+
 class EnvironmentalCalculator:
     """Advanced environmental calculation system"""
     
@@ -56,80 +99,103 @@ class EnvironmentalCalculator:
             "maximum_safe": 1500  # Upper limit for plant health
         }
     
-    def calculate_vpd(self, temperature_f: float, relative_humidity: float) -> Dict:
-        """Calculate Vapor Pressure Deficit"""
-        
-        # Convert Fahrenheit to Celsius
-        temp_c = (temperature_f - 32) * 5/9
-        
-        # Calculate saturated vapor pressure using Antoine equation
-        # es = 0.6108 * exp(17.27 * T / (T + 237.3))
-        es_kpa = 0.6108 * math.exp((17.27 * temp_c) / (temp_c + 237.3))
-        
-        # Calculate actual vapor pressure
+    def calculate_vpd_array(self, temperature_f: ArrayLike, relative_humidity: ArrayLike) -> np.ndarray:
+        """Calculate Vapor Pressure Deficit for arrays of readings
+        
+        Inputs broadcast against each other; the result is a VPD_DTYPE
+        structured array of the broadcast shape with unrounded values.
+        """
+        temperature_f = np.asarray(temperature_f, dtype=float)
+        relative_humidity = np.asarray(relative_humidity, dtype=float)
+        temp_c = fahrenheit_to_celsius(temperature_f)
+        es_kpa = saturation_vapor_pressure_kpa(temp_c)
         ea_kpa = es_kpa * (relative_humidity / 100)
-        
-        # Calculate VPD
         vpd_kpa = es_kpa - ea_kpa
         
+        result = np.empty(np.broadcast(temperature_f, relative_humidity).shape, dtype=VPD_DTYPE)
+        result["temperature_f"] = temperature_f
+        result["temperature_c"] = temp_c
+        result["relative_humidity"] = relative_humidity
+        result["saturated_vapor_pressure_kpa"] = es_kpa
+        result["actual_vapor_pressure_kpa"] = ea_kpa
+        result["vpd_kpa"] = vpd_kpa
+        result["vpd_rating"] = self.rate_vpd_array(vpd_kpa)
+        return result
+    
+    def calculate_vpd(self, temperature_f: float, relative_humidity: float) -> Dict:
+        """Calculate Vapor Pressure Deficit"""
+        vpd = self.calculate_vpd_array(temperature_f, relative_humidity)[()]
+        
         return {
             "temperature_f": temperature_f,
-            "temperature_c": round(temp_c, 1),
+            "temperature_c": round(float(vpd["temperature_c"]), 1),
             "relative_humidity": relative_humidity,
-            "saturated_vapor_pressure_kpa": round(es_kpa, 3),
-            "actual_vapor_pressure_kpa": round(ea_kpa, 3),
-            "vpd_kpa": round(vpd_kpa, 2),
-            "vpd_rating": self._rate_vpd(vpd_kpa)
+            "saturated_vapor_pressure_kpa": round(float(vpd["saturated_vapor_pressure_kpa"]), 3),
+            "actual_vapor_pressure_kpa": round(float(vpd["actual_vapor_pressure_kpa"]), 3),
+            "vpd_kpa": round(float(vpd["vpd_kpa"]), 2),
+            "vpd_rating": str(vpd["vpd_rating"])
         }
     
+    def rate_vpd_array(self, vpd: ArrayLike) -> np.ndarray:
+        """Rate VPD values for plant health (array of rating names)"""
+        vpd = np.asarray(vpd, dtype=float)
+        # Bounds after the first are inclusive; NaN sorts past every bound and rates too_high
+        index = np.searchsorted(VPD_RATING_BOUNDS[1:], vpd, side="left") + 1
+        index = np.where(vpd < VPD_RATING_BOUNDS[0], 0, index)
+        return np.asarray(VPD_RATINGS)[index]
+    
     def _rate_vpd(self, vpd: float) -> str:
         """Rate VPD value for plant health"""
-        if vpd < 0.4:
-            return "too_low"
-        elif vpd <= 0.8:
-            return "good_for_seedlings"
-        elif vpd <= 1.2:
-            return "good_for_vegetative"
-        elif vpd <= 1.4:
-            return "good_for_flowering"
-        else:
-            return "too_high"
+        return str(self.rate_vpd_array(vpd))
+    
+    def find_optimal_humidity_array(self, temperature_f: ArrayLike,
+                                    growth_stage: Union[str, Sequence[str], np.ndarray]) -> np.ndarray:
+        """Find optimal humidity and acceptable humidity range for arrays of temperatures and stages
+        
+        growth_stage is one stage name or one per reading. The result is an
+        OPTIMAL_HUMIDITY_DTYPE structured array with humidities clipped to 0-100%.
+        """
+        temperature_f, growth_stage = np.broadcast_arrays(np.asarray(temperature_f, dtype=float),
+                                                          np.asarray(growth_stage))
+        stages, stage_index = np.unique(growth_stage, return_inverse=True)
+        unknown = [str(stage) for stage in stages if str(stage) not in self.vpd_ranges]
+        if unknown:
+            raise KeyError(f"Unknown growth stage(s): {', '.join(unknown)}")
+        stage_index = stage_index.reshape(growth_stage.shape)
+        
+        def per_stage(key: str) -> np.ndarray:
+            return np.array([self.vpd_ranges[str(stage)][key] for stage in stages], dtype=float)[stage_index]
+        
+        es_kpa = saturation_vapor_pressure_kpa(fahrenheit_to_celsius(temperature_f))
+        target_vpd = per_stage("optimal")
+        
+        def humidity_for(vpd: np.ndarray) -> np.ndarray:
+            # Relative humidity at which the actual vapor pressure leaves this deficit
+            return np.clip((es_kpa - vpd) / es_kpa * 100, 0, 100)
+        
+        result = np.empty(temperature_f.shape, dtype=OPTIMAL_HUMIDITY_DTYPE)
+        result["temperature_f"] = temperature_f
+        result["target_vpd"] = target_vpd
+        result["optimal_humidity"] = humidity_for(target_vpd)
+        result["humidity_min"] = humidity_for(per_stage("max"))
+        result["humidity_max"] = humidity_for(per_stage("min"))
+        return result
     
     def find_optimal_humidity(self, temperature_f: float, growth_stage: str) -> Dict:
         """Find optimal humidity for target VPD at given temperature"""
-        
-        target_vpd = self.vpd_ranges[growth_stage]["optimal"]
-        temp_c = (temperature_f - 32) * 5/9
-        
-        # Calculate saturated vapor pressure
-        es_kpa = 0.6108 * math.exp((17.27 * temp_c) / (temp_c + 237.3))
-        
-        # Calculate required actual vapor pressure for target VPD
-        ea_required = es_kpa - target_vpd
-        
-        # Calculate required relative humidity
-        rh_optimal = (ea_required / es_kpa) * 100
-        
-        # Get acceptable VPD range
-        vpd_min = self.vpd_ranges[growth_stage]["min"]
-        vpd_max = self.vpd_ranges[growth_stage]["max"]
-        
-        # Calculate humidity range for acceptable VPD
-        ea_max = es_kpa - vpd_min
-        ea_min = es_kpa - vpd_max
-        rh_max = (ea_max / es_kpa) * 100
-        rh_min = (ea_min / es_kpa) * 100
+        optimal = self.find_optimal_humidity_array(temperature_f, growth_stage)[()]
+        optimal_humidity = float(optimal["optimal_humidity"])
         
         return {
             "temperature_f": temperature_f,
             "growth_stage": growth_stage,
-            "target_vpd": target_vpd,
-            "optimal_humidity": round(max(0, min(100, rh_optimal)), 1),
+            "target_vpd": self.vpd_ranges[growth_stage]["optimal"],
+            "optimal_humidity": round(optimal_humidity, 1),
             "humidity_range": {
-                "min": round(max(0, min(100, rh_min)), 1),
-                "max": round(max(0, min(100, rh_max)), 1)
+                "min": round(float(optimal["humidity_min"]), 1),
+                "max": round(float(optimal["humidity_max"]), 1)
             },
-            "climate_recommendations": self._get_climate_recommendations(temperature_f, rh_optimal, growth_stage)
+            "climate_recommendations": self._get_climate_recommendations(temperature_f, optimal_humidity, growth_stage)
         }
     
     def _get_climate_recommendations(self, temp_f: float, humidity: float, stage: str) -> List[str]:
@@ -152,6 +218,46 @@ class EnvironmentalCalculator:
         
         return recommendations
     
+    def calculate_dew_point_array(self, temperature_f: ArrayLike, relative_humidity: ArrayLike) -> np.ndarray:
+        """Dew point in °F for arrays of readings (Magnus formula on the same curve as VPD; NaN at 0% humidity)"""
+        temp_c = fahrenheit_to_celsius(temperature_f)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            gamma = np.log(np.asarray(relative_humidity, dtype=float) / 100) + SVP_B * temp_c / (temp_c + SVP_C)
+            dew_point_c = SVP_C * gamma / (SVP_B - gamma)
+        return dew_point_c * 9 / 5 + 32
+    
+    # Scalar forms of the curves above, fast enough to call once per row from SQLite
+    
+    def vpd_kpa(self, temperature_f: Optional[float], relative_humidity: Optional[float]) -> Optional[float]:
+        """VPD in kPa for one reading; None when a value is missing"""
+        if temperature_f is None or relative_humidity is None:
+            return None
+        temp_c = (temperature_f - 32) * 5 / 9
+        es_kpa = SVP_A_KPA * math.exp((SVP_B * temp_c) / (temp_c + SVP_C))
+        return es_kpa * (1 - relative_humidity / 100)
+    
+    def dew_point_f(self, temperature_f: Optional[float], relative_humidity: Optional[float]) -> Optional[float]:
+        """Dew point in °F for one reading; None when a value is missing or humidity is not positive"""
+        if temperature_f is None or relative_humidity is None or relative_humidity <= 0:
+            return None
+        temp_c = (temperature_f - 32) * 5 / 9
+        gamma = math.log(relative_humidity / 100) + SVP_B * temp_c / (temp_c + SVP_C)
+        return SVP_C * gamma / (SVP_B - gamma) * 9 / 5 + 32
+    
+    def vpd_band(self, growth_stage: Optional[str], vpd: Optional[float]) -> Optional[str]:
+        """'below', 'in_band' or 'above' the stage's acceptable VPD range; None for unknown stages"""
+        if growth_stage is None or vpd is None:
+            return None
+        stage = str(growth_stage).lower()
+        vpd_range = self.vpd_ranges.get(VPD_STAGE_ALIASES.get(stage, stage))
+        if vpd_range is None:
+            return None
+        if vpd < vpd_range["min"]:
+            return "below"
+        if vpd > vpd_range["max"]:
+            return "above"
+        return "in_band"
+    
     def calculate_air_exchange(self, tent_width_ft: float, tent_depth_ft: float, 
                              tent_height_ft: float, target_exchange_rate: str = "active_exhaust") -> Dict:
         """Calculate required air exchange for grow space"""
@@ -207,10 +313,8 @@ class EnvironmentalCalculator:
         if current_humidity <= target_humidity:
             return {"message": "No dehumidification needed", "current_humidity": current_humidity, "target_humidity": target_humidity}
         
-        temp_c = (temperature_f - 32) * 5/9
-        
         # Calculate saturated vapor pressure
-        es_kpa = 0.6108 * math.exp((17.27 * temp_c) / (temp_c + 237.3))
+        es_kpa = float(saturation_vapor_pressure_kpa(fahrenheit_to_celsius(temperature_f)))
         
         # Current and target actual vapor pressures
         current_ea = es_kpa * (current_humidity / 100)
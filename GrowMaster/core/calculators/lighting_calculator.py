@@ -3,12 +3,296 @@ Lighting Calculator System
 PPFD, DLI, and energy efficiency calculations
 """
 
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Union
 import math
 import logging
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+# Height of the fixture specs' ppfd_center readings (inches)
+PPFD_REFERENCE_HEIGHT_IN = 18
+
+# Light-emitting area assumed for fixtures without dimensions_in (inches)
+DEFAULT_EMITTER_SIZE_IN = (12.0, 12.0)
+
+METERS_PER_FOOT = 0.3048
+METERS_PER_INCH = 0.0254
+
+# PPFD (μmol/m²/s) x hours -> DLI (mol/m²/day)
+DLI_PER_PPFD_HOUR = 3.6 / 1000
+
+# Range searched for the exponent of the 'rated' beam model
+MAX_BEAM_EXPONENT = 60.0
+
+def rated_ppf(fixture_spec: Dict) -> Optional[float]:
+    """Photon flux (μmol/s) a fixture emits: wattage x efficiency, None when either is unknown"""
+    if not fixture_spec.get("wattage") or not fixture_spec.get("efficiency_umol_j"):
+        return None
+    return fixture_spec["wattage"] * fixture_spec["efficiency_umol_j"]
+
+def beam_exponent(beam_model: Union[str, float], fixture_spec: Dict,
+                  offsets: Optional[np.ndarray] = None) -> float:
+    """Exponent m of the I(θ) = I0·cos^m(θ) intensity profile of a fixture
+    
+    'rated' picks the m for which the spec's rated photon flux gives its
+    ppfd_center at the reference height (falling back to 'beam_angle' for
+    specs without wattage and efficiency), 'lambertian' is m = 1,
+    'beam_angle' solves cos^m(half angle) = 0.5 from the spec's beam_angle
+    (120° when unknown), and a number is used as m directly.
+    """
+    if isinstance(beam_model, (int, float)):
+        return float(beam_model)
+    if beam_model == "rated":
+        ppf = rated_ppf(fixture_spec)
+        if ppf is None:
+            return beam_exponent("beam_angle", fixture_spec)
+        if offsets is None:
+            offsets = emitter_offsets(fixture_spec, 1)
+        reference_height = PPFD_REFERENCE_HEIGHT_IN * METERS_PER_INCH
+        
+        # Centre PPFD of the rated flux rises with m over the searched range
+        def center_ppfd(exponent: float) -> float:
+            return ppf * (exponent + 1) / (2 * math.pi * len(offsets)) * point_irradiance(
+                offsets[:, 0], offsets[:, 1], np.float64(reference_height), exponent).sum()
+        
+        low, high = 0.0, MAX_BEAM_EXPONENT
+        if center_ppfd(low) >= fixture_spec["ppfd_center"]:
+            return low
+        if center_ppfd(high) <= fixture_spec["ppfd_center"]:
+            return high
+        for _ in range(50):
+            middle = (low + high) / 2
+            if center_ppfd(middle) < fixture_spec["ppfd_center"]:
+                low = middle
+            else:
+                high = middle
+        return (low + high) / 2
+    if beam_model == "lambertian":
+        return 1.0
+    if beam_model == "beam_angle":
+        half_angle = math.radians(min(fixture_spec.get("beam_angle", 120), 178) / 2)
+        return math.log(0.5) / math.log(math.cos(half_angle))
+    raise ValueError(f"Unknown beam model '{beam_model}'")
+
+def emitter_offsets(fixture_spec: Dict, emitter_grid: int) -> np.ndarray:
+    """(x, y) offsets in meters of the point emitters a fixture is split into"""
+    length_in, width_in = fixture_spec.get("dimensions_in", DEFAULT_EMITTER_SIZE_IN)
+    fractions = (np.arange(emitter_grid) + 0.5) / emitter_grid - 0.5
+    x, y = np.meshgrid(fractions * length_in * METERS_PER_INCH, fractions * width_in * METERS_PER_INCH)
+    return np.column_stack([x.ravel(), y.ravel()])
+
+def canopy_cell_centres(width_ft: float, depth_ft: float, resolution_in: float) -> Tuple[np.ndarray, np.ndarray]:
+    """x and y centres in meters of the cells of a canopy mesh about resolution_in on a side"""
+    width_m, depth_m = width_ft * METERS_PER_FOOT, depth_ft * METERS_PER_FOOT
+    step_m = resolution_in * METERS_PER_INCH
+    columns, rows = max(1, round(width_m / step_m)), max(1, round(depth_m / step_m))
+    return (np.arange(columns) + 0.5) * width_m / columns, (np.arange(rows) + 0.5) * depth_m / rows
+
+def point_irradiance(dx: np.ndarray, dy: np.ndarray, height_m: np.ndarray, exponent: float) -> np.ndarray:
+    """Irradiance on a horizontal plane from unit-intensity cos^m emitters
+    
+    E = I·cos^m(θ)·cos(θ)/d² = h^(m+1) / d^(m+3) with d² = dx² + dy² + h².
+    """
+    distance_sq = dx * dx + dy * dy + height_m * height_m
+    return height_m ** (exponent + 1) * distance_sq ** (-(exponent + 3) / 2)
+
+def emitter_intensity(fixture_spec: Dict, offsets: np.ndarray, exponent: float) -> float:
+    """Intensity per emitter so the fixture emits its rated photon flux
+    
+    A cos^m emitter of intensity I0 emits 2π·I0/(m+1) into the hemisphere.
+    Specs without wattage and efficiency are calibrated to their ppfd_center
+    under the fixture at the reference height instead.
+    """
+    ppf = rated_ppf(fixture_spec)
+    if ppf is not None:
+        return ppf * (exponent + 1) / (2 * math.pi * len(offsets))
+    reference_height = PPFD_REFERENCE_HEIGHT_IN * METERS_PER_INCH
+    center = point_irradiance(offsets[:, 0], offsets[:, 1], np.float64(reference_height), exponent).sum()
+    return fixture_spec["ppfd_center"] / center
+
+# Practical hanging heights above the canopy (inches)
+MIN_HANGING_HEIGHT_IN = 8
+MAX_HANGING_HEIGHT_IN = 36
+
+# Fixture price used when a spec has no price (same rough estimate as recommend_lighting_setup)
+DEFAULT_FIXTURE_COST = 150
+
+# Largest length/width ratio of the cell each fixture covers in a candidate layout
+MAX_LAYOUT_CELL_ASPECT = 2.0
+
+# Step of the trapezoid rule behind exponential_sum (relative error about 1e-5)
+EXPONENTIAL_SUM_STEP = 0.5
+
+def layout_axis(count: int, length_ft: float, spacing_factor: float) -> np.ndarray:
+    """Positions in ft of count fixtures in equal cells along one side of the footprint
+    
+    A spacing factor below 1 pulls them towards the middle, above 1 towards the walls.
+    """
+    positions = length_ft / 2 + (np.arange(count) - (count - 1) / 2) * spacing_factor * length_ft / count
+    return np.clip(positions, 0, length_ft)
+
+def exponential_sum(power: float, s_min: float, s_max: float,
+                    step: float = EXPONENTIAL_SUM_STEP) -> Tuple[np.ndarray, np.ndarray]:
+    """Nodes t and weights w with s^-power ≈ Σ w·exp(-t·s) for s_min <= s <= s_max
+    
+    Trapezoid rule on s^-p = ∫ exp(p·u - s·e^u) du / Γ(p). With s = dx² + dy² + h²
+    every term is a Gaussian in dx times one in dy, so the irradiance of a grid
+    of emitters factors into per-axis sums.
+    """
+    u = np.arange(math.log(power / s_max) - 14 / power, math.log(power / s_min) + 3 + step, step)
+    return np.exp(u), step * np.exp(power * u - math.lgamma(power))
+
+def axis_sums(samples_m: np.ndarray, sources_m: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+    """Σ over sources of exp(-t·(sample - source)²) for every node t: (nodes, samples)
+    
+    Samples and sources must be symmetric about the same centre; only the
+    first half of the samples is computed and the rest mirrored.
+    """
+    half = (len(samples_m) + 1) // 2
+    # float32 exponentials are several times faster and far inside the sum's own error
+    offsets_sq = ((samples_m[:half, None] - sources_m[None, :]) ** 2).astype(np.float32)
+    sums = np.exp(-nodes.astype(np.float32)[:, None, None] * offsets_sq[None, :, :]).sum(axis=-1, dtype=np.float64)
+    return np.concatenate([sums, sums[:, :len(samples_m) // 2][:, ::-1]], axis=1)
+
+def pareto_front(objectives: np.ndarray) -> np.ndarray:
+    """Mask of the rows no other row dominates (every objective minimized)
+    
+    Rows are visited in lexicographic order, so a row can only be dominated
+    by one already on the front.
+    """
+    mask = np.zeros(len(objectives), dtype=bool)
+    front = np.empty_like(objectives, dtype=float)
+    size = 0
+    for index in np.lexsort(objectives.T[::-1]):
+        row = objectives[index]
+        kept = front[:size]
+        if ((kept <= row).all(axis=1) & (kept < row).any(axis=1)).any():
+            continue
+        mask[index] = True
+        front[size] = row
+        size += 1
+    return mask
+
+class CanopyPPFDGrid:
+    """PPFD over a canopy mesh summed from per-fixture beam footprints
+    
+    Each fixture is split into a grid of cos^m point emitters that together
+    emit its rated photon flux, and its footprint is the
+    irradiance those emitters put on every cell centre. Walls can add a
+    first-order mirror image of every fixture. Footprints are cached per
+    fixture, so moving, dimming or adding one fixture only recomputes that
+    fixture's footprint.
+    """
+    
+    def __init__(self, width_ft: float, depth_ft: float, resolution_in: float = 3.0,
+                 beam_model: Union[str, float] = "rated", emitter_grid: int = 3,
+                 wall_reflectance: float = 0.0):
+        self.width_ft = width_ft
+        self.depth_ft = depth_ft
+        self.resolution_in = resolution_in
+        self.beam_model = beam_model
+        self.emitter_grid = emitter_grid
+        self.wall_reflectance = wall_reflectance
+        
+        # Cell centres in meters
+        self.x, self.y = canopy_cell_centres(width_ft, depth_ft, resolution_in)
+        
+        self.fixtures: List[Dict] = []
+        self.footprints: List[np.ndarray] = []
+    
+    def _sources(self, x_m: float, y_m: float, offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Emitter positions and weights, with mirror images in the walls if they reflect"""
+        sx, sy = x_m + offsets[:, 0], y_m + offsets[:, 1]
+        weights = np.ones(len(offsets))
+        if self.wall_reflectance > 0:
+            width_m, depth_m = self.width_ft * METERS_PER_FOOT, self.depth_ft * METERS_PER_FOOT
+            sx = np.concatenate([sx, -sx, 2 * width_m - sx, sx, sx])
+            sy = np.concatenate([sy, sy, sy, -sy, 2 * depth_m - sy])
+            weights = np.concatenate([weights, np.full(4 * len(offsets), self.wall_reflectance)])
+        return sx, sy, weights
+    
+    def _footprint(self, fixture: Dict) -> np.ndarray:
+        """PPFD a single fixture puts on every cell"""
+        spec = fixture["spec"]
+        offsets = emitter_offsets(spec, self.emitter_grid)
+        exponent = beam_exponent(self.beam_model, spec, offsets)
+        intensity = emitter_intensity(spec, offsets, exponent) * fixture["dimming"]
+        
+        sx, sy, weights = self._sources(fixture["x_ft"] * METERS_PER_FOOT, fixture["y_ft"] * METERS_PER_FOOT, offsets)
+        irradiance = point_irradiance(self.x[None, None, :] - sx[:, None, None],
+                                      self.y[None, :, None] - sy[:, None, None],
+                                      np.float64(fixture["height_in"] * METERS_PER_INCH), exponent)
+        return intensity * np.tensordot(weights, irradiance, axes=1)
+    
+    def add_fixture(self, fixture_spec: Dict, x_ft: float, y_ft: float, height_in: float,
+                    dimming: float = 1.0, name: str = "") -> int:
+        """Hang a fixture centred at (x_ft, y_ft) height_in above the canopy; returns its index"""
+        fixture = {"name": name, "spec": fixture_spec, "x_ft": x_ft, "y_ft": y_ft,
+                   "height_in": height_in, "dimming": dimming}
+        self.fixtures.append(fixture)
+        self.footprints.append(self._footprint(fixture))
+        return len(self.fixtures) - 1
+    
+    def move_fixture(self, index: int, x_ft: Optional[float] = None, y_ft: Optional[float] = None,
+                     height_in: Optional[float] = None, dimming: Optional[float] = None):
+        """Move, raise/lower or dim one fixture and recompute only its footprint"""
+        fixture = self.fixtures[index]
+        for key, value in (("x_ft", x_ft), ("y_ft", y_ft), ("height_in", height_in), ("dimming", dimming)):
+            if value is not None:
+                fixture[key] = value
+        self.footprints[index] = self._footprint(fixture)
+    
+    def remove_fixture(self, index: int):
+        """Take a fixture down"""
+        del self.fixtures[index]
+        del self.footprints[index]
+    
+    @property
+    def ppfd(self) -> np.ndarray:
+        """PPFD map (rows along depth, columns along width)"""
+        if not self.footprints:
+            return np.zeros((len(self.y), len(self.x)))
+        return np.sum(self.footprints, axis=0)
+    
+    def summary(self, photoperiod_hours: Optional[float] = None) -> Dict:
+        """PPFD map with min/max/average and uniformity, plus DLI per cell for a photoperiod"""
+        ppfd = self.ppfd
+        ppfd_min, ppfd_max, ppfd_average = float(ppfd.min()), float(ppfd.max()), float(ppfd.mean())
+        
+        result = {
+            "canopy": {
+                "width_ft": self.width_ft,
+                "depth_ft": self.depth_ft,
+                "resolution_in": self.resolution_in,
+                "cells": int(ppfd.size)
+            },
+            "fixtures": len(self.fixtures),
+            "total_wattage": round(sum(fixture["spec"].get("wattage", 0) * fixture["dimming"]
+                                       for fixture in self.fixtures)),
+            "x_ft": self.x / METERS_PER_FOOT,
+            "y_ft": self.y / METERS_PER_FOOT,
+            "ppfd_map": ppfd,
+            "ppfd_min": round(ppfd_min),
+            "ppfd_max": round(ppfd_max),
+            "ppfd_average": round(ppfd_average),
+            # Min/average uniformity (%) and min/max ratio
+            "uniformity": round(ppfd_min / ppfd_average * 100, 1) if ppfd_average > 0 else 0.0,
+            "min_max_ratio": round(ppfd_min / ppfd_max, 2) if ppfd_max > 0 else 0.0
+        }
+        
+        if photoperiod_hours is not None:
+            dli = ppfd * photoperiod_hours * DLI_PER_PPFD_HOUR
+            result.update({
+                "photoperiod_hours": photoperiod_hours,
+                "dli_map": dli,
+                "dli_min": round(float(dli.min()), 1),
+                "dli_average": round(float(dli.mean()), 1),
+                "dli_max": round(float(dli.max()), 1)
+            })
+        return result
+
 class LightingCalculator:
     """Advanced lighting calculation system"""
     
@@ -113,6 +397,27 @@ class LightingCalculator:
             "dli_unit": "mol/m²/day"
         }
     
+    def create_ppfd_grid(self, width_ft: float, depth_ft: float, fixtures: List[Dict] = None,
+                         resolution_in: float = 3.0, beam_model: Union[str, float] = "rated",
+                         emitter_grid: int = 3, wall_reflectance: float = 0.0) -> CanopyPPFDGrid:
+        """Build a canopy PPFD grid and hang fixtures given as
+        {"fixture_name", "x_ft", "y_ft", "height_in", "dimming"} dicts
+        """
+        grid = CanopyPPFDGrid(width_ft, depth_ft, resolution_in, beam_model, emitter_grid, wall_reflectance)
+        for fixture in fixtures or []:
+            fixture_name = fixture["fixture_name"]
+            if fixture_name not in self.fixture_specs:
+                raise ValueError(f"Fixture '{fixture_name}' not found in database")
+            grid.add_fixture(self.fixture_specs[fixture_name], fixture["x_ft"], fixture["y_ft"],
+                             fixture.get("height_in", PPFD_REFERENCE_HEIGHT_IN), fixture.get("dimming", 1.0),
+                             fixture_name)
+        return grid
+    
+    def calculate_ppfd_map(self, fixtures: List[Dict], width_ft: float, depth_ft: float,
+                           photoperiod_hours: Optional[float] = None, **grid_options) -> Dict:
+        """PPFD and DLI maps of a multi-fixture canopy with min/max, average and uniformity"""
+        return self.create_ppfd_grid(width_ft, depth_ft, fixtures, **grid_options).summary(photoperiod_hours)
+    
     def recommend_lighting_setup(self, grow_space_sq_ft: float, growth_stage: str,
                                 budget: Optional[float] = None) -> Dict:
         """Recommend optimal lighting setup for given space and stage"""
@@ -166,6 +471,196 @@ class LightingCalculator:
             "recommendations": recommendations[:3]  # Top 3 options
         }
     
+    def optimize_lighting_layout(self, garden, growth_stage: str = "flowering",
+                                 budget: Optional[float] = None, max_wattage: Optional[float] = None,
+                                 min_uniformity: float = 60.0, ppfd_tolerance: float = 0.1,
+                                 fixture_names: Optional[List[str]] = None, max_fixtures: Optional[int] = None,
+                                 heights_in: Optional[List[float]] = None,
+                                 spacing_factors: Tuple[float, ...] = (0.9, 1.0, 1.1, 1.2),
+                                 resolution_in: float = 3.0, beam_model: Union[str, float] = "rated",
+                                 emitter_grid: int = 3) -> Dict:
+        """Sweep fixture model x rows x columns x spacing x height and return the Pareto front of layouts
+        
+        garden is a Garden (dimensions length x width in feet) or a garden row
+        with dimensions_length/dimensions_width. Every layout is evaluated on
+        the same canopy mesh and emitter split as create_ppfd_grid with these
+        settings, so a layout's fixture_positions_ft reproduce its PPFD and
+        uniformity there. Layouts whose average PPFD is within ppfd_tolerance
+        of the stage's optimal PPFD (and at most its maximum), with at least
+        min_uniformity % min/avg uniformity and within budget and max_wattage,
+        are kept. The front trades off cost, wattage, uniformity and PPFD error.
+        """
+        if hasattr(garden, "dimensions"):
+            width_ft, depth_ft = garden.dimensions["length"], garden.dimensions["width"]
+        else:
+            width_ft, depth_ft = garden["dimensions_length"], garden["dimensions_width"]
+        if not width_ft or not depth_ft or width_ft <= 0 or depth_ft <= 0:
+            raise ValueError("Garden footprint must have a positive length and width")
+        
+        target_ppfd = self.ppfd_requirements[growth_stage]["optimal"]
+        max_ppfd = self.ppfd_requirements[growth_stage]["max"]
+        lowest_ppfd = target_ppfd * (1 - ppfd_tolerance)
+        heights = np.asarray(heights_in if heights_in is not None else
+                             np.arange(MIN_HANGING_HEIGHT_IN, MAX_HANGING_HEIGHT_IN + 1, 2), dtype=float)
+        height_m = heights * METERS_PER_INCH
+        
+        # Every layout is symmetric about the centre lines of the mesh, so the
+        # minimum is found in one quadrant (middle row/column included)
+        x_m, y_m = canopy_cell_centres(width_ft, depth_ft, resolution_in)
+        x_half, y_half = (len(x_m) + 1) // 2, (len(y_m) + 1) // 2
+        
+        candidates = []
+        evaluated = 0
+        for fixture_name in fixture_names or list(self.fixture_specs):
+            if fixture_name not in self.fixture_specs:
+                raise ValueError(f"Fixture '{fixture_name}' not found in database")
+            spec = self.fixture_specs[fixture_name]
+            cost = spec.get("price", DEFAULT_FIXTURE_COST)
+            offsets = emitter_offsets(spec, emitter_grid)
+            exponent = beam_exponent(beam_model, spec, offsets)
+            x_offsets, y_offsets = offsets[:emitter_grid, 0], offsets[::emitter_grid, 1]
+            
+            # Emitters form a grid of x sources times y sources, so with
+            # E = I·h^(m+1)·Σ w·exp(-t·h²)·exp(-t·dx²)·exp(-t·dy²) a layout's map is
+            # (rows x nodes) @ (nodes x columns) per height
+            s_max = ((x_m[-1] + np.ptp(x_offsets)) ** 2 + (y_m[-1] + np.ptp(y_offsets)) ** 2 +
+                     height_m.max() ** 2)
+            nodes, weights = exponential_sum((exponent + 3) / 2, height_m.min() ** 2, s_max)
+            height_terms = (emitter_intensity(spec, offsets, exponent) * height_m[:, None] ** (exponent + 1) *
+                            weights * np.exp(-np.outer(height_m ** 2, nodes)))
+            
+            axis_cache: Dict[Tuple, np.ndarray] = {}
+            
+            def sums(axis: str, count: int, factor: float) -> np.ndarray:
+                """Per-node axis sums of count fixtures along the width ('x') or depth ('y')"""
+                key = (axis, count, factor)
+                if key not in axis_cache:
+                    length_ft, samples, axis_offsets = ((width_ft, x_m, x_offsets) if axis == "x" else
+                                                        (depth_ft, y_m, y_offsets))
+                    sources = layout_axis(count, length_ft, factor)[:, None] * METERS_PER_FOOT + axis_offsets
+                    axis_cache[key] = axis_sums(samples, sources.ravel(), nodes)
+                return axis_cache[key]
+            
+            def mean_ppfd(rows: int, columns: int, factor: float) -> np.ndarray:
+                """Average PPFD of a layout at every height"""
+                return height_terms @ (sums("y", rows, factor).mean(axis=1) * sums("x", columns, factor).mean(axis=1))
+            
+            # Average PPFD grows about linearly with fixture count. One centred
+            # fixture bounds what a fixture adds, and one clipped into a corner
+            # still lands about a quarter of that on the canopy.
+            single_average = mean_ppfd(1, 1, 1.0)
+            min_count = max(1, math.ceil(lowest_ppfd / single_average.max()))
+            count_limit = math.floor(4 * max_ppfd / single_average.min())
+            if max_fixtures is not None:
+                count_limit = min(count_limit, max_fixtures)
+            if budget is not None:
+                count_limit = min(count_limit, int(budget // cost))
+            if max_wattage is not None:
+                count_limit = min(count_limit, int(max_wattage // spec["wattage"]))
+            
+            for rows in range(1, count_limit + 1):
+                first_columns = max(math.ceil(min_count / rows),
+                                    math.floor(width_ft * rows / (depth_ft * MAX_LAYOUT_CELL_ASPECT)))
+                if first_columns * rows > count_limit:
+                    break
+                
+                tried = 0
+                for columns in range(max(1, first_columns), count_limit // rows + 1):
+                    aspect = (width_ft / columns) / (depth_ft / rows)
+                    if aspect < 1 / MAX_LAYOUT_CELL_ASPECT:
+                        break
+                    if aspect > MAX_LAYOUT_CELL_ASPECT:
+                        continue
+                    
+                    tried += 1
+                    count = rows * columns
+                    over_max = True
+                    for factor in spacing_factors if count > 1 else (1.0,):
+                        layout_averages = mean_ppfd(rows, columns, factor)
+                        evaluated += len(heights)
+                        over_max &= bool((layout_averages > max_ppfd).all())
+                        in_range = (layout_averages >= lowest_ppfd) & (layout_averages <= max_ppfd)
+                        if not in_range.any():
+                            continue
+                        
+                        # The wall row and column bound the minimum from above, which rules
+                        # out most non-uniform layouts before the full quadrant is mapped
+                        row_sums = sums("y", rows, factor)[:, :y_half]
+                        column_sums = sums("x", columns, factor)[:, :x_half]
+                        wall_minimums = np.minimum(((height_terms * row_sums[:, 0]) @ column_sums).min(axis=1),
+                                                   ((height_terms * column_sums[:, 0]) @ row_sums).min(axis=1))
+                        in_range &= wall_minimums >= layout_averages * min_uniformity / 100
+                        if not in_range.any():
+                            continue
+                        
+                        quadrant = (row_sums.T[None, :, :] * height_terms[in_range][:, None, :]) @ column_sums
+                        minimums = quadrant.min(axis=(1, 2))
+                        x_ft = layout_axis(columns, width_ft, factor)
+                        y_ft = layout_axis(rows, depth_ft, factor)
+                        positions = np.column_stack([np.tile(x_ft, rows), np.repeat(y_ft, columns)])
+                        for height, average, minimum in zip(heights[in_range], layout_averages[in_range], minimums):
+                            candidates.append({
+                                "fixture_name": fixture_name,
+                                "fixtures": count,
+                                "rows": rows,
+                                "columns": columns,
+                                "spacing_factor": factor,
+                                "spacing_ft": (round(factor * width_ft / columns, 2),
+                                               round(factor * depth_ft / rows, 2)),
+                                "height_in": float(height),
+                                "ppfd_average": float(average),
+                                "ppfd_min": float(minimum),
+                                "total_wattage": count * spec["wattage"],
+                                "estimated_cost": count * cost,
+                                "positions": positions
+                            })
+                    
+                    # More columns only add light
+                    if over_max:
+                        break
+                
+                # and so do more rows once the narrowest layout is too bright
+                if tried == 1 and over_max:
+                    break
+        
+        if not candidates:
+            feasible = []
+        else:
+            averages = np.array([candidate["ppfd_average"] for candidate in candidates])
+            uniformity = np.array([candidate["ppfd_min"] for candidate in candidates]) / averages * 100
+            mask = ((averages >= lowest_ppfd) & (averages <= max_ppfd) &
+                    (uniformity >= min_uniformity))
+            feasible = np.flatnonzero(mask)
+        
+        front = []
+        if len(feasible):
+            objectives = np.column_stack([
+                [candidates[i]["estimated_cost"] for i in feasible],
+                [candidates[i]["total_wattage"] for i in feasible],
+                -uniformity[feasible],
+                np.abs(averages[feasible] - target_ppfd)
+            ])
+            for i in feasible[pareto_front(objectives)]:
+                candidate = candidates[i]
+                front.append({
+                    **{key: value for key, value in candidate.items() if key != "positions"},
+                    "ppfd_average": round(candidate["ppfd_average"]),
+                    "ppfd_min": round(candidate["ppfd_min"]),
+                    "uniformity": round(float(uniformity[i]), 1),
+                    "fixture_positions_ft": [tuple(position) for position in
+                                             np.round(candidate["positions"], 3).tolist()]
+                })
+            front.sort(key=lambda layout: (layout["estimated_cost"], layout["total_wattage"], -layout["uniformity"]))
+        
+        return {
+            "footprint_ft": (width_ft, depth_ft),
+            "growth_stage": growth_stage,
+            "target_ppfd": target_ppfd,
+            "candidates_evaluated": evaluated,
+            "feasible_layouts": int(len(feasible)),
+            "pareto_front": front
+        }
+    
     def calculate_energy_costs(self, fixture_name: str, fixtures_count: int,
                              photoperiod_hours: float, location: str = "us_average") -> Dict:
         """Calculate energy costs for lighting setup"""
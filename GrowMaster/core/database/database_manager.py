@@ -8,11 +8,14 @@ import sqlite3
 import json
 import logging
 import os
+import re
 from datetime import datetime, date, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 from pathlib import Path
 import shutil
 
+from ..calculators.environmental_calculator import EnvironmentalCalculator
+
 logger = logging.getLogger(__name__)
 
 class DatabaseManager:
@@ -31,15 +34,77 @@ class DatabaseManager:
         self.backup_dir = Path(self.db_path).parent / "backups"
         self.backup_dir.mkdir(exist_ok=True)
         
+        # Callbacks notified as callback(change_type, task_id) after task edits
+        self.task_change_listeners = []
+        
+        # Callbacks notified as callback(readings) after environmental readings are recorded
+        self.reading_listeners = []
+        
+        # Incremented on every task or garden change so cached plans can detect staleness
+        self.data_version = 0
+        
+        # Task template versions never change once written, so both lookups are cached for good
+        self.task_template_ids: Dict[tuple, int] = {}  # (name, text fields) -> template id
+        self.task_templates: Dict[int, Dict] = {}  # template id -> template row
+        
+        # Backs the VPD and dew point SQL functions registered on every connection
+        self.environmental_calculator = EnvironmentalCalculator()
+        
         self.initialize_database()
     
+    def add_task_change_listener(self, callback):
+        """Register a callback for task changes ('created', 'updated', 'completed', 'reopened', 'deleted', 'bulk', 'garden')"""
+        if callback not in self.task_change_listeners:
+            self.task_change_listeners.append(callback)
+    
+    def remove_task_change_listener(self, callback):
+        """Unregister a task change callback"""
+        if callback in self.task_change_listeners:
+            self.task_change_listeners.remove(callback)
+    
+    def _notify_task_change(self, change_type: str, task_id: Optional[int] = None):
+        """Tell listeners that a task changed; a failing listener never breaks the edit"""
+        self.data_version += 1
+        for callback in list(self.task_change_listeners):
+            try:
+                callback(change_type, task_id)
+            except Exception as e:
+                logger.error(f"Error in task change listener: {e}")
+    
+    def add_reading_listener(self, callback):
+        """Register a callback for newly recorded environmental readings"""
+        if callback not in self.reading_listeners:
+            self.reading_listeners.append(callback)
+    
+    def remove_reading_listener(self, callback):
+        """Unregister an environmental reading callback"""
+        if callback in self.reading_listeners:
+            self.reading_listeners.remove(callback)
+    
+    def notify_garden_changed(self):
+        """Tell listeners that a garden was created, edited or removed"""
+        self._notify_task_change('garden')
+    
     def get_connection(self) -> sqlite3.Connection:
         """Get database connection with proper settings"""
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row  # Enable dict-like access
         conn.execute("PRAGMA foreign_keys = ON")  # Enable foreign key constraints
+        self.register_sql_functions(conn)
         return conn
     
+    def register_sql_functions(self, conn: sqlite3.Connection):
+        """Register the environmental SQL functions on a connection
+        
+        vpd_kpa(temp_f, rh), dew_point(temp_f, rh) (°F) and vpd_band(stage, vpd)
+        ('below', 'in_band', 'above'). They are deterministic, so they can also
+        be used in expression indexes and generated columns.
+        """
+        calculator = self.environmental_calculator
+        conn.create_function("vpd_kpa", 2, calculator.vpd_kpa, deterministic=True)
+        conn.create_function("dew_point", 2, calculator.dew_point_f, deterministic=True)
+        conn.create_function("vpd_band", 2, calculator.vpd_band, deterministic=True)
+    
     def initialize_database(self):
         """Initialize database with complete schema"""
         logger.info(f"Initializing database at: {self.db_path}")
@@ -84,6 +149,57 @@ class DatabaseManager:
                 )
             """)
             
+            # Plant cohorts - Batches of identical plants managed as one unit
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS plant_cohorts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    garden_id INTEGER NOT NULL,
+                    cohort_name TEXT NOT NULL,
+                    strain_cultivar TEXT,
+                    plant_type TEXT NOT NULL,
+                    plant_count INTEGER NOT NULL,
+                    growth_stage TEXT NOT NULL,
+                    planting_date TEXT NOT NULL,
+                    expected_harvest_date TEXT,
+                    location_start TEXT,
+                    location_end TEXT,
+                    notes TEXT,
+                    created_date TEXT NOT NULL,
+                    FOREIGN KEY (garden_id) REFERENCES gardens (id) ON DELETE CASCADE
+                )
+            """)
+            
+            # Stage timelines - Precomputed growth stage transitions per plant
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS stage_timelines (
+                    plant_id INTEGER PRIMARY KEY,
+                    garden_id INTEGER NOT NULL,
+                    profile TEXT NOT NULL,  -- photoperiod or autoflower
+                    planted_at TEXT NOT NULL,
+                    transitions TEXT NOT NULL,  -- JSON [[stage, starts_at], ...]
+                    current_stage TEXT NOT NULL,
+                    next_stage TEXT,
+                    next_transition_at TEXT,
+                    FOREIGN KEY (plant_id) REFERENCES plants (id) ON DELETE CASCADE,
+                    FOREIGN KEY (garden_id) REFERENCES gardens (id) ON DELETE CASCADE
+                )
+            """)
+            
+            # Task templates - Shared text of generated tasks, one row per template version
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS task_templates (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    template_name TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    description TEXT,
+                    instructions TEXT,
+                    required_materials TEXT,  -- JSON array
+                    estimated_duration INTEGER,  -- minutes
+                    created_date TEXT NOT NULL,
+                    UNIQUE (template_name, version)
+                )
+            """)
+            
             # Tasks table - All scheduled and completed tasks
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS tasks (
@@ -105,6 +221,7 @@ class DatabaseManager:
                     supplies_needed TEXT,  -- JSON array
                     notes TEXT,
                     created_date TEXT NOT NULL,
+                    generation_key TEXT,  -- garden:template:day for auto-generated tasks
                     FOREIGN KEY (garden_id) REFERENCES gardens (id) ON DELETE SET NULL,
                     FOREIGN KEY (plant_id) REFERENCES plants (id) ON DELETE SET NULL
                 )
@@ -127,6 +244,18 @@ class DatabaseManager:
                 )
             """)
             
+            # Task dependencies - edges of the task DAG (task waits on depends_on_task)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS task_dependencies (
+                    task_id INTEGER NOT NULL,
+                    depends_on_task_id INTEGER NOT NULL,
+                    created_date TEXT NOT NULL,
+                    PRIMARY KEY (task_id, depends_on_task_id),
+                    FOREIGN KEY (task_id) REFERENCES tasks (id) ON DELETE CASCADE,
+                    FOREIGN KEY (depends_on_task_id) REFERENCES tasks (id) ON DELETE CASCADE
+                )
+            """)
+            
             # Inventory management
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS inventory_items (
@@ -274,6 +403,28 @@ class DatabaseManager:
                 )
             """)
             
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS notification_dedupe (
+                    dedupe_key TEXT PRIMARY KEY,
+                    notification_type TEXT NOT NULL,
+                    entity TEXT NOT NULL,
+                    window_hours REAL NOT NULL,
+                    sent_at TEXT NOT NULL,
+                    expires_at TEXT NOT NULL
+                )
+            """)
+            
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS notification_dead_letters (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    sink TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    attempts INTEGER NOT NULL,
+                    last_error TEXT,
+                    failed_at TEXT NOT NULL
+                )
+            """)
+            
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS automation_settings (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -301,6 +452,9 @@ class DatabaseManager:
                 )
             """)
             
+            # Bring databases created by older versions up to the current schema
+            self.migrate_schema(conn)
+            
             # Create indexes for better performance
             self.create_indexes(conn)
             
@@ -311,12 +465,38 @@ class DatabaseManager:
         
         logger.info("Database initialization completed successfully")
     
+    def migrate_schema(self, conn: sqlite3.Connection):
+        """Add columns introduced after a database file was first created"""
+        added_columns = [
+            ("tasks", "generation_key", "TEXT"),
+            ("plants", "cohort_id", "INTEGER REFERENCES plant_cohorts (id) ON DELETE SET NULL"),
+            ("plants", "cohort_exception", "TEXT"),  # Why the plant is handled apart from its cohort
+            ("tasks", "cohort_id", "INTEGER REFERENCES plant_cohorts (id) ON DELETE CASCADE"),
+            ("notification_history", "title", "TEXT"),
+            ("notification_history", "sent_date", "TEXT"),
+            ("tasks", "template_id", "INTEGER REFERENCES task_templates (id)"),
+            ("tasks", "template_overrides", "TEXT")  # JSON of template fields replaced for this task
+        ]
+        
+        for table, column, column_type in added_columns:
+            existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            if column not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+                logger.info(f"Added column {table}.{column}")
+    
     def create_indexes(self, conn: sqlite3.Connection):
         """Create database indexes for performance optimization"""
         indexes = [
             "CREATE INDEX IF NOT EXISTS idx_tasks_due_date ON tasks (due_date)",
             "CREATE INDEX IF NOT EXISTS idx_tasks_garden_id ON tasks (garden_id)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_generation_key ON tasks (generation_key)",
+            "CREATE INDEX IF NOT EXISTS idx_task_dependencies_depends_on ON task_dependencies (depends_on_task_id)",
             "CREATE INDEX IF NOT EXISTS idx_plants_garden_id ON plants (garden_id)",
+            "CREATE INDEX IF NOT EXISTS idx_plants_cohort_id ON plants (cohort_id)",
+            "CREATE INDEX IF NOT EXISTS idx_plant_cohorts_garden_id ON plant_cohorts (garden_id)",
+            "CREATE INDEX IF NOT EXISTS idx_tasks_cohort_id ON tasks (cohort_id)",
+            "CREATE INDEX IF NOT EXISTS idx_tasks_template_id ON tasks (template_id)",
+            "CREATE INDEX IF NOT EXISTS idx_stage_timelines_next ON stage_timelines (next_transition_at)",
             "CREATE INDEX IF NOT EXISTS idx_environmental_garden_time ON environmental_readings (garden_id, reading_time)",
             "CREATE INDEX IF NOT EXISTS idx_inventory_category ON inventory_items (category)",
             "CREATE INDEX IF NOT EXISTS idx_transactions_item_date ON inventory_transactions (item_id, transaction_date)",
@@ -325,6 +505,9 @@ class DatabaseManager:
             # Automation table indexes
             "CREATE INDEX IF NOT EXISTS idx_notifications_garden_date ON notification_history (garden_id, created_at)",
             "CREATE INDEX IF NOT EXISTS idx_notifications_read_status ON notification_history (is_read, priority)",
+            "CREATE INDEX IF NOT EXISTS idx_notifications_sent_date ON notification_history (sent_date)",
+            "CREATE INDEX IF NOT EXISTS idx_notification_dedupe_expires ON notification_dedupe (expires_at)",
+            "CREATE INDEX IF NOT EXISTS idx_notification_dead_letters_failed ON notification_dead_letters (failed_at)",
             "CREATE INDEX IF NOT EXISTS idx_automation_settings_garden ON automation_settings (garden_id, setting_category)",
             "CREATE INDEX IF NOT EXISTS idx_task_generation_garden_date ON task_generation_log (garden_id, generated_at)"
         ]
@@ -349,7 +532,15 @@ class DatabaseManager:
             ("notification_system", "true", "boolean"),
             ("task_generation_frequency", "daily", "string"),
             ("notification_priority_threshold", "normal", "string"),
-            ("coordination_check_interval", "30", "integer")  # minutes
+            ("coordination_check_interval", "30", "integer"),  # minutes
+            # Delivery sinks: desktop, log_file {"path"}, webhook {"url"}, email_file {"directory", "to"}
+            ("notification_sinks", '{"desktop": {}, "log_file": {}}', "json"),
+            # Route planning between locations
+            ("default_travel_minutes", "15", "integer"),
+            ("location_travel_minutes", "{}", "json"),  # {"Tent A": {"Tent B": 3}}
+            ("location_coordinates", "{}", "json"),  # {"Tent A": [x_meters, y_meters]}
+            # Crew: [{"name": "Sam", "shift_start": "07:00", "shift_end": "15:00", "skills": ["harvesting"]}]
+            ("crew_members", "[]", "json")
         ]
         
         for setting_name, setting_value, setting_type in default_settings:
@@ -385,7 +576,9 @@ class DatabaseManager:
             garden_id = cursor.lastrowid
             conn.commit()
             logger.info(f"Created garden '{garden_data['name']}' with ID {garden_id}")
-            return garden_id
+        
+        self.notify_garden_changed()
+        return garden_id
     
     def get_all_gardens(self) -> List[Dict]:
         """Get all gardens with basic information"""
@@ -448,6 +641,100 @@ class DatabaseManager:
             
             return garden_dict
     
+    # Environmental Analysis Methods
+    def add_environmental_readings(self, readings: List[Dict]) -> int:
+        """Record sensor readings and pass them to the reading listeners
+        
+        Each reading has a garden_id plus any of temperature, humidity, ph_level,
+        ec_ppm, light_ppfd, co2_ppm, reading_time (defaults to now) and notes.
+        Returns the number of readings stored.
+        """
+        if not readings:
+            return 0
+        
+        now = datetime.now().isoformat()
+        columns = ('garden_id', 'temperature', 'humidity', 'ph_level', 'ec_ppm', 'light_ppfd',
+                   'co2_ppm', 'reading_time', 'notes')
+        recorded = [{**{column: reading.get(column) for column in columns},
+                     'reading_time': reading.get('reading_time') or now} for reading in readings]
+        
+        try:
+            with self.get_connection() as conn:
+                conn.executemany(f"""
+                    INSERT INTO environmental_readings ({', '.join(columns)})
+                    VALUES ({', '.join('?' for _ in columns)})
+                """, [tuple(reading[column] for column in columns) for reading in recorded])
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error recording environmental readings: {e}")
+            return 0
+        
+        for callback in list(self.reading_listeners):
+            try:
+                callback(recorded)
+            except Exception as e:
+                logger.error(f"Error in reading listener: {e}")
+        return len(recorded)
+    
+    def get_vpd_band_hours(self, start_date: str, end_date: str, garden_id: Optional[int] = None,
+                           growth_stage: Optional[str] = None, max_gap_minutes: int = 60) -> List[Dict]:
+        """Hours below, in and above the VPD band per garden per day, computed inside SQLite
+        
+        Each reading counts until the next one, up to max_gap_minutes. The band
+        is that of growth_stage, or else of the stage most of the garden's
+        plants are in; readings without a known band count as unrated.
+        """
+        query = """
+            WITH garden_stages AS (
+                SELECT garden_id, growth_stage FROM (
+                    SELECT garden_id, growth_stage,
+                           ROW_NUMBER() OVER (PARTITION BY garden_id ORDER BY COUNT(*) DESC) AS stage_rank
+                    FROM plants GROUP BY garden_id, growth_stage
+                ) WHERE stage_rank = 1
+            ),
+            readings AS (
+                SELECT r.garden_id, DATE(r.reading_time) AS day,
+                       COALESCE(?, s.growth_stage) AS growth_stage,
+                       vpd_kpa(r.temperature, r.humidity) AS vpd,
+                       dew_point(r.temperature, r.humidity) AS dew_point,
+                       MIN(COALESCE((JULIANDAY(LEAD(r.reading_time) OVER (PARTITION BY r.garden_id ORDER BY r.reading_time))
+                                     - JULIANDAY(r.reading_time)) * 24, 0), ? / 60.0) AS hours
+                FROM environmental_readings r
+                LEFT JOIN garden_stages s ON s.garden_id = r.garden_id
+                WHERE r.reading_time >= ? AND r.reading_time < DATE(?, '+1 day')
+        """
+        params: List[Any] = [growth_stage, max_gap_minutes, start_date, end_date]
+        if garden_id is not None:
+            query += " AND r.garden_id = ?"
+            params.append(garden_id)
+        query += """
+            ),
+            banded AS (
+                SELECT *, vpd_band(growth_stage, vpd) AS band FROM readings
+            )
+            SELECT b.garden_id, g.name AS garden_name, b.day, b.growth_stage,
+                   COUNT(*) AS readings,
+                   ROUND(SUM(CASE WHEN band = 'below' THEN hours ELSE 0 END), 2) AS hours_below,
+                   ROUND(SUM(CASE WHEN band = 'in_band' THEN hours ELSE 0 END), 2) AS hours_in_band,
+                   ROUND(SUM(CASE WHEN band = 'above' THEN hours ELSE 0 END), 2) AS hours_above,
+                   ROUND(SUM(CASE WHEN band IS NULL THEN hours ELSE 0 END), 2) AS hours_unrated,
+                   ROUND(MIN(vpd), 2) AS min_vpd,
+                   ROUND(AVG(vpd), 2) AS avg_vpd,
+                   ROUND(MAX(vpd), 2) AS max_vpd,
+                   ROUND(MAX(dew_point), 1) AS max_dew_point
+            FROM banded b
+            JOIN gardens g ON g.id = b.garden_id
+            GROUP BY b.garden_id, b.day
+            ORDER BY b.garden_id, b.day
+        """
+        
+        try:
+            with self.get_connection() as conn:
+                return [dict(row) for row in conn.execute(query, params)]
+        except Exception as e:
+            logger.error(f"Error summarizing VPD band hours: {e}")
+            return []
+    
     # Plant Management Methods
     def add_plant(self, plant_data: Dict) -> int:
         """Add new plant to garden"""
@@ -473,7 +760,165 @@ class DatabaseManager:
             plant_id = cursor.lastrowid
             conn.commit()
             logger.info(f"Added plant '{plant_data['plant_name']}' with ID {plant_id}")
-            return plant_id
+        
+        self.notify_garden_changed()
+        return plant_id
+    
+    @staticmethod
+    def _expand_location_range(location_start: Optional[str], location_end: Optional[str], count: int) -> List[str]:
+        """Spread plants over a location range such as "A1".."A20" (numbered from the start label)"""
+        if not location_start:
+            return [''] * count
+        
+        match = re.match(r'^(.*?)(\d+)$', location_start)
+        if not match:
+            return [location_start] * count
+        
+        prefix, first = match.group(1), int(match.group(2))
+        last = first + count - 1
+        end_match = re.match(r'^(.*?)(\d+)$', location_end or '')
+        if end_match and end_match.group(1) == prefix:
+            last = int(end_match.group(2))
+        
+        # Wrap around the range when there are more plants than positions
+        span = max(1, last - first + 1)
+        width = len(match.group(2))
+        return [f"{prefix}{first + i % span:0{width}d}" for i in range(count)]
+    
+    def add_plant_cohort(self, cohort_data: Dict) -> int:
+        """Add a cohort of identical plants and create its plants in one batch"""
+        count = int(cohort_data['plant_count'])
+        created_date = datetime.now().isoformat()
+        growth_stage = cohort_data.get('growth_stage', 'seedling')
+        
+        with self.get_connection() as conn:
+            cursor = conn.execute("""
+                INSERT INTO plant_cohorts (garden_id, cohort_name, strain_cultivar, plant_type, plant_count,
+                                           growth_stage, planting_date, expected_harvest_date,
+                                           location_start, location_end, notes, created_date)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                cohort_data['garden_id'],
+                cohort_data['cohort_name'],
+                cohort_data.get('strain_cultivar', ''),
+                cohort_data['plant_type'],
+                count,
+                growth_stage,
+                cohort_data['planting_date'],
+                cohort_data.get('expected_harvest_date'),
+                cohort_data.get('location_start'),
+                cohort_data.get('location_end'),
+                cohort_data.get('notes', ''),
+                created_date
+            ))
+            cohort_id = cursor.lastrowid
+            
+            locations = self._expand_location_range(cohort_data.get('location_start'),
+                                                    cohort_data.get('location_end'), count)
+            conn.executemany("""
+                INSERT INTO plants (garden_id, plant_name, strain_cultivar, plant_type, 
+                                  growth_stage, planting_date, expected_harvest_date,
+                                  location_in_garden, notes, created_date, cohort_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [(
+                cohort_data['garden_id'],
+                f"{cohort_data['cohort_name']} #{i + 1}",
+                cohort_data.get('strain_cultivar', ''),
+                cohort_data['plant_type'],
+                growth_stage,
+                cohort_data['planting_date'],
+                cohort_data.get('expected_harvest_date'),
+                locations[i],
+                '',
+                created_date,
+                cohort_id
+            ) for i in range(count)])
+            conn.commit()
+            logger.info(f"Added cohort '{cohort_data['cohort_name']}' with {count} plants (ID {cohort_id})")
+        
+        self.notify_garden_changed()
+        return cohort_id
+    
+    def get_plant_cohorts(self, garden_id: Optional[int] = None) -> List[Dict]:
+        """Get cohorts with their live plant and exception counts"""
+        query = """
+            SELECT c.*,
+                   COUNT(p.id) as live_plants,
+                   COUNT(p.cohort_exception) as exception_count
+            FROM plant_cohorts c
+            LEFT JOIN plants p ON p.cohort_id = c.id
+        """
+        params = []
+        if garden_id is not None:
+            query += " WHERE c.garden_id = ?"
+            params.append(garden_id)
+        query += " GROUP BY c.id ORDER BY c.planting_date DESC"
+        
+        with self.get_connection() as conn:
+            return [dict(row) for row in conn.execute(query, params).fetchall()]
+    
+    def get_cohort_exceptions(self, cohort_id: int) -> List[Dict]:
+        """Get the plants of a cohort that are handled individually"""
+        with self.get_connection() as conn:
+            cursor = conn.execute("""
+                SELECT * FROM plants
+                WHERE cohort_id = ? AND cohort_exception IS NOT NULL
+                ORDER BY id
+            """, (cohort_id,))
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def set_plant_exception(self, plant_id: int, reason: Optional[str]) -> bool:
+        """Take a plant out of its cohort's tasks (reason) or put it back (None)
+        
+        Open cohort tasks are relabelled with the new plant count, or cancelled
+        (deleted) when no plant is left in the cohort. Putting a plant back
+        cancels the open tasks it was given as an exception.
+        """
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.execute("UPDATE plants SET cohort_exception = ? WHERE id = ? AND cohort_id IS NOT NULL",
+                                      (reason, plant_id))
+                if cursor.rowcount == 0:
+                    return False
+                
+                cohort_id = conn.execute("SELECT cohort_id FROM plants WHERE id = ?", (plant_id,)).fetchone()[0]
+                plant_count = conn.execute("""
+                    SELECT COUNT(*) FROM plants WHERE cohort_id = ? AND cohort_exception IS NULL
+                """, (cohort_id,)).fetchone()[0]
+                open_tasks = conn.execute("""
+                    SELECT id, title, description FROM tasks
+                    WHERE cohort_id = ? AND plant_id IS NULL AND completed = 0
+                """, (cohort_id,)).fetchall()
+                
+                cancelled = []
+                if reason is None:
+                    cancelled += [row[0] for row in conn.execute("""
+                        SELECT id FROM tasks
+                        WHERE plant_id = ? AND completed = 0 AND generation_key IS NOT NULL
+                          AND notes LIKE 'Cohort exception:%'
+                    """, (plant_id,))]
+                if plant_count == 0:
+                    cancelled += [task['id'] for task in open_tasks]
+                    open_tasks = []
+                
+                conn.executemany("UPDATE tasks SET title = ?, description = ? WHERE id = ?", [
+                    (re.sub(r", \d+ plants\)$", f", {plant_count} plants)", task['title']),
+                     re.sub(r"applies to \d+ plants of cohort", f"applies to {plant_count} plants of cohort",
+                            task['description'] or ''),
+                     task['id'])
+                    for task in open_tasks
+                ])
+                conn.executemany("DELETE FROM tasks WHERE id = ?", [(task_id,) for task_id in cancelled])
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error updating plant exception: {e}")
+            return False
+        
+        for task in open_tasks:
+            self._notify_task_change('updated', task['id'])
+        for task_id in cancelled:
+            self._notify_task_change('deleted', task_id)
+        return True
     
     # Task Management Methods
     def create_task(self, task_data: Dict) -> int:
@@ -505,7 +950,205 @@ class DatabaseManager:
             
             task_id = cursor.lastrowid
             conn.commit()
-            return task_id
+        
+        self._notify_task_change('created', task_id)
+        return task_id
+    
+    @staticmethod
+    def make_generation_key(garden_id: Any, template_name: str, scheduled_day: Any,
+                            plant_id: Any = None, cohort_id: Any = None) -> str:
+        """Build the idempotency key for one generated occurrence of a template"""
+        if plant_id is not None:
+            scope = f"{garden_id}/{plant_id}"
+        elif cohort_id is not None:
+            scope = f"{garden_id}/c{cohort_id}"
+        else:
+            scope = garden_id
+        template_slug = "_".join(str(template_name).lower().split())
+        return f"{scope}:{template_slug}:{str(scheduled_day)[:10]}"
+    
+    def insert_generated_tasks(self, tasks: List[Dict]) -> int:
+        """Insert auto-generated tasks, skipping occurrences that already exist
+        
+        Each task is keyed by (garden, plant or cohort, template, scheduled day). Tasks without an
+        explicit 'generation_key' get one from 'template_name' (or the title) and
+        'scheduled_date' (or the due date). Returns the number of new rows.
+        """
+        if not tasks:
+            return 0
+        
+        created_date = datetime.now().isoformat()
+        rows = []
+        for task in tasks:
+            generation_key = task.get('generation_key') or self.make_generation_key(
+                task.get('garden_id'),
+                task.get('template_name', task['title']),
+                task.get('scheduled_date', task['due_date']),
+                task.get('plant_id'),
+                task.get('cohort_id')
+            )
+            rows.append((
+                task.get('garden_id'),
+                task.get('plant_id'),
+                task['title'],
+                task.get('description', ''),
+                task['task_type'],
+                task.get('priority', 'medium'),
+                str(task['due_date']),
+                task.get('due_time'),
+                json.dumps(task.get('recurring_pattern', {})),
+                task.get('weather_dependent', False),
+                task.get('estimated_duration', 0),
+                task.get('cost', 0),
+                json.dumps(task.get('supplies_needed', [])),
+                task.get('notes', ''),
+                task.get('created_date', created_date),
+                generation_key,
+                task.get('cohort_id'),
+                task.get('template_id'),
+                json.dumps(task['template_overrides']) if task.get('template_overrides') else None
+            ))
+        
+        with self.get_connection() as conn:
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM tasks").fetchone()[0]
+            changes_before = conn.total_changes
+            conn.executemany("""
+                INSERT OR IGNORE INTO tasks (garden_id, plant_id, title, description, task_type,
+                                           priority, due_date, due_time, recurring_pattern,
+                                           weather_dependent, estimated_duration, cost,
+                                           supplies_needed, notes, created_date, generation_key, cohort_id,
+                                           template_id, template_overrides)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            inserted = conn.total_changes - changes_before
+            new_ids = [row[0] for row in conn.execute("SELECT id FROM tasks WHERE id > ? ORDER BY id", (last_id,))]
+            conn.commit()
+        
+        logger.info(f"Inserted {inserted} of {len(rows)} generated tasks")
+        # Listeners apply each new task on its own instead of reloading everything
+        for task_id in new_ids:
+            self._notify_task_change('created', task_id)
+        return inserted
+    
+    def get_task_template_id(self, template_name: str, description: str, instructions: str = '',
+                             required_materials: Optional[List[str]] = None,
+                             estimated_duration: int = 0) -> Optional[int]:
+        """Get the id of the template version with this text, adding a new version if the text changed"""
+        fields = (description or '', instructions or '', json.dumps(list(required_materials or [])),
+                  int(estimated_duration or 0))
+        cache_key = (template_name,) + fields
+        if cache_key in self.task_template_ids:
+            return self.task_template_ids[cache_key]
+        
+        try:
+            with self.get_connection() as conn:
+                row = conn.execute("""
+                    SELECT id FROM task_templates
+                    WHERE template_name = ? AND description = ? AND instructions = ?
+                      AND required_materials = ? AND estimated_duration = ?
+                    ORDER BY version DESC LIMIT 1
+                """, cache_key).fetchone()
+                if row:
+                    template_id = row[0]
+                else:
+                    version = conn.execute("SELECT COALESCE(MAX(version), 0) + 1 FROM task_templates WHERE template_name = ?",
+                                           (template_name,)).fetchone()[0]
+                    template_id = conn.execute("""
+                        INSERT INTO task_templates (template_name, version, description, instructions,
+                                                    required_materials, estimated_duration, created_date)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """, (template_name, version) + fields + (datetime.now().isoformat(),)).lastrowid
+                    conn.commit()
+                    logger.info(f"Stored version {version} of task template '{template_name}'")
+        except Exception as e:
+            logger.error(f"Error storing task template '{template_name}': {e}")
+            return None
+        
+        self.task_template_ids[cache_key] = template_id
+        return template_id
+    
+    def get_task_templates(self, template_ids) -> Dict[int, Dict]:
+        """Get task template rows by id, reading only the ones not cached yet"""
+        missing = [template_id for template_id in set(template_ids)
+                   if template_id is not None and template_id not in self.task_templates]
+        if missing:
+            try:
+                with self.get_connection() as conn:
+                    placeholders = ", ".join("?" * len(missing))
+                    for row in conn.execute(f"SELECT * FROM task_templates WHERE id IN ({placeholders})", missing):
+                        template = dict(row)
+                        template['required_materials'] = json.loads(template['required_materials'] or '[]')
+                        self.task_templates[template['id']] = template
+            except Exception as e:
+                logger.error(f"Error loading task templates: {e}")
+        
+        return {template_id: self.task_templates[template_id]
+                for template_id in template_ids if template_id in self.task_templates}
+    
+    @staticmethod
+    def format_task_template(fields: Dict) -> str:
+        """Full task text from template fields"""
+        text = f"{fields.get('description') or ''}\n\n"
+        text += f"Instructions: {fields.get('instructions') or ''}\n"
+        if fields.get('required_materials'):
+            text += f"Required materials: {', '.join(fields['required_materials'])}\n"
+        text += f"Estimated duration: {fields.get('estimated_duration') or 0} minutes"
+        return text
+    
+    @staticmethod
+    def parse_task_template(text: str) -> Optional[Dict]:
+        """Template fields from text laid out by format_task_template, or None if the layout was changed"""
+        match = re.fullmatch(r"(?:(?P<description>.*?)\n\n)?Instructions: (?P<instructions>.*?)\n"
+                             r"(?:Required materials: (?P<materials>.*?)\n)?"
+                             r"Estimated duration: (?P<duration>\d+) minutes", text.strip(), re.DOTALL)
+        if match is None:
+            return None
+        return {
+            'description': match['description'] or '',
+            'instructions': match['instructions'],
+            'required_materials': match['materials'].split(', ') if match['materials'] else [],
+            'estimated_duration': int(match['duration'])
+        }
+    
+    def task_description_updates(self, task: Dict, text: str) -> Dict:
+        """update_task fields for edited task text
+        
+        Nothing is stored when the text still matches the resolved template
+        text. Edits to a template task are kept as template_overrides (the
+        fields that differ from the template version) while the text keeps the
+        template layout; otherwise the text becomes the task's own description.
+        """
+        text = text.strip()
+        if text == self.resolve_task_description(task).strip():
+            return {}
+        
+        if task.get('template_id') and not task.get('description'):
+            template = self.get_task_templates([task['template_id']]).get(task['template_id'])
+            fields = self.parse_task_template(text)
+            if template is not None and fields is not None:
+                # Round-trip the template so both sides are compared in the same normal form
+                template_fields = self.parse_task_template(self.format_task_template(template))
+                return {'template_overrides': {name: value for name, value in fields.items()
+                                               if value != template_fields[name]}}
+        
+        return {'description': text}
+    
+    def resolve_task_description(self, task: Dict) -> str:
+        """Text to display for a task
+        
+        A task's own description wins. Tasks generated from a template store
+        none and get the template version's text with their overrides applied.
+        """
+        if task.get('description') or not task.get('template_id'):
+            return task.get('description') or ''
+        
+        template = self.get_task_templates([task['template_id']]).get(task['template_id'])
+        if template is None:
+            return ''
+        overrides = task.get('template_overrides') or {}
+        if isinstance(overrides, str):
+            overrides = json.loads(overrides)
+        return self.format_task_template({**template, **overrides})
     
     def get_tasks_for_date_range(self, start_date: str, end_date: str, 
                                 garden_id: int = None) -> List[Dict]:
@@ -550,7 +1193,134 @@ class DatabaseManager:
             
             success = cursor.rowcount > 0
             conn.commit()
-            return success
+        
+        if success:
+            self._notify_task_change('completed', task_id)
+        return success
+    
+    def reschedule_task(self, task_id: int, new_due_date: str, new_due_time: Optional[str] = None) -> bool:
+        """Move a task to a new due date (and optionally time)"""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.execute("""
+                    UPDATE tasks 
+                    SET due_date = ?, due_time = COALESCE(?, due_time)
+                    WHERE id = ?
+                """, (new_due_date, new_due_time, task_id))
+                success = cursor.rowcount > 0
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error rescheduling task {task_id}: {e}")
+            return False
+        
+        if success:
+            self._notify_task_change('updated', task_id)
+        return success
+    
+    def update_task(self, task_id: int, updates: Dict) -> bool:
+        """Update the editable fields of a task (completion goes through complete_task/reopen_task)"""
+        editable = ('title', 'description', 'task_type', 'priority', 'due_date', 'due_time',
+                    'estimated_duration', 'notes', 'template_overrides')
+        fields = [field for field in editable if field in updates]
+        if not fields:
+            return False
+        
+        updates = dict(updates)
+        if isinstance(updates.get('template_overrides'), dict):
+            updates['template_overrides'] = json.dumps(updates['template_overrides']) if updates['template_overrides'] else None
+        
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.execute(f"""
+                    UPDATE tasks 
+                    SET {', '.join(f'{field} = ?' for field in fields)}
+                    WHERE id = ?
+                """, (*(updates[field] for field in fields), task_id))
+                success = cursor.rowcount > 0
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error updating task {task_id}: {e}")
+            return False
+        
+        if success:
+            self._notify_task_change('updated', task_id)
+        return success
+    
+    def reopen_task(self, task_id: int) -> bool:
+        """Mark a completed task as pending again"""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.execute("""
+                    UPDATE tasks 
+                    SET completed = 0, completed_date = NULL
+                    WHERE id = ? AND completed = 1
+                """, (task_id,))
+                success = cursor.rowcount > 0
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error reopening task {task_id}: {e}")
+            return False
+        
+        if success:
+            self._notify_task_change('reopened', task_id)
+        return success
+    
+    def delete_task(self, task_id: int) -> bool:
+        """Delete a task"""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+                success = cursor.rowcount > 0
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error deleting task {task_id}: {e}")
+            return False
+        
+        if success:
+            self._notify_task_change('deleted', task_id)
+        return success
+    
+    def add_task_dependency(self, task_id: int, depends_on_task_id: int) -> bool:
+        """Record that a task cannot start until another task is completed"""
+        try:
+            with self.get_connection() as conn:
+                conn.execute("""
+                    INSERT OR IGNORE INTO task_dependencies (task_id, depends_on_task_id, created_date)
+                    VALUES (?, ?, ?)
+                """, (task_id, depends_on_task_id, datetime.now().isoformat()))
+                conn.commit()
+                return True
+        except Exception as e:
+            logger.error(f"Error adding dependency {depends_on_task_id} -> {task_id}: {e}")
+            return False
+    
+    def remove_task_dependency(self, task_id: int, depends_on_task_id: int) -> bool:
+        """Remove a dependency between two tasks"""
+        try:
+            with self.get_connection() as conn:
+                conn.execute("""
+                    DELETE FROM task_dependencies 
+                    WHERE task_id = ? AND depends_on_task_id = ?
+                """, (task_id, depends_on_task_id))
+                conn.commit()
+                return True
+        except Exception as e:
+            logger.error(f"Error removing dependency {depends_on_task_id} -> {task_id}: {e}")
+            return False
+    
+    def get_task_dependencies(self) -> Tuple[List[Dict], List[Dict]]:
+        """Get all dependency edges plus completion state and duration of the tasks involved"""
+        with self.get_connection() as conn:
+            edges = [dict(row) for row in conn.execute("""
+                SELECT task_id, depends_on_task_id FROM task_dependencies
+            """)]
+            tasks = [dict(row) for row in conn.execute("""
+                SELECT t.id, t.title, t.completed, t.estimated_duration
+                FROM tasks t
+                WHERE t.id IN (SELECT task_id FROM task_dependencies
+                               UNION SELECT depends_on_task_id FROM task_dependencies)
+            """)]
+            return edges, tasks
     
     # Backup and Maintenance
     def create_backup(self) -> str:
@@ -731,10 +1501,12 @@ class DatabaseManager:
                     SET completed = 1, completed_date = ? 
                     WHERE id = ?
                 """, (datetime.now().isoformat(), task_id))
-                return True
         except Exception as e:
             logger.error(f"Error completing task {task_id}: {e}")
             return False
+        
+        self._notify_task_change('completed', task_id)
+        return True
 
     # Automation Support Methods
     def add_notification(self, garden_id: Optional[int], notification_type: str, 
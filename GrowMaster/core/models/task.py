@@ -90,7 +90,8 @@ class Task(BaseModel):
     
     def can_start(self, completed_task_ids: List[str]) -> bool:
         """Check if all dependencies are satisfied"""
-        return all(dep_id in completed_task_ids for dep_id in self.depends_on)
+        completed = completed_task_ids if isinstance(completed_task_ids, (set, frozenset)) else set(completed_task_ids)
+        return all(dep_id in completed for dep_id in self.depends_on)
     
     def mark_completed(self, notes: str = "", actual_duration: Optional[int] = None):
         """Mark task as completed with optional completion details"""
@@ -7,10 +7,29 @@ from .task_scheduler import TaskScheduler
 from .intelligent_task_generator import IntelligentTaskGenerator
 from .multi_garden_coordinator import MultiGardenTaskCoordinator
 from .notification_system import BasicNotificationSystem
+from .task_dependency_graph import TaskDependencyGraph
+from .resource_scheduler import ResourceConstrainedScheduler
+from .route_planner import LocationDistanceMatrix, RoutePlanner
+from .crew_scheduler import CrewScheduler, Worker
+from .trigger_engine import TriggerEngine, TriggerCompileError, StreamingTriggerEvaluator
+from .notification_delivery import NotificationDispatcher, NotificationSink
+from .stage_timeline import StageTimelineStore
 
 __all__ = [
     'TaskScheduler',
     'IntelligentTaskGenerator', 
     'MultiGardenTaskCoordinator',
-    'BasicNotificationSystem'
+    'BasicNotificationSystem',
+    'TaskDependencyGraph',
+    'ResourceConstrainedScheduler',
+    'LocationDistanceMatrix',
+    'RoutePlanner',
+    'CrewScheduler',
+    'Worker',
+    'TriggerEngine',
+    'TriggerCompileError',
+    'StreamingTriggerEvaluator',
+    'NotificationDispatcher',
+    'NotificationSink',
+    'StageTimelineStore'
 ]
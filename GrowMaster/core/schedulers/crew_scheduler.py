@@ -0,0 +1,241 @@
+"""
+GrowMaster Pro - Crew Scheduler
+Assignment of coordinated task batches to workers with shifts and skills
+"""
+
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Task types that only workers with the matching skill may do, mapped to that skill
+# (TaskType.HARVEST tasks are stored as 'harvest', generated ones as 'harvesting')
+SKILLED_TASK_TYPES = {'harvest': 'harvesting', 'harvesting': 'harvesting', 'pruning': 'pruning', 'training': 'training'}
+
+DEFAULT_SHIFT_START = '08:00'
+
+@dataclass
+class Worker:
+    """A technician with a daily shift and a set of skills"""
+    name: str
+    shift_start: str = DEFAULT_SHIFT_START  # HH:MM
+    shift_end: str = '16:00'  # HH:MM
+    skills: Optional[List[str]] = None  # None means every skill
+    location: Optional[str] = None  # Where the shift starts
+    
+    def can_do(self, required_skills: Set[str]) -> bool:
+        """Check whether the worker has every required skill"""
+        return self.skills is None or required_skills.issubset(SKILLED_TASK_TYPES.get(s, s) for s in self.skills)
+    
+    def shift_bounds(self) -> tuple:
+        """Shift start and end in minutes after midnight"""
+        def minutes(clock: str) -> int:
+            hours, mins = clock.split(':')
+            return int(hours) * 60 + int(mins)
+        start, end = minutes(self.shift_start), minutes(self.shift_end)
+        return start, end if end > start else end + 24 * 60  # Night shifts end the next day
+
+class CrewScheduler:
+    """Spread task batches over several workers to minimize the makespan
+    
+    Longest batches are placed first on the eligible worker who would finish
+    earliest (LPT). A time-boxed improvement pass then moves or swaps batches
+    away from the worker who finishes last. Each worker works their batches in
+    route order, walking between locations when a travel matrix is given.
+    No worker is booked past their shift end; batches that fit nobody's
+    shift are reported as unassigned.
+    """
+    
+    def __init__(self, workers: List[Worker], distances=None, time_limit_seconds: float = 0.05):
+        self.workers = workers
+        self.distances = distances
+        self.time_limit_seconds = time_limit_seconds
+    
+    @staticmethod
+    def load_workers(db_manager, default_count: int = 1, shift_minutes: int = 480) -> List[Worker]:
+        """Load the crew from the crew_members setting, or make a default crew"""
+        try:
+            with db_manager.get_connection() as conn:
+                row = conn.execute("SELECT setting_value FROM user_settings WHERE setting_name = 'crew_members'").fetchone()
+            members = json.loads(row[0]) if row and row[0] else []
+            workers = [Worker(name=member['name'],
+                              shift_start=member.get('shift_start', DEFAULT_SHIFT_START),
+                              shift_end=member.get('shift_end', '16:00'),
+                              skills=member.get('skills'),
+                              location=member.get('location'))
+                       for member in members]
+            if workers:
+                return workers
+        except Exception as e:
+            logger.warning(f"Could not load crew members, using default crew: {e}")
+        
+        end = datetime(2000, 1, 1, 8) + timedelta(minutes=shift_minutes)
+        return [Worker(name=f"Worker {i + 1}", shift_end=end.strftime('%H:%M')) for i in range(max(1, default_count))]
+    
+    @staticmethod
+    def required_skills(batch: Dict[str, Any]) -> Set[str]:
+        """Skills needed for a batch"""
+        return {SKILLED_TASK_TYPES[task['task_type']] for task in batch['tasks']
+                if task.get('task_type') in SKILLED_TASK_TYPES}
+    
+    def assign(self, batches: List[Dict[str, Any]], day: datetime) -> Dict[str, Any]:
+        """Assign batches (in route order) to workers and build per-worker timelines"""
+        day = day.replace(hour=0, minute=0, second=0, microsecond=0)
+        eligible = [[w for w, worker in enumerate(self.workers) if worker.can_do(self.required_skills(batch))]
+                    for batch in batches]
+        
+        unassigned = [b for b, workers in enumerate(eligible) if not workers]
+        
+        # LPT: longest batch first, to the eligible worker with the least booked time
+        # whose shift still has room for it (travel included)
+        booked = [worker.shift_bounds()[0] for worker in self.workers]
+        per_worker = [[] for _ in self.workers]
+        for b in sorted((b for b in range(len(batches)) if eligible[b]),
+                        key=lambda b: (-batches[b]['total_duration_minutes'], b)):
+            for w in sorted(eligible[b], key=lambda w: (booked[w], w)):
+                if self._within_shift(w, self._finish_time(w, per_worker[w] + [b], batches)):
+                    per_worker[w].append(b)
+                    booked[w] += batches[b]['total_duration_minutes']
+                    break
+            else:
+                unassigned.append(b)
+        unassigned.sort()
+        
+        finish = [self._finish_time(w, per_worker[w], batches) for w in range(len(self.workers))]
+        
+        moves = self._improve(batches, eligible, per_worker, finish, time.monotonic() + self.time_limit_seconds)
+        return self._build_result(batches, day, per_worker, unassigned, moves)
+    
+    def _travel(self, origin: Optional[str], target: Optional[str]) -> float:
+        """Walking time between two locations"""
+        if self.distances is None:
+            return 0.0
+        return self.distances.travel_minutes(origin, target)
+    
+    def _walk(self, w: int, batch_ids: List[int], batches: List[Dict[str, Any]]):
+        """Yield (batch, travel, start, end) in minutes after midnight along a worker's route"""
+        worker = self.workers[w]
+        clock = worker.shift_bounds()[0]
+        location = worker.location
+        for b in sorted(batch_ids):  # Batch positions follow the planned route
+            travel = self._travel(location, batches[b].get('location'))
+            start = clock + travel
+            clock = start + batches[b]['total_duration_minutes']
+            location = batches[b].get('location') or location
+            yield b, travel, start, clock
+    
+    def _finish_time(self, w: int, batch_ids: List[int], batches: List[Dict[str, Any]]) -> float:
+        """Minute after midnight at which a worker finishes their batches"""
+        end = self.workers[w].shift_bounds()[0]
+        for _, _, _, end in self._walk(w, batch_ids, batches):
+            pass
+        return end
+    
+    def _within_shift(self, w: int, finish: float) -> bool:
+        """Check whether a worker finishing at this minute stays within their shift"""
+        return finish <= self.workers[w].shift_bounds()[1] + 1e-9
+    
+    def _improve(self, batches: List[Dict[str, Any]], eligible: List[List[int]],
+                 per_worker: List[List[int]], finish: List[float], deadline: float) -> int:
+        """Move or swap batches off the last-finishing worker while the makespan drops"""
+        moves = 0
+        improved = True
+        while improved and len(self.workers) > 1 and time.monotonic() < deadline:
+            improved = False
+            critical = max(range(len(self.workers)), key=lambda w: finish[w])
+            
+            for b in list(per_worker[critical]):
+                without = [x for x in per_worker[critical] if x != b]
+                finish_without = self._finish_time(critical, without, batches)
+                
+                for other in eligible[b]:
+                    if other == critical:
+                        continue
+                    
+                    # Move b to the other worker
+                    with_b = per_worker[other] + [b]
+                    finish_other = self._finish_time(other, with_b, batches)
+                    if (max(finish_without, finish_other) < finish[critical] - 1e-9 and
+                            self._within_shift(other, finish_other)):
+                        per_worker[critical], per_worker[other] = without, with_b
+                        finish[critical], finish[other] = finish_without, finish_other
+                        improved = True
+                        break
+                    
+                    # Swap b with a shorter batch of the other worker
+                    for c in per_worker[other]:
+                        if (critical not in eligible[c] or
+                                batches[c]['total_duration_minutes'] >= batches[b]['total_duration_minutes']):
+                            continue
+                        new_critical = without + [c]
+                        new_other = [x for x in per_worker[other] if x != c] + [b]
+                        finish_critical = self._finish_time(critical, new_critical, batches)
+                        finish_other = self._finish_time(other, new_other, batches)
+                        if (max(finish_critical, finish_other) < finish[critical] - 1e-9 and
+                                self._within_shift(critical, finish_critical) and
+                                self._within_shift(other, finish_other)):
+                            per_worker[critical], per_worker[other] = new_critical, new_other
+                            finish[critical], finish[other] = finish_critical, finish_other
+                            improved = True
+                            break
+                    if improved:
+                        break
+                if improved:
+                    moves += 1
+                    break
+        
+        return moves
+    
+    def _build_result(self, batches: List[Dict[str, Any]], day: datetime, per_worker: List[List[int]],
+                      unassigned: List[int], moves: int) -> Dict[str, Any]:
+        """Summarize the crew plan per worker"""
+        def at(minutes: float) -> str:
+            return (day + timedelta(minutes=minutes)).isoformat()
+        
+        workers = []
+        first_start, last_end = None, None
+        for w, worker in enumerate(self.workers):
+            shift_start, shift_end = worker.shift_bounds()
+            timeline = []
+            busy = travel_total = 0.0
+            end = shift_start
+            for b, travel, start, end in self._walk(w, per_worker[w], batches):
+                timeline.append({
+                    'batch_id': batches[b]['id'],
+                    'location': batches[b].get('location'),
+                    'travel_minutes': round(travel, 1),
+                    'start_time': at(start),
+                    'end_time': at(end),
+                    'task_count': batches[b]['task_count'],
+                    'task_types': sorted({task['task_type'] for task in batches[b]['tasks']})
+                })
+                busy += batches[b]['total_duration_minutes']
+                travel_total += travel
+            
+            if timeline:
+                first_start = shift_start if first_start is None else min(first_start, shift_start)
+                last_end = end if last_end is None else max(last_end, end)
+            
+            workers.append({
+                'name': worker.name,
+                'shift_start': at(shift_start),
+                'shift_end': at(shift_end),
+                'skills': worker.skills,
+                'timeline': timeline,
+                'busy_minutes': busy,
+                'travel_minutes': round(travel_total, 1),
+                'finish_time': at(end),
+                'overtime_minutes': round(max(0.0, end - shift_end), 1)
+            })
+        
+        return {
+            'workers': workers,
+            'makespan_minutes': round(last_end - first_start, 1) if last_end is not None else 0,
+            'unassigned_batches': [batches[b]['id'] for b in unassigned],
+            'unassigned_tasks': [task['id'] for b in unassigned for task in batches[b]['tasks']],
+            'improvement_moves': moves
+        }
@@ -4,10 +4,14 @@ Automated task generation based on growth stages, growing methods, and plant req
 """
 
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+from datetime import datetime, date, timedelta
+from typing import Dict, List, Any, Optional, Mapping, Tuple
+from dataclasses import dataclass, asdict
 from enum import Enum
+from functools import lru_cache
+from types import MappingProxyType
+
+from .stage_timeline import stage_start_days, detect_profile
 
 logger = logging.getLogger(__name__)
 
@@ -32,9 +36,9 @@ class TaskType(Enum):
     MAINTENANCE = "maintenance"
     ENVIRONMENTAL = "environmental"
 
-@dataclass
+@dataclass(frozen=True)
 class TaskTemplate:
-    """Template for generating tasks"""
+    """Template for generating tasks (immutable, shared by every generator)"""
     name: str
     description: str
     task_type: TaskType
@@ -43,8 +47,11 @@ class TaskTemplate:
     frequency_days: int
     priority: str
     estimated_duration: int  # minutes
-    required_materials: List[str]
+    required_materials: Tuple[str, ...]
     instructions: str
+    
+    def __post_init__(self):
+        object.__setattr__(self, 'required_materials', tuple(self.required_materials))
 
 class IntelligentTaskGenerator:
     """Automated task generation system"""
@@ -53,15 +60,18 @@ class IntelligentTaskGenerator:
         self.db_manager = db_manager
         self.task_templates = self._load_task_templates()
         
-    def _load_task_templates(self) -> Dict[str, List[TaskTemplate]]:
-        """Load task templates for different growing methods"""
-        return {
-            "hydroponic": self._get_hydroponic_templates(),
-            "soil": self._get_soil_templates(),
-            "aeroponic": self._get_aeroponic_templates()
-        }
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _load_task_templates() -> Mapping[str, Tuple[TaskTemplate, ...]]:
+        """Load task templates for different growing methods (built once and shared read-only)"""
+        return MappingProxyType({
+            "hydroponic": tuple(IntelligentTaskGenerator._get_hydroponic_templates()),
+            "soil": tuple(IntelligentTaskGenerator._get_soil_templates()),
+            "aeroponic": tuple(IntelligentTaskGenerator._get_aeroponic_templates())
+        })
     
-    def _get_hydroponic_templates(self) -> List[TaskTemplate]:
+    @staticmethod
+    def _get_hydroponic_templates() -> List[TaskTemplate]:
         """Get task templates for hydroponic growing"""
         return [
             # Germination Stage (0-14 days)
@@ -219,7 +229,8 @@ class IntelligentTaskGenerator:
             )
         ]
     
-    def _get_soil_templates(self) -> List[TaskTemplate]:
+    @staticmethod
+    def _get_soil_templates() -> List[TaskTemplate]:
         """Get task templates for soil growing"""
         return [
             TaskTemplate(
@@ -237,7 +248,8 @@ class IntelligentTaskGenerator:
             # Add more soil-specific templates...
         ]
     
-    def _get_aeroponic_templates(self) -> List[TaskTemplate]:
+    @staticmethod
+    def _get_aeroponic_templates() -> List[TaskTemplate]:
         """Get task templates for aeroponic growing"""
         return [
             TaskTemplate(
@@ -264,8 +276,9 @@ class IntelligentTaskGenerator:
                 logger.error(f"Garden {garden_id} not found")
                 return []
             
-            # Get current growth stage and days since planting
-            current_stage = self._determine_growth_stage(garden_info)
+            # Get current growth stage and days since planting on the garden's own timeline
+            stage_starts = self._get_stage_starts(garden_info)
+            current_stage = self._determine_growth_stage(garden_info, stage_starts)
             days_since_planting = self._calculate_days_since_planting(garden_info)
             
             # Get templates for growing method
@@ -275,8 +288,8 @@ class IntelligentTaskGenerator:
             # Generate tasks based on current stage
             generated_tasks = []
             for template in templates:
-                if self._should_generate_task(template, current_stage, days_since_planting, garden_id):
-                    task = self._create_task_from_template(template, garden_id, garden_info)
+                if self._should_generate_task(template, current_stage, days_since_planting, garden_id, stage_starts):
+                    task = self._create_task_from_template(template, garden_id, garden_info, stage_starts)
                     generated_tasks.append(task)
             
             logger.info(f"Generated {len(generated_tasks)} tasks for garden {garden_id}")
@@ -287,48 +300,58 @@ class IntelligentTaskGenerator:
             return []
     
     def _get_garden_info(self, garden_id: int) -> Optional[Dict[str, Any]]:
-        """Get garden information from database"""
+        """Get garden information from database
+        
+        Gardens have no planting data of their own; the garden's grow starts
+        with its earliest planted plant (or its creation date when it has no
+        plants yet), and that plant's type and strain pick the stage timeline.
+        """
         try:
             with self.db_manager.get_connection() as conn:
                 cursor = conn.execute("""
-                    SELECT id, name, growing_method, plant_type, planted_date, 
-                           current_stage, stage_start_date
+                    SELECT id, name, growing_method, created_date
                     FROM gardens 
-                    WHERE id = ? AND is_active = 1
+                    WHERE id = ? AND status = 'active'
                 """, (garden_id,))
                 
                 row = cursor.fetchone()
-                if row:
-                    return {
-                        'id': row[0],
-                        'name': row[1],
-                        'growing_method': row[2],
-                        'plant_type': row[3],
-                        'planted_date': row[4],
-                        'current_stage': row[5],
-                        'stage_start_date': row[6]
-                    }
-                return None
+                if not row:
+                    return None
+                
+                plant = conn.execute("""
+                    SELECT plant_type, strain_cultivar, planting_date, growth_stage
+                    FROM plants
+                    WHERE garden_id = ?
+                    ORDER BY planting_date, id LIMIT 1
+                """, (garden_id,)).fetchone()
+                
+                return {
+                    'id': row[0],
+                    'name': row[1],
+                    'growing_method': row[2],
+                    'plant_type': plant[0] if plant else None,
+                    'strain': plant[1] if plant else None,
+                    'planted_date': plant[2] if plant else row[3],
+                    'current_stage': plant[3] if plant else None
+                }
                 
         except Exception as e:
             logger.error(f"Error getting garden info: {e}")
             return None
     
-    def _determine_growth_stage(self, garden_info: Dict[str, Any]) -> GrowthStage:
+    def _get_stage_starts(self, garden_info: Dict[str, Any]) -> Dict[GrowthStage, int]:
+        """Days after planting at which each stage begins, in growth order (photoperiod or autoflower)"""
+        plant_type = garden_info.get('plant_type')
+        profile = detect_profile(plant_type, garden_info.get('strain'))
+        return {GrowthStage(stage): day for stage, day in stage_start_days((plant_type or 'cannabis').lower(), profile)}
+    
+    def _determine_growth_stage(self, garden_info: Dict[str, Any],
+                                stage_starts: Optional[Dict[GrowthStage, int]] = None) -> GrowthStage:
         """Determine current growth stage based on days since planting"""
         days_since_planting = self._calculate_days_since_planting(garden_info)
-        
-        # Default growth stage progression (can be customized per plant type)
-        if days_since_planting < 7:
-            return GrowthStage.GERMINATION
-        elif days_since_planting < 21:
-            return GrowthStage.SEEDLING
-        elif days_since_planting < 56:
-            return GrowthStage.VEGETATIVE
-        elif days_since_planting < 112:
-            return GrowthStage.FLOWERING
-        else:
-            return GrowthStage.HARVEST
+        stage_starts = stage_starts or self._get_stage_starts(garden_info)
+        started = [stage for stage, day in stage_starts.items() if day <= days_since_planting]
+        return started[-1] if started else next(iter(stage_starts))
     
     def _calculate_days_since_planting(self, garden_info: Dict[str, Any]) -> int:
         """Calculate days since garden was planted"""
@@ -336,7 +359,8 @@ class IntelligentTaskGenerator:
         return (datetime.now() - planted_date).days
     
     def _should_generate_task(self, template: TaskTemplate, current_stage: GrowthStage, 
-                            days_since_planting: int, garden_id: int) -> bool:
+                            days_since_planting: int, garden_id: int,
+                            stage_starts: Dict[GrowthStage, int]) -> bool:
         """Determine if a task should be generated based on template and garden state"""
         
         # Check if we're in the correct growth stage
@@ -344,7 +368,7 @@ class IntelligentTaskGenerator:
             return False
         
         # Check if it's the right time to generate this task
-        stage_days = self._calculate_days_in_current_stage(current_stage, days_since_planting)
+        stage_days = self._calculate_days_in_current_stage(current_stage, days_since_planting, stage_starts)
         if stage_days < template.days_from_stage_start:
             return False
         
@@ -363,17 +387,9 @@ class IntelligentTaskGenerator:
         
         return True
     
-    def _calculate_days_in_current_stage(self, stage: GrowthStage, total_days: int) -> int:
+    def _calculate_days_in_current_stage(self, stage: GrowthStage, total_days: int,
+                                         stage_starts: Dict[GrowthStage, int]) -> int:
         """Calculate how many days we've been in the current growth stage"""
-        # Simplified calculation - in real implementation, this would use stage_start_date
-        stage_starts = {
-            GrowthStage.GERMINATION: 0,
-            GrowthStage.SEEDLING: 7,
-            GrowthStage.VEGETATIVE: 21,
-            GrowthStage.FLOWERING: 56,
-            GrowthStage.HARVEST: 112
-        }
-        
         return total_days - stage_starts.get(stage, 0)
     
     def _get_last_similar_task(self, garden_id: int, task_name: str) -> Optional[Dict[str, Any]]:
@@ -410,52 +426,70 @@ class IntelligentTaskGenerator:
             return False
     
     def _create_task_from_template(self, template: TaskTemplate, garden_id: int, 
-                                 garden_info: Dict[str, Any]) -> Dict[str, Any]:
+                                 garden_info: Dict[str, Any],
+                                 stage_starts: Dict[GrowthStage, int]) -> Dict[str, Any]:
         """Create a task dictionary from template"""
         
-        # Calculate due date based on template timing
-        due_date = datetime.now() + timedelta(days=1)  # Default to tomorrow
+        # The occurrence day is anchored to the planting date so that repeated
+        # generation runs for the same occurrence share one idempotency key,
+        # and the task is due on that same day
+        scheduled_day = self._calculate_occurrence_date(template, garden_info, stage_starts)
         
-        # Create detailed description with instructions
-        full_description = f"{template.description}\n\n"
-        full_description += f"Instructions: {template.instructions}\n"
-        
-        if template.required_materials:
-            full_description += f"Required materials: {', '.join(template.required_materials)}\n"
-        
-        full_description += f"Estimated duration: {template.estimated_duration} minutes"
+        # The template text is stored once per version and resolved when the task is shown
+        template_id = self.db_manager.get_task_template_id(
+            template.name, template.description, template.instructions,
+            template.required_materials, template.estimated_duration
+        )
+        if template_id is None:
+            description = self.db_manager.format_task_template(asdict(template))
+        else:
+            description = ''
         
         return {
             'title': f"{template.name} - {garden_info['name']}",
-            'description': full_description,
+            'description': description,
+            'template_id': template_id,
             'garden_id': garden_id,
             'task_type': template.task_type.value,
             'priority': template.priority,
-            'due_date': due_date.isoformat(),
+            'due_date': scheduled_day.isoformat(),
             'estimated_duration': template.estimated_duration,
             'is_completed': False,
             'created_date': datetime.now().isoformat(),
-            'auto_generated': True
+            'auto_generated': True,
+            'template_name': template.name,
+            'scheduled_date': scheduled_day.isoformat(),
+            'generation_key': self.db_manager.make_generation_key(garden_id, template.name, scheduled_day)
         }
     
+    def _calculate_occurrence_date(self, template: TaskTemplate, garden_info: Dict[str, Any],
+                                   stage_starts: Dict[GrowthStage, int]) -> date:
+        """Get the day of the template occurrence that is currently due"""
+        planted_day = datetime.fromisoformat(garden_info['planted_date']).date()
+        stage_start_day = planted_day + timedelta(days=stage_starts.get(template.growth_stage, 0))
+        first_day = stage_start_day + timedelta(days=template.days_from_stage_start)
+        
+        if template.frequency_days <= 0:
+            return first_day
+        
+        elapsed_days = max(0, (date.today() - first_day).days)
+        occurrences = elapsed_days // template.frequency_days
+        return first_day + timedelta(days=occurrences * template.frequency_days)
+    
     def generate_tasks_for_all_gardens(self) -> int:
         """Generate tasks for all active gardens"""
-        total_generated = 0
-        
         try:
             # Get all active gardens
             with self.db_manager.get_connection() as conn:
-                cursor = conn.execute("SELECT id FROM gardens WHERE is_active = 1")
+                cursor = conn.execute("SELECT id FROM gardens WHERE status = 'active'")
                 gardens = cursor.fetchall()
             
+            all_tasks = []
             for garden in gardens:
-                garden_id = garden[0]
-                tasks = self.generate_tasks_for_garden(garden_id)
+                all_tasks.extend(self.generate_tasks_for_garden(garden[0]))
                 
-                # Save generated tasks to database
-                for task in tasks:
-                    self._save_task_to_database(task)
-                    total_generated += 1
+            # Save generated tasks to database in one set-based write
+            total_generated = self.save_generated_tasks(all_tasks)
             
             logger.info(f"Generated {total_generated} total tasks for all gardens")
             return total_generated
@@ -464,24 +498,17 @@ class IntelligentTaskGenerator:
             logger.error(f"Error generating tasks for all gardens: {e}")
             return 0
     
-    def _save_task_to_database(self, task: Dict[str, Any]) -> bool:
-        """Save generated task to database"""
+    def save_generated_tasks(self, tasks: List[Dict[str, Any]]) -> int:
+        """Save generated tasks to database, ignoring occurrences that already exist
+        
+        Safe to call concurrently from the notification thread, the GUI and the
+        new grow wizard: duplicates are rejected by the unique generation key.
+        """
         try:
-            with self.db_manager.get_connection() as conn:
-                conn.execute("""
-                    INSERT INTO tasks (title, description, garden_id, task_type, priority, 
-                                     due_date, estimated_duration, is_completed, created_date)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    task['title'], task['description'], task['garden_id'],
-                    task['task_type'], task['priority'], task['due_date'],
-                    task['estimated_duration'], task['is_completed'], task['created_date']
-                ))
-                conn.commit()
-                
-            logger.debug(f"Saved auto-generated task: {task['title']}")
-            return True
+            inserted = self.db_manager.insert_generated_tasks(tasks)
+            logger.debug(f"Saved {inserted} auto-generated tasks")
+            return inserted
             
         except Exception as e:
-            logger.error(f"Error saving task to database: {e}")
-            return False
+            logger.error(f"Error saving tasks to database: {e}")
+            return 0
@@ -9,10 +9,39 @@ from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 import heapq
-from collections import defaultdict
+import threading
+from collections import defaultdict, OrderedDict
+
+import numpy as np
+
+from .route_planner import LocationDistanceMatrix, RoutePlanner
+from .crew_scheduler import CrewScheduler
 
 logger = logging.getLogger(__name__)
 
+def priority_key(priority: Any) -> str:
+    """Normalize a priority ('High', 'high' or TaskPriority.HIGH) to its lowercase label"""
+    return str(getattr(priority, 'value', priority)).lower()
+
+# Batching weight per priority (higher batches first), keyed by priority_key
+BATCH_PRIORITY_WEIGHTS = {'critical': 3, 'high': 2, 'medium': 1, 'low': 0}
+
+# Extra compatibility score for task type pairs that combine well
+TASK_TYPE_AFFINITY = {
+    ('feeding', 'monitoring'): 3.0,
+    ('pruning', 'training'): 4.0,
+    ('watering', 'monitoring'): 2.0
+}
+
+# Batching limits
+MAX_BATCH_SIZE = 5
+BATCH_WINDOW_MINUTES = 120
+
+# Number of coordinated days kept in memory (least recently used are dropped)
+COORDINATION_CACHE_SIZE = 14
+
+_EPOCH = datetime(1970, 1, 1)
+
 class ResourceType(Enum):
     """Types of resources that can be shared"""
     NUTRIENTS = "nutrients"
@@ -52,7 +81,18 @@ class MultiGardenTaskCoordinator:
     def __init__(self, db_manager):
         self.db_manager = db_manager
         self.resource_inventory = self._load_resource_inventory()
+        self.distance_matrix = LocationDistanceMatrix.from_settings(db_manager)
+        self.route_planner = RoutePlanner(self.distance_matrix)
+        
+        time_inventory = self.resource_inventory[ResourceType.TIME]
+        workers = CrewScheduler.load_workers(db_manager, time_inventory['workers'], time_inventory['daily_capacity'])
+        self.crew_scheduler = CrewScheduler(workers, self.distance_matrix)
+        time_inventory['workers'] = len(workers)
         
+        # Plan state per coordinated day in LRU order, kept up to date by on_task_changed
+        self.plans: Dict[str, Dict[str, Any]] = OrderedDict()
+        self.plan_lock = threading.RLock()
+    
     def _load_resource_inventory(self) -> Dict[ResourceType, Dict[str, Any]]:
         """Load available resources from database"""
         return {
@@ -73,60 +113,408 @@ class MultiGardenTaskCoordinator:
             ResourceType.TIME: {
                 'available': True,
                 'daily_capacity': 480,  # 8 hours in minutes
+                'workers': 1,  # people who can work on tasks at the same time
                 'current_usage': 0
             }
         }
     
+    def _get_concurrent_capacity(self, resource_type: ResourceType) -> float:
+        """Get how much of a resource can be in use at the same moment"""
+        inventory = self.resource_inventory.get(resource_type)
+        if not inventory or not inventory.get('available', True):
+            return 0.0
+        
+        if resource_type == ResourceType.TIME:
+            return float(inventory.get('workers', 1))
+        if resource_type == ResourceType.EQUIPMENT:
+            return float(len(inventory.get('items', [])))
+        return float(inventory.get('capacity', 0))
+    
+    def _get_concurrent_demand(self, resource_req: ResourceRequirement) -> float:
+        """Get how much of a resource a task holds while it runs"""
+        if resource_req.resource_type == ResourceType.TIME:
+            return 1.0  # one worker, whatever the duration
+        return float(resource_req.quantity)
+    
     def coordinate_daily_tasks(self, target_date: datetime = None) -> Dict[str, Any]:
         """Coordinate all tasks for a given date across all gardens"""
         if target_date is None:
             target_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
         
         try:
+            # Read the version first so a change during loading makes the plan stale
+            data_version = self._get_data_version()
+            
             # Get all pending tasks for the date
             pending_tasks = self._get_pending_tasks_for_date(target_date)
-            if not pending_tasks:
-                return {'batches': [], 'conflicts': [], 'total_tasks': 0}
             
-            # Analyze resource requirements
-            task_resources = self._analyze_resource_requirements(pending_tasks)
+            with self.plan_lock:
+                plan = self._new_plan_state(target_date)
+                plan['version'] = data_version
+                for task in pending_tasks:
+                    self._add_task_to_plan(plan, task)
             
-            # Detect and resolve conflicts
-            conflicts = self._detect_conflicts(pending_tasks, task_resources)
-            resolved_tasks = self._resolve_conflicts(pending_tasks, conflicts)
+                # Detect conflicts on every resource and batch all tasks
+                self._refresh_conflicts(plan, set(plan['by_resource']), True)
+                self._refresh_resolved_tasks(plan)
+                self._rebatch(plan, set(plan['tasks']))
             
-            # Create optimal task batches
-            task_batches = self._create_task_batches(resolved_tasks, task_resources)
+                self._store_plan(plan)
+                coordination_result = self._publish_plan(plan)
             
-            # Optimize execution order
-            optimized_batches = self._optimize_execution_order(task_batches)
+            logger.info(f"Coordinated {len(pending_tasks)} tasks into {len(plan['batches'])} optimized batches")
+            return coordination_result
             
-            # Calculate resource sharing opportunities
-            sharing_opportunities = self._identify_sharing_opportunities(optimized_batches)
+        except Exception as e:
+            logger.error(f"Error coordinating daily tasks: {e}")
+            return {'error': str(e)}
+    
+    def _get_data_version(self) -> int:
+        """Get the database's task/garden change counter"""
+        return getattr(self.db_manager, 'data_version', 0)
+    
+    def _store_plan(self, plan: Dict[str, Any]):
+        """Keep a plan as the most recently used one and drop the least recently used"""
+        self.plans[plan['key']] = plan
+        self.plans.move_to_end(plan['key'])
+        while len(self.plans) > COORDINATION_CACHE_SIZE:
+            self.plans.popitem(last=False)
+    
+    def _get_current_plan(self, target_date: datetime = None) -> Optional[Dict[str, Any]]:
+        """Get the plan for a date, coordinating it only if it is missing or stale"""
+        if target_date is None:
+            target_date = datetime.now()
+        target_date = target_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        key = target_date.strftime('%Y-%m-%d')
+        
+        with self.plan_lock:
+            plan = self.plans.get(key)
+            if plan is not None and plan['version'] == self._get_data_version():
+                self.plans.move_to_end(key)
+                if plan['result'] is None:
+                    self._publish_plan(plan)
+                return plan
             
-            coordination_result = {
-                'date': target_date.isoformat(),
-                'total_tasks': len(pending_tasks),
-                'batches': optimized_batches,
-                'conflicts_detected': len(conflicts),
-                'conflicts_resolved': conflicts,
-                'sharing_opportunities': sharing_opportunities,
-                'estimated_time_saved': self._calculate_time_savings(optimized_batches),
-                'resource_efficiency': self._calculate_resource_efficiency(optimized_batches)
-            }
+            result = self.coordinate_daily_tasks(target_date)
+            if 'error' in result:
+                return None
+            return self.plans.get(key)
+    
+    def get_coordination(self, target_date: datetime = None) -> Dict[str, Any]:
+        """Get the coordination result for a date from the cache, coordinating on a miss"""
+        plan = self._get_current_plan(target_date)
+        if plan is None:
+            return {'error': 'Coordination failed'}
+        return plan['result']
+    
+    def get_published_plan(self, target_date: datetime = None) -> Optional[Dict[str, Any]]:
+        """Get the latest coordination result for a date without recomputing it"""
+        if target_date is None:
+            target_date = datetime.now()
+        
+        with self.plan_lock:
+            plan = self.plans.get(target_date.strftime('%Y-%m-%d'))
+            if plan is None:
+                return None
+            if plan['result'] is None:
+                self._publish_plan(plan)
+            return plan['result']
+    
+    def on_task_changed(self, change_type: str, task_id: Optional[int] = None):
+        """Apply a task change to every coordinated day instead of recomputing it from scratch
+        
+        Registered with DatabaseManager.add_task_change_listener. Only the
+        resources and batches touched by the task are re-planned. Bulk and
+        garden changes only mark the cached plans stale; _get_current_plan
+        recomputes a stale plan the next time it is asked for.
+        """
+        with self.plan_lock:
+            if not self.plans:
+                return
             
-            logger.info(f"Coordinated {len(pending_tasks)} tasks into {len(optimized_batches)} optimized batches")
-            return coordination_result
+            data_version = self._get_data_version()
+            if change_type in ('bulk', 'garden') or task_id is None:
+                for plan in self.plans.values():
+                    plan['version'] = None
+                return
+            
+            task = None
+            if change_type not in ('completed', 'deleted'):
+                task = self._get_pending_task(task_id)
             
+            for plan in self.plans.values():
+                # A plan that missed an earlier change stays stale
+                if plan['version'] != data_version - 1:
+                    continue
+                belongs = task is not None and plan['start'] <= str(task['due_date']) < plan['end']
+                if task_id in plan['tasks'] or belongs:
+                    try:
+                        self._apply_task_delta(plan, task_id, task if belongs else None)
+                    except Exception as e:
+                        logger.error(f"Error applying task change to plan {plan['key']}: {e}")
+                        plan['version'] = None
+                        continue
+                # Days the task never touched stay current
+                plan['version'] = data_version
+    
+    def _get_pending_task(self, task_id: int) -> Optional[Dict[str, Any]]:
+        """Get one pending task in the same shape as _get_pending_tasks_for_range"""
+        try:
+            with self.db_manager.get_connection() as conn:
+                row = conn.execute("""
+                    SELECT t.id, t.title, t.description, t.garden_id, t.task_type, 
+                           t.priority, t.due_date, t.estimated_duration,
+                           g.name as garden_name, g.growing_method, g.location
+                    FROM tasks t
+                    JOIN gardens g ON t.garden_id = g.id
+                    WHERE t.id = ? AND t.completed = 0 AND g.status = 'active'
+                """, (task_id,)).fetchone()
+                
+                if row is None:
+                    return None
+                
+                return {
+                    'id': row[0],
+                    'title': row[1],
+                    'description': row[2],
+                    'garden_id': row[3],
+                    'task_type': row[4],
+                    'priority': row[5],
+                    'due_date': row[6],
+                    'estimated_duration': row[7],
+                    'garden_name': row[8],
+                    'growing_method': row[9],
+                    'location': row[10]
+                }
+        
         except Exception as e:
-            logger.error(f"Error coordinating daily tasks: {e}")
+            logger.error(f"Error getting pending task {task_id}: {e}")
+            return None
+    
+    def _new_plan_state(self, target_date: datetime) -> Dict[str, Any]:
+        """Create an empty plan for one day"""
+        return {
+            'key': target_date.strftime('%Y-%m-%d'),
+            'date': target_date,
+            'start': target_date.strftime('%Y-%m-%d'),
+            'end': (target_date + timedelta(days=1)).strftime('%Y-%m-%d'),
+            'tasks': {},                      # task id -> task as loaded
+            'resources': {},                  # task id -> resource requirements
+            'by_resource': defaultdict(set),  # resource type -> task ids
+            'resource_conflicts': {},         # resource type -> conflicts
+            'space_conflicts': [],
+            'resolved': {},                   # task id -> task with conflict adjustments
+            'batches': {},                    # batch key -> TaskBatch
+            'task_batch': {},                 # task id -> batch key
+            'next_batch_key': 0,
+            'version': 0,
+            'result': None
+        }
+    
+    def _add_task_to_plan(self, plan: Dict[str, Any], task: Dict[str, Any]):
+        """Register a task and its resource requirements in a plan"""
+        task_id = task['id']
+        plan['tasks'][task_id] = task
+        plan['resources'][task_id] = self._analyze_resource_requirements([task])[task_id]
+        for req in plan['resources'][task_id]:
+            plan['by_resource'][req.resource_type].add(task_id)
+    
+    def _remove_task_from_plan(self, plan: Dict[str, Any], task_id: int) -> Dict[ResourceType, None]:
+        """Forget a task and return the resource types it used"""
+        plan['tasks'].pop(task_id, None)
+        resource_types = {}
+        for req in plan['resources'].pop(task_id, []):
+            plan['by_resource'][req.resource_type].discard(task_id)
+            resource_types[req.resource_type] = None
+        return resource_types
+    
+    def _apply_task_delta(self, plan: Dict[str, Any], task_id: int, task: Optional[Dict[str, Any]]):
+        """Re-plan a day after one task was added, changed or removed; the result is rebuilt on the next read"""
+        physical_types = ('pruning', 'training', 'harvesting', 'maintenance')
+        old_task = plan['tasks'].get(task_id)
+        touches_space = any(t is not None and t['task_type'] in physical_types for t in (old_task, task))
+        
+        affected_resources = set(self._remove_task_from_plan(plan, task_id))
+        if task is not None:
+            self._add_task_to_plan(plan, task)
+            affected_resources.update(req.resource_type for req in plan['resources'][task_id])
+        
+        previous_resolved = plan['resolved']
+        self._refresh_conflicts(plan, affected_resources, touches_space)
+        self._refresh_resolved_tasks(plan)
+        
+        # Tasks whose effective due time moved, plus the changed task itself
+        changed = {task_id}
+        for other_id in set(previous_resolved) | set(plan['resolved']):
+            if other_id in plan['tasks'] and (previous_resolved.get(other_id, plan['tasks'][other_id])['due_date'] !=
+                                              self._resolved_task(plan, other_id)['due_date']):
+                changed.add(other_id)
+        
+        # Re-batch the batches holding changed tasks and the batches a new task could join
+        affected_batches = {plan['task_batch'][t] for t in changed if t in plan['task_batch']}
+        affected_batches.update(self._nearby_batches(plan, [t for t in changed if t in plan['tasks']]))
+        
+        retask_ids = set()
+        for key in affected_batches:
+            for batch_task in plan['batches'].pop(key).tasks:
+                plan['task_batch'].pop(batch_task['id'], None)
+                retask_ids.add(batch_task['id'])
+        plan['task_batch'].pop(task_id, None)
+        
+        retask_ids.update(t for t in changed if t in plan['tasks'])
+        self._rebatch(plan, {t for t in retask_ids if t in plan['tasks']})
+        # Ordering and crew assignment run once on the next read, not after every delta
+        plan['result'] = None
+    
+    def _refresh_conflicts(self, plan: Dict[str, Any], resource_types, include_space: bool):
+        """Re-run conflict detection for the given resources only"""
+        for resource_type in resource_types:
+            task_ids = plan['by_resource'].get(resource_type, ())
+            tasks = [plan['tasks'][t] for t in task_ids]
+            resources = {t: [req for req in plan['resources'][t] if req.resource_type == resource_type]
+                         for t in task_ids}
+            plan['resource_conflicts'][resource_type] = self._detect_conflicts(tasks, resources,
+                                                                               include_location=False)
+        
+        if include_space:
+            plan['space_conflicts'] = self._check_location_conflicts(list(plan['tasks'].values()))
+    
+    def _all_conflicts(self, plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Get the current conflicts of a plan in detection order"""
+        conflicts = []
+        for resource_type in ResourceType:
+            conflicts.extend(plan['resource_conflicts'].get(resource_type, []))
+        conflicts.extend(plan['space_conflicts'])
+        return conflicts
+    
+    def _refresh_resolved_tasks(self, plan: Dict[str, Any]):
+        """Re-apply conflict resolution to copies of the tasks involved in conflicts"""
+        conflicts = self._all_conflicts(plan)
+        involved = {t for conflict in conflicts for t in conflict['tasks'] if t in plan['tasks']}
+        copies = [dict(plan['tasks'][t]) for t in involved]
+        self._resolve_conflicts(copies, conflicts)
+        plan['resolved'] = {task['id']: task for task in copies}
+    
+    def _resolved_task(self, plan: Dict[str, Any], task_id: int) -> Dict[str, Any]:
+        """Get a task with its conflict adjustments applied"""
+        return plan['resolved'].get(task_id) or plan['tasks'][task_id]
+    
+    def _nearby_batches(self, plan: Dict[str, Any], task_ids: List[int]) -> set:
+        """Find batches that a task could join (same location rules and time window as batching)"""
+        nearby = set()
+        if not task_ids:
+            return nearby
+        
+        probes = []
+        for task_id in task_ids:
+            task = self._resolved_task(plan, task_id)
+            probes.append((task['location'], datetime.fromisoformat(task['due_date'])))
+        
+        window = timedelta(minutes=BATCH_WINDOW_MINUTES)
+        for key, batch in plan['batches'].items():
+            for location, due in probes:
+                if any((location is None or batch_task['location'] == location or batch_task['location'] is None)
+                       and abs(datetime.fromisoformat(batch_task['due_date']) - due) <= window
+                       for batch_task in batch.tasks):
+                    nearby.add(key)
+                    break
+        return nearby
+    
+    def _rebatch(self, plan: Dict[str, Any], task_ids: set):
+        """Batch the given tasks and add the new batches to the plan"""
+        if not task_ids:
+            return
+        
+        ordered_ids = [t for t in plan['tasks'] if t in task_ids]  # Keep load order for tie-breaking
+        tasks = [self._resolved_task(plan, t) for t in ordered_ids]
+        for batch in self._create_task_batches(tasks, plan['resources']):
+            key = plan['next_batch_key']
+            plan['next_batch_key'] += 1
+            plan['batches'][key] = batch
+            for batch_task in batch.tasks:
+                plan['task_batch'][batch_task['id']] = key
+    
+    def _publish_plan(self, plan: Dict[str, Any]) -> Dict[str, Any]:
+        """Order the plan's batches and build the coordination result"""
+        if not plan['tasks']:
+            plan['result'] = {'batches': [], 'conflicts': [], 'total_tasks': 0}
+            return plan['result']
+        
+        conflicts = self._all_conflicts(plan)
+        
+        # Optimize execution order
+        optimized_batches = self._optimize_execution_order(list(plan['batches'].values()))
+        
+        # Calculate resource sharing opportunities
+        sharing_opportunities = self._identify_sharing_opportunities(optimized_batches)
+        
+        plan['result'] = {
+            'date': plan['date'].isoformat(),
+            'total_tasks': len(plan['tasks']),
+            'batches': optimized_batches,
+            'conflicts_detected': len(conflicts),
+            'conflicts_resolved': conflicts,
+            'sharing_opportunities': sharing_opportunities,
+            'estimated_time_saved': self._calculate_time_savings(optimized_batches),
+            'travel_minutes': round(sum(batch['travel_minutes'] for batch in optimized_batches), 1),
+            'crew_assignment': self.crew_scheduler.assign(optimized_batches, plan['date']),
+            'resource_efficiency': self._calculate_resource_efficiency(optimized_batches)
+        }
+        return plan['result']
+    
+    def _get_daily_capacity(self) -> Dict[ResourceType, float]:
+        """Get how much of each resource is available per day"""
+        time_inventory = self.resource_inventory.get(ResourceType.TIME, {})
+        labour_minutes = sum(end - start for start, end in
+                             (worker.shift_bounds() for worker in self.crew_scheduler.workers))
+        
+        return {
+            ResourceType.TIME: float(labour_minutes),
+            ResourceType.WATER: float(self.resource_inventory.get(ResourceType.WATER, {}).get('capacity', 0)),
+            ResourceType.NUTRIENTS: float(self.resource_inventory.get(ResourceType.NUTRIENTS, {}).get('capacity', 0)),
+            # Equipment minutes: every item can be used for the whole working day
+            ResourceType.EQUIPMENT: float(self._get_concurrent_capacity(ResourceType.EQUIPMENT) *
+                                          time_inventory.get('daily_capacity', 480))
+        }
+    
+    def plan_horizon(self, start_date: datetime = None, horizon_days: int = 14,
+                     time_limit_seconds: float = 0.5) -> Dict[str, Any]:
+        """Spread pending tasks over the next days within daily resource capacity
+        
+        Overdue tasks and tasks due in the horizon are placed by a greedy pass
+        followed by a time-boxed local search that levels the load across days.
+        """
+        from .resource_scheduler import ResourceConstrainedScheduler
+        
+        if start_date is None:
+            start_date = datetime.now()
+        start_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        
+        try:
+            pending_tasks = self._get_pending_tasks_for_range(None, start_date + timedelta(days=horizon_days))
+            task_resources = self._analyze_resource_requirements(pending_tasks)
+            
+            scheduler = ResourceConstrainedScheduler(self._get_daily_capacity())
+            plan = scheduler.schedule(pending_tasks, task_resources, start_date.date(),
+                                      horizon_days, time_limit_seconds)
+            
+            logger.info(f"Planned {len(pending_tasks)} tasks over {horizon_days} days, "
+                        f"{plan['tasks_moved']} moved, peak utilization {plan['peak_utilization']}%")
+            return plan
+            
+        except Exception as e:
+            logger.error(f"Error planning task horizon: {e}")
             return {'error': str(e)}
     
     def _get_pending_tasks_for_date(self, target_date: datetime) -> List[Dict[str, Any]]:
         """Get all pending tasks for a specific date"""
+        return self._get_pending_tasks_for_range(target_date, target_date + timedelta(days=1))
+    
+    def _get_pending_tasks_for_range(self, start: Optional[datetime], end: datetime) -> List[Dict[str, Any]]:
+        """Get all pending tasks due in [start, end), or before end when start is None"""
         try:
-            start_date = target_date.strftime('%Y-%m-%d')
-            end_date = (target_date + timedelta(days=1)).strftime('%Y-%m-%d')
+            start_date = start.strftime('%Y-%m-%d') if start is not None else ''
+            end_date = end.strftime('%Y-%m-%d')
             
             with self.db_manager.get_connection() as conn:
                 cursor = conn.execute("""
@@ -135,10 +523,10 @@ class MultiGardenTaskCoordinator:
                            g.name as garden_name, g.growing_method, g.location
                     FROM tasks t
                     JOIN gardens g ON t.garden_id = g.id
-                    WHERE t.is_completed = 0 
+                    WHERE t.completed = 0 
                     AND t.due_date >= ? 
                     AND t.due_date < ?
-                    AND g.is_active = 1
+                    AND g.status = 'active'
                     ORDER BY t.priority DESC, t.due_date ASC
                 """, (start_date, end_date))
                 
@@ -209,11 +597,12 @@ class MultiGardenTaskCoordinator:
         return task_resources
     
     def _detect_conflicts(self, tasks: List[Dict[str, Any]], 
-                         task_resources: Dict[int, List[ResourceRequirement]]) -> List[Dict[str, Any]]:
+                         task_resources: Dict[int, List[ResourceRequirement]],
+                         include_location: bool = True) -> List[Dict[str, Any]]:
         """Detect conflicts between tasks"""
         conflicts = []
         
-        # Check for resource conflicts
+        # Collect resource usage intervals, parsing each due date once
         resource_usage = defaultdict(list)
         
         for task in tasks:
@@ -221,41 +610,90 @@ class MultiGardenTaskCoordinator:
             due_time = datetime.fromisoformat(task['due_date'])
             
             for resource_req in task_resources.get(task_id, []):
+                if resource_req.duration_minutes <= 0:
+                    continue
                 resource_usage[resource_req.resource_type].append({
                     'task_id': task_id,
                     'task_title': task['title'],
                     'start_time': due_time,
                     'end_time': due_time + timedelta(minutes=resource_req.duration_minutes),
-                    'quantity': resource_req.quantity,
+                    'quantity': self._get_concurrent_demand(resource_req),
                     'flexibility': resource_req.flexibility_minutes
                 })
         
-        # Check for overlapping resource usage
+        # Find every window where concurrent usage exceeds the resource capacity
         for resource_type, usages in resource_usage.items():
-            # Sort by start time
-            usages.sort(key=lambda x: x['start_time'])
-            
-            for i in range(len(usages) - 1):
-                current = usages[i]
-                next_usage = usages[i + 1]
-                
-                # Check if there's an overlap
-                if current['end_time'] > next_usage['start_time']:
-                    conflicts.append({
-                        'type': TaskConflictType.RESOURCE_CONFLICT.value,
-                        'resource': resource_type.value,
-                        'tasks': [current['task_id'], next_usage['task_id']],
-                        'task_titles': [current['task_title'], next_usage['task_title']],
-                        'overlap_minutes': (current['end_time'] - next_usage['start_time']).total_seconds() / 60,
-                        'flexibility': min(current['flexibility'], next_usage['flexibility'])
-                    })
+            capacity = self._get_concurrent_capacity(resource_type)
+            conflicts.extend(self._sweep_resource_conflicts(resource_type, usages, capacity))
         
         # Check for garden location conflicts (if tasks require physical presence)
-        location_conflicts = self._check_location_conflicts(tasks)
-        conflicts.extend(location_conflicts)
+        if include_location:
+            location_conflicts = self._check_location_conflicts(tasks)
+            conflicts.extend(location_conflicts)
         
         return conflicts
     
+    def _sweep_resource_conflicts(self, resource_type: ResourceType, usages: List[Dict[str, Any]],
+                                  capacity: float) -> List[Dict[str, Any]]:
+        """Sweep usage intervals of one resource and group tasks into over-capacity windows
+        
+        Start and end events are sorted once, then the running load is tracked
+        across them, so detection is O(n log n) and catches overlaps between
+        non-adjacent intervals. Each conflict lists only the tasks that are
+        active during a window in which the load is above capacity.
+        """
+        events = []
+        for index, usage in enumerate(usages):
+            events.append((usage['start_time'], 1, index))
+            events.append((usage['end_time'], 0, index))  # Ends sort before starts at the same instant
+        events.sort()
+        
+        conflicts = []
+        load = 0.0
+        active = set()
+        window = None
+        
+        for event_time, is_start, index in events:
+            if is_start:
+                active.add(index)
+                load += usages[index]['quantity']
+            else:
+                active.discard(index)
+                load -= usages[index]['quantity']
+            
+            if load > capacity + 1e-9:
+                if window is None:
+                    window = {'start_time': event_time, 'members': set(active), 'peak_load': load}
+                else:
+                    if is_start:
+                        window['members'].add(index)
+                    window['peak_load'] = max(window['peak_load'], load)
+            elif window is not None:
+                conflicts.append(self._build_resource_conflict(resource_type, usages, capacity,
+                                                               window, event_time))
+                window = None
+        
+        return conflicts
+    
+    def _build_resource_conflict(self, resource_type: ResourceType, usages: List[Dict[str, Any]],
+                                 capacity: float, window: Dict[str, Any], end_time: datetime) -> Dict[str, Any]:
+        """Create a conflict record for one over-capacity window"""
+        members = sorted(window['members'], key=lambda index: usages[index]['start_time'])
+        
+        return {
+            'type': TaskConflictType.RESOURCE_CONFLICT.value,
+            'resource': resource_type.value,
+            'tasks': [usages[index]['task_id'] for index in members],
+            'task_titles': [usages[index]['task_title'] for index in members],
+            'demands': {usages[index]['task_id']: usages[index]['quantity'] for index in members},
+            'capacity': capacity,
+            'peak_load': window['peak_load'],
+            'start_time': window['start_time'].isoformat(),
+            'end_time': end_time.isoformat(),
+            'overlap_minutes': (end_time - window['start_time']).total_seconds() / 60,
+            'flexibility': min(usages[index]['flexibility'] for index in members)
+        }
+    
     def _check_location_conflicts(self, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Check for conflicts when tasks require physical presence at different locations"""
         conflicts = []
@@ -281,14 +719,15 @@ class MultiGardenTaskCoordinator:
                               timedelta(minutes=current['estimated_duration']))
                 next_start = datetime.fromisoformat(next_task['due_date'])
                 
-                # Add travel time buffer (15 minutes between locations)
-                if (next_start - current_end).total_seconds() < 900:  # 15 minutes
+                # Leave enough time to walk between the two locations
+                travel_minutes = self.distance_matrix.travel_minutes(current['location'], next_task['location'])
+                if (next_start - current_end).total_seconds() < travel_minutes * 60:
                     conflicts.append({
                         'type': TaskConflictType.SPACE_CONFLICT.value,
                         'tasks': [current['id'], next_task['id']],
                         'task_titles': [current['title'], next_task['title']],
                         'locations': [current['location'], next_task['location']],
-                        'travel_time_needed': 15
+                        'travel_time_needed': int(np.ceil(travel_minutes))
                     })
         
         return conflicts
@@ -297,48 +736,52 @@ class MultiGardenTaskCoordinator:
                           conflicts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Resolve conflicts by rescheduling tasks"""
         resolved_tasks = tasks.copy()
+        tasks_by_id = {task['id']: task for task in resolved_tasks}
         
         for conflict in conflicts:
             if conflict['type'] == TaskConflictType.RESOURCE_CONFLICT.value:
-                self._resolve_resource_conflict(resolved_tasks, conflict)
+                self._resolve_resource_conflict(tasks_by_id, conflict)
             elif conflict['type'] == TaskConflictType.SPACE_CONFLICT.value:
-                self._resolve_space_conflict(resolved_tasks, conflict)
+                self._resolve_space_conflict(tasks_by_id, conflict)
         
         return resolved_tasks
     
-    def _resolve_resource_conflict(self, tasks: List[Dict[str, Any]], conflict: Dict[str, Any]):
+    def _resolve_resource_conflict(self, tasks_by_id: Dict[int, Dict[str, Any]], conflict: Dict[str, Any]):
         """Resolve resource conflicts by rescheduling"""
-        task_ids = conflict['tasks']
         flexibility = conflict['flexibility']
         
         # Find the tasks involved
-        involved_tasks = [task for task in tasks if task['id'] in task_ids]
+        involved_tasks = [tasks_by_id[task_id] for task_id in conflict['tasks'] if task_id in tasks_by_id]
         
-        if len(involved_tasks) != 2:
+        if len(involved_tasks) < 2:
             return
         
-        # Reschedule the lower priority task
-        task1, task2 = involved_tasks
-        priority_order = {'Critical': 3, 'High': 2, 'Medium': 1, 'Low': 0}
+        # Keep the highest priority tasks that fit within capacity, reschedule the rest
+        involved_tasks.sort(key=lambda task: BATCH_PRIORITY_WEIGHTS.get(priority_key(task['priority']), 0),
+                            reverse=True)
         
-        if priority_order.get(task1['priority'], 0) >= priority_order.get(task2['priority'], 0):
-            task_to_reschedule = task2
-        else:
-            task_to_reschedule = task1
+        demands = conflict.get('demands', {})
+        capacity = conflict.get('capacity', 1)
+        load = 0.0
         
-        # Reschedule by adding flexibility minutes
-        current_due = datetime.fromisoformat(task_to_reschedule['due_date'])
-        new_due = current_due + timedelta(minutes=flexibility)
-        task_to_reschedule['due_date'] = new_due.isoformat()
+        for task_to_reschedule in involved_tasks:
+            demand = demands.get(task_to_reschedule['id'], 1.0)
+            if load + demand <= capacity + 1e-9:
+                load += demand
+                continue
         
-        logger.info("Rescheduled task %s by %s minutes", task_to_reschedule['title'], flexibility)
+            # Reschedule by adding flexibility minutes
+            current_due = datetime.fromisoformat(task_to_reschedule['due_date'])
+            new_due = current_due + timedelta(minutes=flexibility)
+            task_to_reschedule['due_date'] = new_due.isoformat()
     
-    def _resolve_space_conflict(self, tasks: List[Dict[str, Any]], conflict: Dict[str, Any]):
+            logger.info("Rescheduled task %s by %s minutes", task_to_reschedule['title'], flexibility)
+    
+    def _resolve_space_conflict(self, tasks_by_id: Dict[int, Dict[str, Any]], conflict: Dict[str, Any]):
         """Resolve space/location conflicts"""
-        task_ids = conflict['tasks']
         travel_time = conflict['travel_time_needed']
         
-        involved_tasks = [task for task in tasks if task['id'] in task_ids]
+        involved_tasks = [tasks_by_id[task_id] for task_id in conflict['tasks'] if task_id in tasks_by_id]
         if len(involved_tasks) == 2:
             # Add travel time to the second task
             second_task = involved_tasks[1]
@@ -347,46 +790,162 @@ class MultiGardenTaskCoordinator:
             second_task['due_date'] = new_due.isoformat()
     
     def _create_task_batches(self, tasks: List[Dict[str, Any]], task_resources: Dict[int, List[ResourceRequirement]]) -> List[TaskBatch]:
-        """Create optimal batches of tasks that can be executed together"""
+        """Create optimal batches of tasks that can be executed together
+        
+        Seeds are taken from a priority heap (highest priority, latest due date
+        first). Compatible candidates are looked up in buckets keyed by location
+        and resource type, narrowed to the time window by binary search, and
+        scored in one vectorized pass.
+        """
+        if not tasks:
+            return []
+        
+        index = self._build_batching_index(tasks, task_resources)
+        assigned = np.zeros(len(tasks), dtype=bool)
+        
+        seed_heap = [(-index['priority'][i], -index['due_minutes'][i], i) for i in range(len(tasks))]
+        heapq.heapify(seed_heap)
+        
         batches = []
-        remaining_tasks = tasks.copy()
-        
-        while remaining_tasks:
-            # Find the best batch starting with the highest priority task
-            remaining_tasks.sort(key=lambda x: (
-                {'Critical': 3, 'High': 2, 'Medium': 1, 'Low': 0}.get(x['priority'], 0),
-                datetime.fromisoformat(x['due_date'])
-            ), reverse=True)
-            
-            seed_task = remaining_tasks[0]
-            batch_tasks = [seed_task]
-            remaining_tasks.remove(seed_task)
-            
-            # Find compatible tasks to add to the batch
-            compatible_tasks = []
-            for task in remaining_tasks[:]:
-                if self._are_tasks_batchable(seed_task, task, task_resources):
-                    compatible_tasks.append(task)
-            
-            # Add most compatible tasks to batch (up to reasonable limit)
-            compatibility_scores = []
-            for task in compatible_tasks:
-                score = self._calculate_compatibility_score(seed_task, task, task_resources)
-                compatibility_scores.append((score, task))
+        assigned_count = 0
+        next_compaction = len(tasks) // 2
+        while seed_heap:
+            seed = heapq.heappop(seed_heap)[2]
+            if assigned[seed]:
+                continue
+            assigned[seed] = True
+        
+            # Keep bucket scans proportional to the tasks still unassigned
+            if assigned_count >= next_compaction:
+                self._compact_buckets(index, assigned)
+                next_compaction = assigned_count + (len(tasks) - assigned_count) // 2
             
-            compatibility_scores.sort(reverse=True)
+            # Find compatible tasks and add the top scoring ones (4 + seed = 5 max)
+            candidates = self._find_batch_candidates(index, seed, assigned)
+            batch_indices = [seed]
+            if len(candidates):
+                scores = self._compatibility_scores(index, seed, candidates)
+                best = np.lexsort((index['seed_rank'][candidates], -scores))[:MAX_BATCH_SIZE - 1]
+                chosen = candidates[best]
+                assigned[chosen] = True
+                batch_indices.extend(int(i) for i in chosen)
+            assigned_count += len(batch_indices)
             
-            # Add top compatible tasks to batch (max 5 tasks per batch)
-            for score, task in compatibility_scores[:4]:  # 4 + seed = 5 max
-                batch_tasks.append(task)
-                remaining_tasks.remove(task)
-            
-            # Create batch object
-            batch = self._create_batch_object(batch_tasks, task_resources)
-            batches.append(batch)
+            batch_tasks = [tasks[i] for i in batch_indices]
+            earliest_due = min(index['due_datetimes'][i] for i in batch_indices)
+            batches.append(self._create_batch_object(batch_tasks, task_resources, earliest_due))
         
         return batches
     
+    def _build_batching_index(self, tasks: List[Dict[str, Any]],
+                              task_resources: Dict[int, List[ResourceRequirement]]) -> Dict[str, Any]:
+        """Pre-parse task attributes into arrays and bucket tasks by location and resource"""
+        resource_bits = {resource_type: 1 << bit for bit, resource_type in enumerate(ResourceType)}
+        location_codes: Dict[Any, int] = {}
+        garden_codes: Dict[Any, int] = {}
+        type_codes: Dict[Any, int] = {}
+        
+        due_datetimes = [datetime.fromisoformat(task['due_date']) for task in tasks]
+        due_minutes = np.array([(due - _EPOCH).total_seconds() / 60 for due in due_datetimes])
+        priority = np.array([BATCH_PRIORITY_WEIGHTS.get(priority_key(task['priority']), 0) for task in tasks])
+        location = np.array([location_codes.setdefault(task['location'], len(location_codes)) for task in tasks])
+        garden = np.array([garden_codes.setdefault(task['garden_id'], len(garden_codes)) for task in tasks])
+        task_type = np.array([type_codes.setdefault(task['task_type'], len(type_codes)) for task in tasks])
+        resource_mask = np.array([
+            sum({resource_bits[req.resource_type] for req in task_resources.get(task['id'], [])})
+            for task in tasks
+        ], dtype=np.int64)
+        
+        # Pairwise task type bonus lookup
+        type_affinity = np.zeros((len(type_codes), len(type_codes)))
+        for (type_a, type_b), bonus in TASK_TYPE_AFFINITY.items():
+            if type_a in type_codes and type_b in type_codes:
+                type_affinity[type_codes[type_a], type_codes[type_b]] = bonus
+                type_affinity[type_codes[type_b], type_codes[type_a]] = bonus
+        
+        # Number of shared resource types for any pair of masks
+        shared_count = np.array([bin(mask).count('1') for mask in range(1 << len(ResourceType))])
+        
+        # Position of each task in seed order, used to break score ties
+        seed_order = np.lexsort((np.arange(len(tasks)), -due_minutes, -priority))
+        seed_rank = np.empty(len(tasks), dtype=np.int64)
+        seed_rank[seed_order] = np.arange(len(tasks))
+        
+        # Buckets of task indices sorted by due time, per (location, resource) and per resource
+        bucket_members = defaultdict(list)
+        for i in np.argsort(due_minutes, kind='stable'):
+            for resource_type, bit in resource_bits.items():
+                if resource_mask[i] & bit:
+                    bucket_members[(location[i], bit)].append(i)
+                    bucket_members[(None, bit)].append(i)
+        
+        buckets = {}
+        for key, members in bucket_members.items():
+            members = np.array(members, dtype=np.int64)
+            buckets[key] = (members, due_minutes[members])
+        
+        has_location = np.array([task['location'] is not None for task in tasks])
+        
+        return {
+            'due_datetimes': due_datetimes,
+            'due_minutes': due_minutes,
+            'priority': priority,
+            'location': location,
+            'has_location': has_location,
+            'garden': garden,
+            'task_type': task_type,
+            'resource_mask': resource_mask,
+            'resource_bits': resource_bits,
+            'type_affinity': type_affinity,
+            'shared_count': shared_count,
+            'seed_rank': seed_rank,
+            'buckets': buckets
+        }
+    
+    def _find_batch_candidates(self, index: Dict[str, Any], seed: int, assigned: np.ndarray) -> np.ndarray:
+        """Get unassigned tasks that can be batched with the seed task"""
+        seed_time = index['due_minutes'][seed]
+        location_key = index['location'][seed] if index['has_location'][seed] else None
+        
+        parts = []
+        for bit in index['resource_bits'].values():
+            if not index['resource_mask'][seed] & bit:
+                continue
+            bucket = index['buckets'].get((location_key, bit))
+            if bucket is None:
+                continue
+            members, times = bucket
+            lo = np.searchsorted(times, seed_time - BATCH_WINDOW_MINUTES, side='left')
+            hi = np.searchsorted(times, seed_time + BATCH_WINDOW_MINUTES, side='right')
+            window = members[lo:hi]
+            parts.append(window[~assigned[window]])
+        
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        if len(parts) == 1:
+            return parts[0]
+        return np.unique(np.concatenate(parts))
+    
+    def _compact_buckets(self, index: Dict[str, Any], assigned: np.ndarray):
+        """Drop already batched tasks from the candidate buckets"""
+        for key, (members, times) in index['buckets'].items():
+            keep = ~assigned[members]
+            index['buckets'][key] = (members[keep], times[keep])
+    
+    def _compatibility_scores(self, index: Dict[str, Any], seed: int, candidates: np.ndarray) -> np.ndarray:
+        """Vectorized _calculate_compatibility_score of the seed against many candidates"""
+        scores = np.where(index['garden'][candidates] == index['garden'][seed], 10.0, 0.0)
+        scores += np.where(index['location'][candidates] == index['location'][seed], 5.0, 0.0)
+        
+        shared = index['resource_mask'][candidates] & index['resource_mask'][seed]
+        scores += index['shared_count'][shared] * 2.0
+        
+        time_diff = np.abs(index['due_minutes'][candidates] - index['due_minutes'][seed])
+        scores += np.maximum(0.0, 60 - time_diff) * 0.1
+        
+        scores += index['type_affinity'][index['task_type'][seed], index['task_type'][candidates]]
+        return scores
+    
     def _are_tasks_batchable(self, task1: Dict[str, Any], task2: Dict[str, Any],
                            task_resources: Dict[int, List[ResourceRequirement]]) -> bool:
         """Check if two tasks can be batched together"""
@@ -409,7 +968,7 @@ class MultiGardenTaskCoordinator:
         time_diff = abs((time2 - time1).total_seconds() / 60)
         
         # Tasks should be within 2 hours of each other
-        if time_diff > 120:
+        if time_diff > BATCH_WINDOW_MINUTES:
             return False
         
         return True
@@ -440,22 +999,17 @@ class MultiGardenTaskCoordinator:
         score += max(0, 60 - time_diff) * 0.1  # Closer times get higher scores
         
         # Task type compatibility
-        compatible_types = {
-            ('feeding', 'monitoring'): 3.0,
-            ('pruning', 'training'): 4.0,
-            ('watering', 'monitoring'): 2.0
-        }
-        
         type_pair = (task1['task_type'], task2['task_type'])
-        if type_pair in compatible_types:
-            score += compatible_types[type_pair]
-        elif (type_pair[1], type_pair[0]) in compatible_types:
-            score += compatible_types[(type_pair[1], type_pair[0])]
+        if type_pair in TASK_TYPE_AFFINITY:
+            score += TASK_TYPE_AFFINITY[type_pair]
+        elif (type_pair[1], type_pair[0]) in TASK_TYPE_AFFINITY:
+            score += TASK_TYPE_AFFINITY[(type_pair[1], type_pair[0])]
         
         return score
     
     def _create_batch_object(self, tasks: List[Dict[str, Any]], 
-                           task_resources: Dict[int, List[ResourceRequirement]]) -> TaskBatch:
+                           task_resources: Dict[int, List[ResourceRequirement]],
+                           earliest_due: Optional[datetime] = None) -> TaskBatch:
         """Create a TaskBatch object from a list of tasks"""
         
         total_duration = sum(task['estimated_duration'] for task in tasks)
@@ -469,7 +1023,8 @@ class MultiGardenTaskCoordinator:
         shared_resources = list(all_resource_types)
         
         # Calculate optimal start time (earliest due date)
-        earliest_due = min(datetime.fromisoformat(task['due_date']) for task in tasks)
+        if earliest_due is None:
+            earliest_due = min(datetime.fromisoformat(task['due_date']) for task in tasks)
         
         # Calculate efficiency score
         efficiency_score = self._calculate_batch_efficiency(tasks, shared_resources, total_duration)
@@ -508,37 +1063,57 @@ class MultiGardenTaskCoordinator:
         return max(0.0, min(100.0, efficiency))
     
     def _optimize_execution_order(self, batches: List[TaskBatch]) -> List[Dict[str, Any]]:
-        """Optimize the execution order of task batches"""
+        """Optimize the execution order of task batches
+        
+        Batches become route stops at their main location. A batch may start
+        from the start of the working day and should start before its earliest
+        due time plus the tightest timing flexibility of its tasks. The route
+        planner orders them to cut walking between locations while keeping
+        urgent batches on time; ties fall back to efficiency and urgency.
+        """
+        if not batches:
+            return []
         
-        # Sort batches by efficiency and urgency
-        batch_priorities = []
+        priority_scores = {'critical': 100, 'high': 75, 'medium': 50, 'low': 25}
+        work_start = min(batch.optimal_start_time for batch in batches).replace(hour=8, minute=0, second=0,
+                                                                                   microsecond=0)
         
+        # Sort batches by efficiency and urgency first, so equal routes keep that order
+        batch_priorities = []
         for i, batch in enumerate(batches):
-            urgency_score = 0
-            for task in batch.tasks:
-                priority_scores = {'Critical': 100, 'High': 75, 'Medium': 50, 'Low': 25}
-                urgency_score += priority_scores.get(task['priority'], 25)
-            
+            urgency_score = sum(priority_scores.get(priority_key(task['priority']), 25) for task in batch.tasks)
             urgency_score /= len(batch.tasks)  # Average urgency
             
             combined_score = batch.efficiency_score * 0.6 + urgency_score * 0.4
-            batch_priorities.append((combined_score, i, batch))
+            batch_priorities.append((combined_score, i, batch, urgency_score))
+        batch_priorities.sort(key=lambda item: (item[0], item[1]), reverse=True)
+        
+        stops = []
+        for combined_score, original_index, batch, urgency_score in batch_priorities:
+            stops.append({
+                'location': self._get_batch_location(batch),
+                'duration': batch.total_duration,
+                'open': work_start,
+                'close': batch.optimal_start_time + timedelta(minutes=self._get_batch_flexibility(batch)),
+                'weight': urgency_score / 100.0
+            })
         
-        # Sort by combined score
-        batch_priorities.sort(reverse=True)
+        route = self.route_planner.plan(stops, work_start)
         
         # Create optimized batch list
         optimized_batches = []
-        current_time = datetime.now().replace(hour=8, minute=0, second=0, microsecond=0)  # Start at 8 AM
-        
-        for score, original_index, batch in batch_priorities:
+        for position, stop_index in enumerate(route['order']):
+            combined_score, original_index, batch, urgency_score = batch_priorities[stop_index]
+            start_time = route['start_times'][position]
             batch_info = {
                 'id': original_index,
                 'tasks': batch.tasks,
                 'total_duration_minutes': batch.total_duration,
                 'shared_resources': [r.value for r in batch.shared_resources],
-                'optimal_start_time': current_time.isoformat(),
-                'estimated_end_time': (current_time + timedelta(minutes=batch.total_duration)).isoformat(),
+                'location': stops[stop_index]['location'],
+                'travel_minutes': round(route['travel_minutes'][position], 1),
+                'optimal_start_time': start_time.isoformat(),
+                'estimated_end_time': (start_time + timedelta(minutes=batch.total_duration)).isoformat(),
                 'efficiency_score': batch.efficiency_score,
                 'task_count': len(batch.tasks),
                 'gardens_involved': list({task['garden_id'] for task in batch.tasks})
@@ -546,37 +1121,61 @@ class MultiGardenTaskCoordinator:
             
             optimized_batches.append(batch_info)
             
-            # Add buffer time between batches
-            current_time += timedelta(minutes=batch.total_duration + 15)
-        
         return optimized_batches
+        
+    def _get_batch_location(self, batch: TaskBatch) -> Optional[str]:
+        """Get where most of a batch's tasks take place"""
+        locations = [task['location'] for task in batch.tasks if task.get('location')]
+        if not locations:
+            return None
+        return max(set(locations), key=locations.count)
+    
+    def _get_batch_flexibility(self, batch: TaskBatch) -> int:
+        """Get how many minutes after its earliest due time a batch may still start"""
+        task_resources = self._analyze_resource_requirements(batch.tasks)
+        flexibility = [req.flexibility_minutes
+                       for requirements in task_resources.values()
+                       for req in requirements if req.resource_type == ResourceType.TIME]
+        return min(flexibility) if flexibility else 60
     
     def _identify_sharing_opportunities(self, batches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Identify opportunities for resource sharing between batches"""
-        sharing_opportunities = []
+        """Identify opportunities for resource sharing between batches
         
-        for i, batch1 in enumerate(batches):
-            for j, batch2 in enumerate(batches[i+1:], i+1):
+        Batch start times are sorted once, so each batch only inspects the
+        batches starting within an hour after it ends.
+        """
+        sharing_opportunities = []
+        if not batches:
+            return sharing_opportunities
+        
+        resource_bits = {resource_type.value: 1 << bit for bit, resource_type in enumerate(ResourceType)}
+        masks = np.array([sum(resource_bits[r] for r in set(batch['shared_resources'])) for batch in batches],
+                         dtype=np.int64)
+        starts = np.array([(datetime.fromisoformat(batch['optimal_start_time']) - _EPOCH).total_seconds() / 60
+                           for batch in batches])
+        ends = np.array([(datetime.fromisoformat(batch['estimated_end_time']) - _EPOCH).total_seconds() / 60
+                         for batch in batches])
                 
-                # Check for resource overlap
-                resources1 = set(batch1['shared_resources'])
-                resources2 = set(batch2['shared_resources'])
-                shared = resources1 & resources2
+        start_order = np.argsort(starts, kind='stable')
+        sorted_starts = starts[start_order]
                 
-                if shared:
-                    # Calculate potential savings
-                    time_gap = (datetime.fromisoformat(batch2['optimal_start_time']) - 
-                               datetime.fromisoformat(batch1['estimated_end_time'])).total_seconds() / 60
+        for i in range(len(batches)):
+            # Within 1 hour after the batch ends - good for sharing
+            lo = np.searchsorted(sorted_starts, ends[i], side='right')
+            hi = np.searchsorted(sorted_starts, ends[i] + 60, side='left')
+            following = start_order[lo:hi]
+            following = np.sort(following[(following > i) & ((masks[following] & masks[i]) != 0)])
                     
-                    if 0 < time_gap < 60:  # Within 1 hour - good for sharing
-                        opportunity = {
-                            'batch_1': i,
-                            'batch_2': j,
-                            'shared_resources': list(shared),
-                            'potential_time_savings': min(5 * len(shared), 30),  # Up to 30 minutes
-                            'setup_reduction': True
-                        }
-                        sharing_opportunities.append(opportunity)
+            for j in following:
+                shared = [r for r, bit in resource_bits.items() if masks[i] & masks[j] & bit]
+                opportunity = {
+                    'batch_1': i,
+                    'batch_2': int(j),
+                    'shared_resources': shared,
+                    'potential_time_savings': min(5 * len(shared), 30),  # Up to 30 minutes
+                    'setup_reduction': True
+                }
+                sharing_opportunities.append(opportunity)
         
         return sharing_opportunities
     
@@ -613,27 +1212,21 @@ class MultiGardenTaskCoordinator:
             target_date = datetime.now()
         
         try:
-            coordination_result = self.coordinate_daily_tasks(target_date)
+            from .resource_scheduler import ResourceConstrainedScheduler
             
-            resource_usage = defaultdict(float)
-            resource_capacity = {
-                ResourceType.TIME.value: 480,  # 8 hours
-                ResourceType.NUTRIENTS.value: 100,
-                ResourceType.WATER.value: 500,
-                ResourceType.EQUIPMENT.value: 10
-            }
+            plan = self._get_current_plan(target_date)
+            if plan is None:
+                return {'error': 'Coordination failed'}
             
-            for batch in coordination_result.get('batches', []):
-                for resource in batch['shared_resources']:
-                    if resource == 'time':
-                        resource_usage[resource] += batch['total_duration_minutes']
-                    else:
-                        resource_usage[resource] += batch['task_count']  # Simplified
+            resource_usage = defaultdict(float)
+            for requirements in plan['resources'].values():
+                for resource_type, amount in ResourceConstrainedScheduler.daily_demand(requirements).items():
+                    resource_usage[resource_type] += amount
             
             utilization = {}
-            for resource, capacity in resource_capacity.items():
-                usage = resource_usage.get(resource, 0)
-                utilization[resource] = {
+            for resource_type, capacity in self._get_daily_capacity().items():
+                usage = resource_usage.get(resource_type, 0)
+                utilization[resource_type.value] = {
                     'usage': usage,
                     'capacity': capacity,
                     'percentage': round((usage / capacity) * 100, 1) if capacity > 0 else 0,
@@ -650,3 +1243,26 @@ class MultiGardenTaskCoordinator:
         except Exception as e:
             logger.error(f"Error calculating resource utilization: {e}")
             return {'error': str(e)}
+
+    def _get_utilization_recommendations(self, utilization: Dict[str, Dict[str, Any]]) -> List[str]:
+        """Suggest actions for over- and under-used resources"""
+        recommendations = []
+        for resource, data in utilization.items():
+            if data['percentage'] > 100:
+                recommendations.append(f"{resource.title()} is over capacity ({data['percentage']}%); "
+                                       f"use plan_horizon to spread tasks over the coming days")
+            elif data['percentage'] > 85:
+                recommendations.append(f"{resource.title()} is nearly fully booked ({data['percentage']}%)")
+        return recommendations
+    
+    def get_time_savings(self, target_date: datetime = None) -> int:
+        """Get the estimated minutes saved by batching on a date"""
+        return self.get_coordination(target_date).get('estimated_time_saved', 0)
+    
+    def get_crew_assignment(self, target_date: datetime = None) -> Dict[str, Any]:
+        """Get the per-worker timelines and makespan for a date"""
+        return self.get_coordination(target_date).get('crew_assignment', {})
+    
+    def get_sharing_opportunities(self, target_date: datetime = None) -> List[Dict[str, Any]]:
+        """Get the resource sharing opportunities between batches on a date"""
+        return self.get_coordination(target_date).get('sharing_opportunities', [])
@@ -0,0 +1,124 @@
+"""
+GrowMaster Pro - Notification De-duplication Store
+Keyed, expiring record of sent notifications with an in-memory mirror
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Notification history older than this is removed during compaction
+HISTORY_RETENTION_DAYS = 90
+
+class NotificationDedupeStore:
+    """One row per (notification type, entity, window) that expires after the window
+    
+    Lookups hit an in-memory mirror of the unexpired keys, so checking whether
+    a notification was already sent is a dictionary lookup. New keys are
+    written to the notification_dedupe table in batches by flush, and compact
+    drops expired keys and old notification history.
+    """
+    
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self.mirror: Dict[str, datetime] = {}  # dedupe key -> expires at
+        self.pending_rows: List[Tuple[Any, ...]] = []
+        self.lock = threading.Lock()
+        
+        self.load()
+    
+    @staticmethod
+    def make_key(notification_type: str, entity: Any, window_hours: float) -> str:
+        """Build the dedupe key for a notification type, entity and window"""
+        return f"{notification_type}:{entity}:{window_hours:g}h"
+    
+    def load(self):
+        """Fill the mirror with the unexpired keys from the database"""
+        now = datetime.now()
+        try:
+            with self.db_manager.get_connection() as conn:
+                rows = conn.execute("""
+                    SELECT dedupe_key, expires_at FROM notification_dedupe
+                    WHERE expires_at > ?
+                """, (now.isoformat(),)).fetchall()
+        except Exception as e:
+            logger.error(f"Error loading notification dedupe keys: {e}")
+            return
+        
+        with self.lock:
+            self.mirror = {key: datetime.fromisoformat(expires_at) for key, expires_at in rows}
+        logger.info(f"Loaded {len(rows)} notification dedupe keys")
+    
+    def seen(self, notification_type: str, entity: Any, window_hours: float, now: datetime = None) -> bool:
+        """Check whether this notification was already sent within its window"""
+        if now is None:
+            now = datetime.now()
+        expires_at = self.mirror.get(self.make_key(notification_type, entity, window_hours))
+        return expires_at is not None and expires_at > now
+    
+    def check_and_mark(self, notification_type: str, entity: Any, window_hours: float,
+                       now: datetime = None) -> bool:
+        """Record a notification unless it was already sent; True means go ahead and send"""
+        if now is None:
+            now = datetime.now()
+        key = self.make_key(notification_type, entity, window_hours)
+        
+        with self.lock:
+            expires_at = self.mirror.get(key)
+            if expires_at is not None and expires_at > now:
+                return False
+            
+            expires_at = now + timedelta(hours=window_hours)
+            self.mirror[key] = expires_at
+            self.pending_rows.append((key, notification_type, str(entity), window_hours,
+                                      now.isoformat(), expires_at.isoformat()))
+        return True
+    
+    def flush(self):
+        """Write keys recorded since the last flush in one batch"""
+        with self.lock:
+            rows, self.pending_rows = self.pending_rows, []
+        if not rows:
+            return
+        
+        try:
+            with self.db_manager.get_connection() as conn:
+                conn.executemany("""
+                    INSERT OR REPLACE INTO notification_dedupe
+                    (dedupe_key, notification_type, entity, window_hours, sent_at, expires_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, rows)
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error saving notification dedupe keys: {e}")
+    
+    def compact(self, now: datetime = None, history_retention_days: int = HISTORY_RETENTION_DAYS) -> Dict[str, int]:
+        """Drop expired keys (memory and table) and notification history and dead letters past retention"""
+        if now is None:
+            now = datetime.now()
+        self.flush()
+        
+        with self.lock:
+            expired = [key for key, expires_at in self.mirror.items() if expires_at <= now]
+            for key in expired:
+                del self.mirror[key]
+        
+        removed = {'mirror': len(expired), 'keys': 0, 'history': 0, 'dead_letters': 0}
+        try:
+            with self.db_manager.get_connection() as conn:
+                removed['keys'] = conn.execute("DELETE FROM notification_dedupe WHERE expires_at <= ?",
+                                               (now.isoformat(),)).rowcount
+                cutoff = (now - timedelta(days=history_retention_days)).strftime('%Y-%m-%d %H:%M:%S')
+                removed['history'] = conn.execute("DELETE FROM notification_history WHERE sent_date < ?",
+                                                  (cutoff,)).rowcount
+                removed['dead_letters'] = conn.execute("DELETE FROM notification_dead_letters WHERE failed_at < ?",
+                                                       ((now - timedelta(days=history_retention_days)).isoformat(),)).rowcount
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error compacting notification history: {e}")
+        
+        logger.info(f"Compacted notifications: {removed}")
+        return removed
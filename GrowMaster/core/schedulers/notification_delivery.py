@@ -0,0 +1,308 @@
+"""
+GrowMaster Pro - Notification Delivery
+Pluggable delivery sinks served by per-sink worker pools with retries
+"""
+
+import abc
+import heapq
+import itertools
+import json
+import logging
+import threading
+import time
+import urllib.request
+from datetime import datetime
+from email.message import EmailMessage
+from email.utils import formatdate
+from pathlib import Path
+from typing import Dict, List, Any, Callable
+
+logger = logging.getLogger(__name__)
+
+# Sinks used when the notification_sinks setting is missing or invalid
+DEFAULT_SINKS = {'desktop': {}, 'log_file': {}}
+
+# Retry delays double from the base delay up to the cap
+RETRY_BASE_SECONDS = 2.0
+RETRY_MAX_SECONDS = 300.0
+
+def notification_payload(notification: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON-safe copy of a notification for sinks and dead-letter storage"""
+    def plain(value):
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return getattr(value, 'value', value)
+    
+    payload = {key: plain(value) for key, value in notification.items() if key not in ('items', 'queued_at')}
+    if notification.get('queued_at') is not None:
+        payload['queued_at'] = plain(notification['queued_at'])
+    if notification.get('items'):
+        payload['item_count'] = len(notification['items'])
+        payload['task_ids'] = [item.get('task_id') for item in notification['items'] if item.get('task_id')]
+    return payload
+
+class NotificationSink(abc.ABC):
+    """A delivery channel; deliver raises to ask for a retry"""
+    name = 'sink'
+    
+    def __init__(self, workers: int = 1, max_attempts: int = 5):
+        self.workers = workers
+        self.max_attempts = max_attempts
+    
+    @abc.abstractmethod
+    def deliver(self, notification: Dict[str, Any]):
+        """Deliver one notification"""
+
+class DesktopSink(NotificationSink):
+    """Desktop toast through the notification system's platform backend"""
+    name = 'desktop'
+    
+    def __init__(self, show: Callable[[Dict[str, Any]], None], workers: int = 1, max_attempts: int = 3):
+        super().__init__(workers, max_attempts)
+        self.show = show
+    
+    def deliver(self, notification: Dict[str, Any]):
+        self.show(notification)
+
+class LogFileSink(NotificationSink):
+    """Append each notification to a JSON-lines file"""
+    name = 'log_file'
+    
+    def __init__(self, path: str, workers: int = 1, max_attempts: int = 5):
+        super().__init__(workers, max_attempts)
+        self.path = Path(path)
+        self.lock = threading.Lock()
+    
+    def deliver(self, notification: Dict[str, Any]):
+        line = json.dumps({'delivered_at': datetime.now().isoformat(), **notification_payload(notification)},
+                          ensure_ascii=False)
+        with self.lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as log_file:
+                log_file.write(line + '\n')
+
+class WebhookSink(NotificationSink):
+    """POST the notification as JSON to a (local) webhook URL"""
+    name = 'webhook'
+    
+    def __init__(self, url: str, timeout_seconds: float = 5.0, workers: int = 4, max_attempts: int = 5):
+        super().__init__(workers, max_attempts)
+        self.url = url
+        self.timeout_seconds = timeout_seconds
+    
+    def deliver(self, notification: Dict[str, Any]):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(notification_payload(notification)).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout_seconds) as response:
+            if response.status >= 300:
+                raise IOError(f"Webhook answered HTTP {response.status}")
+
+class EmailFileSink(NotificationSink):
+    """Write each notification as an .eml message into an outbox directory"""
+    name = 'email_file'
+    
+    def __init__(self, directory: str, recipient: str = 'grower@localhost',
+                 sender: str = 'growmaster@localhost', workers: int = 2, max_attempts: int = 5):
+        super().__init__(workers, max_attempts)
+        self.directory = Path(directory)
+        self.recipient = recipient
+        self.sender = sender
+        self.sequence = itertools.count()
+    
+    def deliver(self, notification: Dict[str, Any]):
+        message = EmailMessage()
+        message['Subject'] = notification['title']
+        message['From'] = self.sender
+        message['To'] = self.recipient
+        message['Date'] = formatdate(localtime=True)
+        message.set_content(notification['message'])
+        
+        self.directory.mkdir(parents=True, exist_ok=True)
+        file_name = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{next(self.sequence)}.eml"
+        (self.directory / file_name).write_bytes(bytes(message))
+
+def load_sinks(db_manager, show_desktop: Callable[[Dict[str, Any]], None]) -> List[NotificationSink]:
+    """Build the sinks listed in the notification_sinks setting
+    
+    Relative paths are resolved next to the database file.
+    """
+    config = DEFAULT_SINKS
+    try:
+        with db_manager.get_connection() as conn:
+            row = conn.execute("SELECT setting_value FROM user_settings WHERE setting_name = 'notification_sinks'").fetchone()
+        if row and row[0]:
+            config = json.loads(row[0])
+    except Exception as e:
+        logger.warning(f"Could not load notification sinks, using defaults: {e}")
+    
+    base_dir = Path(getattr(db_manager, 'db_path', '.')).parent
+    def resolve(path: str) -> Path:
+        return Path(path) if Path(path).is_absolute() else base_dir / path
+    
+    sinks = []
+    for name, options in config.items():
+        options = options or {}
+        try:
+            if name == 'desktop':
+                sinks.append(DesktopSink(show_desktop))
+            elif name == 'log_file':
+                sinks.append(LogFileSink(resolve(options.get('path', 'notifications.log'))))
+            elif name == 'webhook':
+                sinks.append(WebhookSink(options['url'], options.get('timeout_seconds', 5.0),
+                                         options.get('workers', 4)))
+            elif name == 'email_file':
+                sinks.append(EmailFileSink(resolve(options.get('directory', 'outbox')),
+                                           options.get('to', 'grower@localhost')))
+            else:
+                logger.warning(f"Unknown notification sink: {name}")
+        except Exception as e:
+            logger.error(f"Error configuring notification sink {name}: {e}")
+    
+    return sinks
+
+class _SinkPool:
+    """Worker threads delivering one sink's jobs, with jobs held back until their retry time"""
+    
+    def __init__(self, sink: NotificationSink, dispatcher: 'NotificationDispatcher'):
+        self.sink = sink
+        self.dispatcher = dispatcher
+        self.jobs = []  # (due monotonic time, sequence, notification, attempt)
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.running = False
+        self.threads: List[threading.Thread] = []
+        self.delivered = 0
+        self.retried = 0
+    
+    def start(self):
+        self.running = True
+        self.threads = [threading.Thread(target=self._work, name=f"notify-{self.sink.name}-{i}", daemon=True)
+                        for i in range(max(1, self.sink.workers))]
+        for thread in self.threads:
+            thread.start()
+    
+    def stop(self, timeout: float) -> List[tuple]:
+        """Stop the workers and hand back the jobs that were not delivered"""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        for thread in self.threads:
+            thread.join(timeout=timeout)
+        with self.condition:
+            remaining, self.jobs = self.jobs, []
+        return [(notification, attempt) for _, _, notification, attempt in remaining]
+    
+    def put(self, notification: Dict[str, Any], attempt: int = 0, delay: float = 0.0):
+        with self.condition:
+            heapq.heappush(self.jobs, (time.monotonic() + delay, next(self.sequence), notification, attempt))
+            self.condition.notify()
+    
+    def _work(self):
+        while True:
+            with self.condition:
+                while self.running and (not self.jobs or self.jobs[0][0] > time.monotonic()):
+                    self.condition.wait(self.jobs[0][0] - time.monotonic() if self.jobs else None)
+                if not self.running:
+                    return
+                _, _, notification, attempt = heapq.heappop(self.jobs)
+            
+            try:
+                self.sink.deliver(notification)
+                with self.condition:
+                    self.delivered += 1
+            except Exception as e:
+                attempt += 1
+                if attempt >= self.sink.max_attempts:
+                    self.dispatcher.dead_letter(self.sink.name, notification, attempt, str(e))
+                else:
+                    delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+                    logger.warning(f"Delivery to {self.sink.name} failed ({e}), retrying in {delay:.0f}s")
+                    with self.condition:
+                        self.retried += 1
+                        self.put(notification, attempt, delay)
+
+class NotificationDispatcher:
+    """Fan notifications out to every sink without blocking the caller
+    
+    Each sink has its own worker pool, so a slow or failing sink only delays
+    its own deliveries. Failed deliveries are retried with exponential
+    backoff; after the sink's last attempt, or when the dispatcher stops with
+    jobs outstanding, the notification is stored as a dead letter.
+    """
+    
+    def __init__(self, db_manager, sinks: List[NotificationSink]):
+        self.db_manager = db_manager
+        self.pools = {sink.name: _SinkPool(sink, self) for sink in sinks}
+        self.started = False
+        self.lock = threading.Lock()
+        self.dead_letters = 0
+    
+    def add_sink(self, sink: NotificationSink):
+        """Register another sink (replacing one with the same name)"""
+        with self.lock:
+            previous = self.pools.get(sink.name)
+            pool = self.pools[sink.name] = _SinkPool(sink, self)
+            if self.started:
+                pool.start()
+        if previous is not None and previous.running:
+            for notification, attempt in previous.stop(timeout=5.0):
+                pool.put(notification, attempt)
+    
+    def start(self):
+        """Start every sink's workers"""
+        with self.lock:
+            if self.started:
+                return
+            for pool in self.pools.values():
+                pool.start()
+            self.started = True
+    
+    def stop(self, timeout: float = 5.0):
+        """Stop the workers; undelivered notifications become dead letters"""
+        with self.lock:
+            if not self.started:
+                return
+            self.started = False
+        for name, pool in self.pools.items():
+            for notification, attempt in pool.stop(timeout):
+                self.dead_letter(name, notification, attempt, 'dispatcher stopped before delivery')
+    
+    def submit(self, notification: Dict[str, Any]) -> bool:
+        """Queue a notification for every sink; False if there is no sink to take it"""
+        if not self.pools:
+            return False
+        self.start()
+        for pool in self.pools.values():
+            pool.put(notification)
+        return True
+    
+    def dead_letter(self, sink_name: str, notification: Dict[str, Any], attempts: int, error: str):
+        """Store a notification a sink could not deliver"""
+        with self.lock:
+            self.dead_letters += 1
+        logger.error(f"Giving up delivering '{notification.get('title')}' to {sink_name}: {error}")
+        try:
+            with self.db_manager.get_connection() as conn:
+                conn.execute("""
+                    INSERT INTO notification_dead_letters (sink, payload, attempts, last_error, failed_at)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (sink_name, json.dumps(notification_payload(notification), ensure_ascii=False),
+                      attempts, error, datetime.now().isoformat()))
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error storing dead-letter notification: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Pending, delivered and retried counts per sink"""
+        sinks = {}
+        for name, pool in self.pools.items():
+            with pool.condition:
+                sinks[name] = {'pending': len(pool.jobs), 'delivered': pool.delivered,
+                               'retried': pool.retried, 'workers': len(pool.threads)}
+        with self.lock:
+            dead_letters = self.dead_letters
+        return {'sinks': sinks, 'dead_letters': dead_letters}
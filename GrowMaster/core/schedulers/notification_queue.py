@@ -0,0 +1,194 @@
+"""
+GrowMaster Pro - Notification Queue
+Bounded priority queue of pending notifications with per-channel rate limits
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Callable
+
+logger = logging.getLogger(__name__)
+
+# Queued notifications kept at most; the least urgent ones are dropped beyond this
+NOTIFICATION_QUEUE_LIMIT = 500
+
+# Sends allowed per minute and burst size for each delivery channel
+CHANNEL_RATE_LIMITS = {
+    'desktop': (5, 5)
+}
+DEFAULT_CHANNEL = 'desktop'
+
+# Lower rank is sent first among notifications released at the same time
+PRIORITY_RANK = {
+    'critical': 0,
+    'high': 1,
+    'medium': 2,
+    'low': 3
+}
+
+class TokenBucket:
+    """Token bucket allowing `burst` sends at once and `rate_per_minute` sustained"""
+    
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = datetime.now()
+    
+    def _refill(self, now: datetime):
+        elapsed = max(0.0, (now - self.updated_at).total_seconds())
+        self.tokens = min(float(self.burst), self.tokens + elapsed * self.rate_per_second)
+        self.updated_at = now
+    
+    def try_take(self, now: datetime) -> bool:
+        """Take a token if one is available"""
+        self._refill(now)
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+    
+    def next_token_at(self, now: datetime) -> datetime:
+        """When the next token becomes available"""
+        self._refill(now)
+        if self.tokens >= 1.0 or self.rate_per_second <= 0:
+            return now
+        return now + timedelta(seconds=(1.0 - self.tokens) / self.rate_per_second)
+
+class NotificationQueue:
+    """Heap of notifications ordered by (release time, priority)
+    
+    Notifications deferred by quiet hours share the quiet-hours end as their
+    release time, so the worker wakes once for all of them. Each channel has a
+    token bucket; a notification that finds its channel empty is pushed back
+    to the time the next token arrives. Notifications pushed with the same
+    group key share one queue slot until it is released. The queue is bounded,
+    and overflow drops the least urgent slot and counts its notifications by type.
+    """
+    
+    def __init__(self, max_size: int = NOTIFICATION_QUEUE_LIMIT,
+                 rate_limits: Optional[Dict[str, tuple]] = None):
+        self.max_size = max_size
+        self.rate_limits = dict(CHANNEL_RATE_LIMITS if rate_limits is None else rate_limits)
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.heap = []  # (release_at, rank, sequence, notification, group_key)
+        self.groups: Dict[Any, List[Dict[str, Any]]] = {}  # group key -> notifications sharing a slot
+        self.sequence = itertools.count()
+        self.overflow_counts: Dict[str, int] = {}
+        self.lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self.heap)
+    
+    @staticmethod
+    def _rank(notification: Dict[str, Any]) -> int:
+        priority = notification.get('priority')
+        return PRIORITY_RANK.get(getattr(priority, 'value', priority), PRIORITY_RANK['medium'])
+    
+    @staticmethod
+    def _type_name(notification: Dict[str, Any]) -> str:
+        notification_type = notification.get('type')
+        return str(getattr(notification_type, 'value', notification_type))
+    
+    def _bucket(self, channel: str) -> TokenBucket:
+        if channel not in self.buckets:
+            rate, burst = self.rate_limits.get(channel, self.rate_limits.get(DEFAULT_CHANNEL, (5, 5)))
+            self.buckets[channel] = TokenBucket(rate, burst)
+        return self.buckets[channel]
+    
+    def push(self, notification: Dict[str, Any], release_at: datetime = None, group_key: Any = None) -> bool:
+        """Queue a notification; False if it was dropped because the queue is full"""
+        if release_at is None:
+            release_at = datetime.now()
+        entry = (release_at, self._rank(notification), next(self.sequence), notification, group_key)
+        
+        with self.lock:
+            if group_key is not None and group_key in self.groups:
+                self.groups[group_key].append(notification)
+                return True
+            
+            if len(self.heap) < self.max_size:
+                heapq.heappush(self.heap, entry)
+                if group_key is not None:
+                    self.groups[group_key] = [notification]
+                return True
+            
+            # Full: drop whichever is least urgent, the newcomer or the worst queued item
+            def urgency(queued):
+                return queued[1], queued[0], queued[2]
+            worst = max(range(len(self.heap)), key=lambda i: urgency(self.heap[i]))
+            if urgency(self.heap[worst]) > urgency(entry):
+                worst_entry = self.heap[worst]
+                dropped = self.groups.pop(worst_entry[4], [worst_entry[3]])
+                self.heap[worst] = entry
+                heapq.heapify(self.heap)
+                if group_key is not None:
+                    self.groups[group_key] = [notification]
+                accepted = True
+            else:
+                dropped = [notification]
+                accepted = False
+            
+            for item in dropped:
+                type_name = self._type_name(item)
+                self.overflow_counts[type_name] = self.overflow_counts.get(type_name, 0) + 1
+        
+        logger.warning(f"Notification queue full, dropped {len(dropped)} {type_name} notification(s)")
+        return accepted
+    
+    def next_release_at(self) -> Optional[datetime]:
+        """Release time of the first queued notification"""
+        with self.lock:
+            return self.heap[0][0] if self.heap else None
+    
+    def ready(self, now: datetime = None) -> bool:
+        """Check whether a notification is due for release"""
+        release_at = self.next_release_at()
+        return release_at is not None and release_at <= (now or datetime.now())
+    
+    def pop_sendable(self, now: datetime = None,
+                     coalesce: Optional[Callable[[List[List[Dict[str, Any]]]], List[Dict[str, Any]]]] = None
+                     ) -> List[Dict[str, Any]]:
+        """Release due notifications that their channel's rate limit allows
+        
+        coalesce turns the released groups into notifications (e.g. one digest
+        per group) before rate limiting, so a merged notification costs one token.
+        Without it every grouped notification is released on its own.
+        """
+        if now is None:
+            now = datetime.now()
+        sendable = []
+        
+        with self.lock:
+            groups = []
+            while self.heap and self.heap[0][0] <= now:
+                _, _, _, notification, group_key = heapq.heappop(self.heap)
+                groups.append(self.groups.pop(group_key) if group_key is not None else [notification])
+            if coalesce is not None:
+                released = coalesce(groups)
+            else:
+                released = [notification for group in groups for notification in group]
+            
+            for notification in released:
+                bucket = self._bucket(notification.get('channel', DEFAULT_CHANNEL))
+                if bucket.try_take(now):
+                    sendable.append(notification)
+                else:
+                    heapq.heappush(self.heap, (bucket.next_token_at(now), self._rank(notification),
+                                               next(self.sequence), notification, None))
+        
+        return sendable
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth and overflow counts"""
+        with self.lock:
+            return {
+                'queued': len(self.heap) + sum(len(group) - 1 for group in self.groups.values()),
+                'slots': len(self.heap),
+                'max_size': self.max_size,
+                'next_release': self.heap[0][0].isoformat() if self.heap else None,
+                'dropped': dict(self.overflow_counts)
+            }
@@ -3,6 +3,9 @@ GrowMaster Pro - Basic Notification System
 Windows desktop notifications, task reminders, and alert management
 """
 
+import heapq
+import itertools
+import json
 import logging
 import platform
 import threading
@@ -12,8 +15,37 @@ from typing import Dict, List, Any, Optional, Callable
 from dataclasses import dataclass
 from enum import Enum
 
+from .notification_dedupe import NotificationDedupeStore
+from .notification_delivery import NotificationDispatcher, load_sinks
+from .notification_queue import NotificationQueue
+from .stage_timeline import StageTimelineStore
+
 logger = logging.getLogger(__name__)
 
+# Task timers are loaded this far ahead; a refill timer loads the next window
+TIMER_HORIZON_HOURS = 24
+
+# Overdue alerts repeat this often while a task stays open
+OVERDUE_REPEAT_HOURS = 4
+
+# A reminder is not repeated for the same task within this window
+REMINDER_DEDUPE_HOURS = 24
+
+# Checks that are not tied to a task's due time (growth milestones also wake
+# at the next stage transition when that comes sooner)
+PERIODIC_CHECK_MINUTES = {
+    'growth_milestones': 60,
+    'resource_alerts': 60,
+    'compaction': 360
+}
+
+# Task notifications of one garden, type and window are merged into a digest
+# once at least DIGEST_MIN_ITEMS of them are waiting together
+DIGEST_NOTIFICATION_TYPES = ('task_reminder', 'task_overdue')
+DIGEST_WINDOW_MINUTES = 60
+DIGEST_MIN_ITEMS = 3
+DIGEST_PREVIEW_ITEMS = 3
+
 class NotificationPriority(Enum):
     """Notification priority levels"""
     LOW = "low"
@@ -42,6 +74,7 @@ class NotificationPreferences:
     reminder_advance_minutes: int = 30
     quiet_hours_start: int = 22  # 10 PM
     quiet_hours_end: int = 7     # 7 AM
+    digest_mode: bool = True
 
 class BasicNotificationSystem:
     """Basic notification system for desktop alerts and task reminders"""
@@ -49,22 +82,38 @@ class BasicNotificationSystem:
     def __init__(self, db_manager):
         self.db_manager = db_manager
         self.preferences = self._load_preferences()
-        self.notification_queue = []
+        self.notification_queue = NotificationQueue()
         self.active_reminders = {}
         self.system_platform = platform.system()
         self.running = False
         self.notification_thread = None
         
+        # Timer heap of (fire_at, sequence, kind, task_id, version); stale task timers are skipped
+        self.timer_heap = []
+        self.timer_sequence = itertools.count()
+        self.task_timer_versions: Dict[int, int] = {}
+        self.wake_condition = threading.Condition()
+        self.pending_task_changes = []
+        
+        # Sent (type, task, window) keys so repeats are skipped without querying history
+        self.dedupe_store = NotificationDedupeStore(db_manager)
+        
+        # Precomputed stage transitions; milestones are read from the next-transition index
+        self.stage_timelines = StageTimelineStore(db_manager)
+        
         # Initialize platform-specific notification system
         self._initialize_notification_backend()
         
+        # Delivery runs on per-sink worker threads so a slow sink never stalls the checks
+        self.dispatcher = NotificationDispatcher(db_manager, load_sinks(db_manager, self._show_desktop_notification))
+    
     def _load_preferences(self) -> NotificationPreferences:
         """Load user notification preferences from database"""
         try:
             with self.db_manager.get_connection() as conn:
                 cursor = conn.execute("""
-                    SELECT setting_key, setting_value FROM user_settings 
-                    WHERE setting_key LIKE 'notification_%'
+                    SELECT setting_name, setting_value FROM user_settings 
+                    WHERE setting_name LIKE 'notification_%'
                 """)
                 
                 settings = dict(cursor.fetchall())
@@ -78,7 +127,8 @@ class BasicNotificationSystem:
                     sound_enabled=settings.get('notification_sound', 'true').lower() == 'true',
                     reminder_advance_minutes=int(settings.get('notification_advance', '30')),
                     quiet_hours_start=int(settings.get('notification_quiet_start', '22')),
-                    quiet_hours_end=int(settings.get('notification_quiet_end', '7'))
+                    quiet_hours_end=int(settings.get('notification_quiet_end', '7')),
+                    digest_mode=settings.get('notification_digest', 'true').lower() == 'true'
                 )
                 
         except Exception as e:
@@ -107,181 +157,294 @@ class BasicNotificationSystem:
             return
         
         self.running = True
+        if hasattr(self.db_manager, 'add_task_change_listener'):
+            self.db_manager.add_task_change_listener(self.on_task_changed)
         self.notification_thread = threading.Thread(target=self._notification_worker, daemon=True)
         self.notification_thread.start()
         logger.info("Notification service started")
     
     def stop_notification_service(self):
         """Stop the notification service"""
-        self.running = False
+        with self.wake_condition:
+            self.running = False
+            self.wake_condition.notify_all()
+        if hasattr(self.db_manager, 'remove_task_change_listener'):
+            self.db_manager.remove_task_change_listener(self.on_task_changed)
         if self.notification_thread:
             self.notification_thread.join(timeout=5)
+        self.dedupe_store.flush()
+        self.dispatcher.stop()
         logger.info("Notification service stopped")
     
+    def on_task_changed(self, change_type: str, task_id: Optional[int] = None):
+        """Wake the worker to re-time a changed task (registered with the database manager)"""
+        with self.wake_condition:
+            self.pending_task_changes.append((change_type, task_id))
+            self.wake_condition.notify()
+    
     def _notification_worker(self):
-        """Background worker for processing notifications"""
+        """Background worker that sleeps until the next timer is due or a task changes"""
+        self._schedule_all_timers()
+        
         while self.running:
             try:
-                # Check for task reminders
-                self._check_task_reminders()
+                with self.wake_condition:
+                    while (self.running and not self.pending_task_changes and
+                           not self._timer_due() and not self.notification_queue.ready()):
+                        self.wake_condition.wait(self._seconds_until_next_wake())
+                    changes, self.pending_task_changes = self.pending_task_changes, []
                 
-                # Check for overdue tasks
-                self._check_overdue_tasks()
+                if not self.running:
+                    break
                 
-                # Check for growth milestones
-                self._check_growth_milestones()
+                if changes:
+                    self._apply_task_changes(changes)
                 
-                # Check for resource alerts
-                self._check_resource_alerts()
+                self._fire_due_timers()
+                self.dedupe_store.flush()
                 
                 # Process notification queue
                 self._process_notification_queue()
                 
-                # Sleep for 1 minute before next check
-                time.sleep(60)
-                
             except Exception as e:
                 logger.error(f"Error in notification worker: {e}")
-                time.sleep(60)  # Continue after error
+                time.sleep(1)  # Continue after error
+    
+    def _push_timer(self, fire_at: datetime, kind: str, task_id: Optional[int] = None, version: int = 0):
+        """Add a timer to the heap"""
+        heapq.heappush(self.timer_heap, (fire_at, next(self.timer_sequence), kind, task_id, version))
+    
+    def _timer_due(self) -> bool:
+        """Check whether the earliest timer is due"""
+        return bool(self.timer_heap) and self.timer_heap[0][0] <= datetime.now()
+    
+    def _seconds_until_next_wake(self) -> Optional[float]:
+        """Seconds to sleep before the earliest timer or queued release, or None to wait for a change"""
+        wake_times = [self.timer_heap[0][0]] if self.timer_heap else []
+        release_at = self.notification_queue.next_release_at()
+        if release_at is not None:
+            wake_times.append(release_at)
+        if not wake_times:
+            return None
+        return max(0.0, (min(wake_times) - datetime.now()).total_seconds())
+    
+    def _schedule_all_timers(self):
+        """Rebuild the task timers from the database; periodic checks keep their deadlines"""
+        now = datetime.now()
+        self.timer_heap = [timer for timer in self.timer_heap if timer[2] in PERIODIC_CHECK_MINUTES]
+        heapq.heapify(self.timer_heap)
+        self.task_timer_versions.clear()
+        
+        # Only checks that were never scheduled (first start) run right away
+        scheduled = {timer[2] for timer in self.timer_heap}
+        for check in PERIODIC_CHECK_MINUTES:
+            if check not in scheduled:
+                self._push_timer(now, check)
+        
+        horizon = now + timedelta(hours=TIMER_HORIZON_HOURS)
+        self._push_timer(horizon, 'refill')
+        for task_id, due_date in self._load_open_tasks(due_before=horizon):
+            self._schedule_task_timers(task_id, due_date, now)
     
-    def _check_task_reminders(self):
-        """Check for tasks that need reminders"""
+    def _load_open_tasks(self, due_before: Optional[datetime] = None,
+                         task_ids: Optional[List[int]] = None) -> List[tuple]:
+        """Get (task id, due datetime) of incomplete tasks in active gardens"""
+        query = """
+            SELECT t.id, t.due_date FROM tasks t
+            JOIN gardens g ON t.garden_id = g.id
+            WHERE t.completed = 0 AND g.status = 'active'
+        """
+        params: List[Any] = []
+        if due_before is not None:
+            query += " AND datetime(t.due_date) <= datetime(?)"
+            params.append(due_before.isoformat())
+        if task_ids is not None:
+            query += f" AND t.id IN ({', '.join('?' for _ in task_ids)})"
+            params.extend(task_ids)
+        
+        try:
+            with self.db_manager.get_connection() as conn:
+                rows = conn.execute(query, params).fetchall()
+        except Exception as e:
+            logger.error(f"Error loading task timers: {e}")
+            return []
+        
+        tasks = []
+        for task_id, due_date in rows:
+            try:
+                tasks.append((task_id, datetime.fromisoformat(str(due_date))))
+            except ValueError:
+                logger.warning(f"Task {task_id} has an invalid due date: {due_date}")
+        return tasks
+    
+    def _schedule_task_timers(self, task_id: int, due_date: datetime, now: datetime):
+        """(Re)create the reminder and overdue timers of a task"""
+        version = self.task_timer_versions.get(task_id, 0) + 1
+        self.task_timer_versions[task_id] = version
+        
+        if due_date > now:
+            reminder_at = due_date - timedelta(minutes=self.preferences.reminder_advance_minutes)
+            self._push_timer(max(reminder_at, now), 'reminder', task_id, version)
+        self._push_timer(max(due_date, now), 'overdue', task_id, version)
+    
+    def _apply_task_changes(self, changes: List[tuple]):
+        """Re-time the tasks that changed since the worker last woke"""
+        if any(change_type in ('bulk', 'garden') or task_id is None for change_type, task_id in changes):
+            self._schedule_all_timers()
+            return
+        
+        now = datetime.now()
+        horizon = now + timedelta(hours=TIMER_HORIZON_HOURS)
+        changed_ids = []
+        for change_type, task_id in changes:
+            # Any change makes the task's existing timers stale
+            self.task_timer_versions[task_id] = self.task_timer_versions.get(task_id, 0) + 1
+            if change_type in ('created', 'updated', 'reopened'):
+                changed_ids.append(task_id)
+        
+        if changed_ids:
+            for task_id, due_date in self._load_open_tasks(due_before=horizon, task_ids=changed_ids):
+                self._schedule_task_timers(task_id, due_date, now)
+    
+    def _fire_due_timers(self):
+        """Pop every due timer and run it; task timers are verified in one query per kind"""
+        now = datetime.now()
+        due_tasks: Dict[str, List[int]] = {'reminder': [], 'overdue': []}
+        
+        while self.timer_heap and self.timer_heap[0][0] <= now:
+            fire_at, _, kind, task_id, version = heapq.heappop(self.timer_heap)
+            
+            if kind in due_tasks:
+                if self.task_timer_versions.get(task_id) == version:
+                    due_tasks[kind].append(task_id)
+            elif kind == 'refill':
+                self._schedule_all_timers()
+                return
+            elif kind == 'growth_milestones':
+                self._push_timer(self._check_growth_milestones(now), kind)
+            elif kind == 'resource_alerts':
+                self._check_resource_alerts()
+                self._push_timer(now + timedelta(minutes=PERIODIC_CHECK_MINUTES[kind]), kind)
+            elif kind == 'compaction':
+                self.dedupe_store.compact(now)
+                self._push_timer(now + timedelta(minutes=PERIODIC_CHECK_MINUTES[kind]), kind)
+        
+        if due_tasks['reminder']:
+            self._send_task_reminders(due_tasks['reminder'])
+        if due_tasks['overdue']:
+            self._send_overdue_alerts(due_tasks['overdue'])
+    
+    def _load_task_details(self, task_ids: List[int]) -> List[tuple]:
+        """Get notification details of incomplete tasks in active gardens"""
+        with self.db_manager.get_connection() as conn:
+            cursor = conn.execute(f"""
+                SELECT t.id, t.title, t.due_date, t.priority, t.task_type,
+                       g.name as garden_name, t.garden_id
+                FROM tasks t
+                JOIN gardens g ON t.garden_id = g.id
+                WHERE t.completed = 0 AND g.status = 'active'
+                AND t.id IN ({', '.join('?' for _ in task_ids)})
+            """, task_ids)
+            return cursor.fetchall()
+    
+    def _send_task_reminders(self, task_ids: List[int]):
+        """Queue reminders for tasks whose reminder time has come"""
         if not self.preferences.task_reminders:
             return
         
         try:
-            # Calculate reminder time window
-            now = datetime.now()
-            reminder_time = now + timedelta(minutes=self.preferences.reminder_advance_minutes)
+            for row in self._load_task_details(task_ids):
+                task_id, title, due_date, priority, task_type, garden_name, garden_id = row
+                if not self.dedupe_store.check_and_mark(NotificationType.TASK_REMINDER.value, task_id,
+                                                        REMINDER_DEDUPE_HOURS):
+                    continue
             
-            with self.db_manager.get_connection() as conn:
-                cursor = conn.execute("""
-                    SELECT t.id, t.title, t.due_date, t.priority, t.task_type,
-                           g.name as garden_name
-                    FROM tasks t
-                    JOIN gardens g ON t.garden_id = g.id
-                    WHERE t.is_completed = 0 
-                    AND datetime(t.due_date) <= datetime(?)
-                    AND datetime(t.due_date) > datetime(?)
-                    AND t.id NOT IN (SELECT task_id FROM notification_history 
-                                   WHERE notification_type = 'task_reminder' 
-                                   AND sent_date > datetime('now', '-1 day'))
-                """, (reminder_time.isoformat(), now.isoformat()))
-                
-                for row in cursor.fetchall():
-                    task_id, title, due_date, priority, task_type, garden_name = row
-                    
-                    self._queue_notification({
-                        'type': NotificationType.TASK_REMINDER,
-                        'priority': NotificationPriority.MEDIUM if priority == 'High' else NotificationPriority.LOW,
-                        'title': f"Task Reminder: {garden_name}",
-                        'message': f"{title} is due at {due_date}",
-                        'task_id': task_id,
-                        'garden_name': garden_name
-                    })
+                self._queue_notification({
+                    'type': NotificationType.TASK_REMINDER,
+                    'priority': (NotificationPriority.MEDIUM if str(priority).lower() in ('high', 'critical')
+                                 else NotificationPriority.LOW),
+                    'title': f"Task Reminder: {garden_name}",
+                    'message': f"{title} is due at {due_date}",
+                    'task_id': task_id,
+                    'garden_id': garden_id,
+                    'garden_name': garden_name
+                })
                     
         except Exception as e:
-            logger.error(f"Error checking task reminders: {e}")
+            logger.error(f"Error sending task reminders: {e}")
     
-    def _check_overdue_tasks(self):
-        """Check for overdue tasks"""
-        if not self.preferences.overdue_alerts:
-            return
+    def _send_overdue_alerts(self, task_ids: List[int]):
+        """Queue alerts for tasks that just became (or are still) overdue"""
+        now = datetime.now()
         
         try:
-            now = datetime.now()
+            for row in self._load_task_details(task_ids):
+                task_id, title, due_date, priority, task_type, garden_name, garden_id = row
             
-            with self.db_manager.get_connection() as conn:
-                cursor = conn.execute("""
-                    SELECT t.id, t.title, t.due_date, t.priority, 
-                           g.name as garden_name,
-                           (julianday('now') - julianday(t.due_date)) * 24 as hours_overdue
-                    FROM tasks t
-                    JOIN gardens g ON t.garden_id = g.id
-                    WHERE t.is_completed = 0 
-                    AND datetime(t.due_date) < datetime('now')
-                    AND t.id NOT IN (SELECT task_id FROM notification_history 
-                                   WHERE notification_type = 'task_overdue' 
-                                   AND sent_date > datetime('now', '-4 hours'))
-                """)
+                # Check again later while the task stays open
+                self._push_timer(now + timedelta(hours=OVERDUE_REPEAT_HOURS), 'overdue', task_id,
+                                 self.task_timer_versions.get(task_id, 0))
                 
-                for row in cursor.fetchall():
-                    task_id, title, due_date, priority, garden_name, hours_overdue = row
+                if (not self.preferences.overdue_alerts or
+                        not self.dedupe_store.check_and_mark(NotificationType.TASK_OVERDUE.value, task_id,
+                                                             OVERDUE_REPEAT_HOURS)):
+                    continue
                     
-                    # Determine notification priority based on how overdue
-                    if hours_overdue < 2:
-                        notif_priority = NotificationPriority.MEDIUM
-                    elif hours_overdue < 12:
-                        notif_priority = NotificationPriority.HIGH
-                    else:
-                        notif_priority = NotificationPriority.CRITICAL
+                hours_overdue = max(0.0, (now - datetime.fromisoformat(str(due_date))).total_seconds() / 3600)
                     
-                    hours_text = f"{int(hours_overdue)} hour(s)" if hours_overdue >= 1 else f"{int(hours_overdue * 60)} minute(s)"
+                # Determine notification priority based on how overdue
+                if hours_overdue < 2:
+                    notif_priority = NotificationPriority.MEDIUM
+                elif hours_overdue < 12:
+                    notif_priority = NotificationPriority.HIGH
+                else:
+                    notif_priority = NotificationPriority.CRITICAL
                     
-                    self._queue_notification({
-                        'type': NotificationType.TASK_OVERDUE,
-                        'priority': notif_priority,
-                        'title': f"⚠️ Overdue Task: {garden_name}",
-                        'message': f"{title} is {hours_text} overdue!",
-                        'task_id': task_id,
-                        'garden_name': garden_name
-                    })
+                hours_text = f"{int(hours_overdue)} hour(s)" if hours_overdue >= 1 else f"{int(hours_overdue * 60)} minute(s)"
+                
+                self._queue_notification({
+                    'type': NotificationType.TASK_OVERDUE,
+                    'priority': notif_priority,
+                    'title': f"⚠️ Overdue Task: {garden_name}",
+                    'message': f"{title} is {hours_text} overdue!",
+                    'task_id': task_id,
+                    'garden_id': garden_id,
+                    'garden_name': garden_name
+                })
                     
         except Exception as e:
-            logger.error(f"Error checking overdue tasks: {e}")
+            logger.error(f"Error sending overdue alerts: {e}")
     
-    def _check_growth_milestones(self):
-        """Check for growth milestones and stage transitions"""
+    def _check_growth_milestones(self, now: datetime) -> datetime:
+        """Announce stage transitions that have come due; returns when to check next"""
+        next_check = now + timedelta(minutes=PERIODIC_CHECK_MINUTES['growth_milestones'])
         if not self.preferences.growth_milestones:
-            return
+            return next_check
         
         try:
-            with self.db_manager.get_connection() as conn:
-                cursor = conn.execute("""
-                    SELECT id, name, planted_date, current_stage,
-                           (julianday('now') - julianday(planted_date)) as days_since_planting
-                    FROM gardens 
-                    WHERE is_active = 1
-                """)
+            # New or replanted plants get their timeline here
+            self.stage_timelines.sync()
                 
-                for row in cursor.fetchall():
-                    garden_id, name, planted_date, current_stage, days_since = row
+            for change in self.stage_timelines.advance_due(now):
+                plant_count = len(change['plants'])
+                plants_text = change['plants'][0]['name'] if plant_count == 1 else f"{plant_count} plants"
+                self._queue_notification({
+                    'type': NotificationType.GROWTH_MILESTONE,
+                    'priority': NotificationPriority.MEDIUM,
+                    'title': f"🌱 Growth Milestone: {change['garden_name']}",
+                    'message': f"{plants_text} moved from {change['from_stage']} to {change['to_stage']} stage",
+                    'garden_id': change['garden_id'],
+                    'garden_name': change['garden_name']
+                })
                     
-                    # Check for stage transitions
-                    expected_stage = self._get_expected_stage(days_since)
-                    if expected_stage != current_stage:
-                        self._queue_notification({
-                            'type': NotificationType.GROWTH_MILESTONE,
-                            'priority': NotificationPriority.MEDIUM,
-                            'title': f"🌱 Growth Milestone: {name}",
-                            'message': f"Ready to transition from {current_stage} to {expected_stage} stage",
-                            'garden_id': garden_id,
-                            'garden_name': name
-                        })
-                        
-                        # Update garden stage in database
-                        conn.execute("""
-                            UPDATE gardens 
-                            SET current_stage = ?, stage_start_date = datetime('now')
-                            WHERE id = ?
-                        """, (expected_stage, garden_id))
-                        conn.commit()
+            next_transition = self.stage_timelines.next_transition_at()
+            if next_transition is not None:
+                next_check = min(next_check, max(next_transition, now))
                         
         except Exception as e:
             logger.error(f"Error checking growth milestones: {e}")
     
-    def _get_expected_stage(self, days_since_planting: float) -> str:
-        """Determine expected growth stage based on days since planting"""
-        if days_since_planting < 7:
-            return "germination"
-        elif days_since_planting < 21:
-            return "seedling"
-        elif days_since_planting < 56:
-            return "vegetative"
-        elif days_since_planting < 112:
-            return "flowering"
-        else:
-            return "harvest"
+        return next_check
     
     def _check_resource_alerts(self):
         """Check for resource-related alerts"""
@@ -289,7 +452,7 @@ class BasicNotificationSystem:
             # Check for low inventory levels
             with self.db_manager.get_connection() as conn:
                 cursor = conn.execute("""
-                    SELECT name, current_quantity, minimum_threshold
+                    SELECT item_name, current_quantity, minimum_threshold
                     FROM inventory_items 
                     WHERE current_quantity <= minimum_threshold 
                     AND current_quantity > 0
@@ -311,12 +474,19 @@ class BasicNotificationSystem:
     
     def _queue_notification(self, notification: Dict[str, Any]):
         """Add notification to queue for processing"""
-        # Check if we're in quiet hours
+        now = datetime.now()
+        release_at = now
+        notification.setdefault('queued_at', now)
+        
+        # Hold notifications until quiet hours end; they all share that release time
         if self._is_quiet_hours():
             notification['delayed'] = True
-            notification['original_time'] = datetime.now().isoformat()
+            notification['original_time'] = now.isoformat()
+            release_at = self._quiet_hours_end(now)
         
-        self.notification_queue.append(notification)
+        if self.notification_queue.push(notification, release_at, self._digest_key(notification)):
+            with self.wake_condition:
+                self.wake_condition.notify()
     
     def _is_quiet_hours(self) -> bool:
         """Check if current time is within quiet hours"""
@@ -331,45 +501,125 @@ class BasicNotificationSystem:
             return (self.preferences.quiet_hours_start <= current_hour <= 
                    self.preferences.quiet_hours_end)
     
+    def _quiet_hours_end(self, now: datetime) -> datetime:
+        """First moment after the current quiet hours (the end hour itself is quiet)"""
+        end = now.replace(hour=self.preferences.quiet_hours_end, minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        return end if end > now else end + timedelta(days=1)
+    
     def _process_notification_queue(self):
-        """Process queued notifications"""
-        if not self.notification_queue:
-            return
+        """Send released notifications, as fast as each channel's rate limit allows"""
+        released = self.notification_queue.pop_sendable(coalesce=self._coalesce_notifications)
+        sent = [notification for notification in released if self._send_notification(notification, log=False)]
+        self._log_notifications([item for notification in sent for item in notification.get('items', [notification])])
+    
+    def _digest_key(self, notification: Dict[str, Any]) -> Optional[tuple]:
+        """Garden, type and time window a task notification is merged under, or None"""
+        if (not self.preferences.digest_mode or notification.get('garden_id') is None or
+                notification['type'].value not in DIGEST_NOTIFICATION_TYPES):
+            return None
+        window = int(notification['queued_at'].timestamp() // (DIGEST_WINDOW_MINUTES * 60))
+        return notification['garden_id'], notification['type'].value, window
+    
+    def _coalesce_notifications(self, groups: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Turn each released group of task notifications into one digest once it is large enough"""
+        coalesced = []
+        for group in groups:
+            if len(group) >= DIGEST_MIN_ITEMS:
+                coalesced.append(self._build_digest(group))
+            else:
+                coalesced.extend(group)
+        return coalesced
+    
+    def _build_digest(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """One notification summarizing several task notifications of a garden"""
+        first = items[0]
+        priorities = list(NotificationPriority)
+        priority = max((item.get('priority', NotificationPriority.MEDIUM) for item in items), key=priorities.index)
+        garden_name = first.get('garden_name', 'Garden')
+        
+        if first['type'] == NotificationType.TASK_OVERDUE:
+            title = f"⚠️ {len(items)} Overdue Tasks: {garden_name}"
+        else:
+            title = f"{len(items)} Task Reminders: {garden_name}"
+        
+        message = "; ".join(item['message'] for item in items[:DIGEST_PREVIEW_ITEMS])
+        if len(items) > DIGEST_PREVIEW_ITEMS:
+            message += f" and {len(items) - DIGEST_PREVIEW_ITEMS} more"
+        
+        digest = {
+            'type': first['type'],
+            'priority': priority,
+            'title': title,
+            'message': message,
+            'garden_id': first.get('garden_id'),
+            'garden_name': garden_name,
+            'queued_at': first.get('queued_at'),
+            'items': items
+        }
+        if 'channel' in first:
+            digest['channel'] = first['channel']
+        return digest
         
-        # Process up to 5 notifications per cycle to avoid spam
-        for _ in range(min(5, len(self.notification_queue))):
-            if not self.notification_queue:
-                break
+    def get_delivery_stats(self) -> Dict[str, Any]:
+        """Pending, delivered and retried counts per sink and the dead-letter count"""
+        return self.dispatcher.get_stats()
+    
+    def get_dead_letters(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent notifications that a sink gave up on"""
+        try:
+            with self.db_manager.get_connection() as conn:
+                cursor = conn.execute("""
+                    SELECT sink, payload, attempts, last_error, failed_at
+                    FROM notification_dead_letters
+                    ORDER BY failed_at DESC
+                    LIMIT ?
+                """, (limit,))
                 
-            notification = self.notification_queue.pop(0)
-            
-            # Skip delayed notifications during quiet hours
-            if notification.get('delayed') and self._is_quiet_hours():
-                self.notification_queue.append(notification)  # Re-queue
-                continue
-            
-            self._send_notification(notification)
+                return [{
+                    'sink': row[0],
+                    'notification': json.loads(row[1]),
+                    'attempts': row[2],
+                    'error': row[3],
+                    'failed_at': row[4]
+                } for row in cursor.fetchall()]
+        
+        except Exception as e:
+            logger.error(f"Error getting dead-letter notifications: {e}")
+            return []
     
-    def _send_notification(self, notification: Dict[str, Any]):
-        """Send a single notification using the appropriate backend"""
+    def get_queue_stats(self) -> Dict[str, Any]:
+        """Pending notification count, next release time and overflow drops by type"""
+        return self.notification_queue.get_stats()
+    
+    def _send_notification(self, notification: Dict[str, Any], log: bool = True) -> bool:
+        """Hand a notification to the delivery sinks"""
         if not self.preferences.enabled:
-            return
+            return False
         
         try:
-            title = notification['title']
-            message = notification['message']
-            priority = notification.get('priority', NotificationPriority.MEDIUM)
-            
-            if self.backend == "win10toast":
-                self._send_windows_notification(title, message, priority)
-            else:
-                self._send_basic_notification(title, message, priority)
+            if not self.dispatcher.submit(notification):
+                logger.warning(f"No notification sinks configured, dropped: {notification['title']}")
+                return False
             
-            # Log notification
-            self._log_notification(notification)
+            # Log notification (one record per task of a digest)
+            if log:
+                self._log_notifications(notification.get('items', [notification]))
+            return True
             
         except Exception as e:
             logger.error(f"Error sending notification: {e}")
+            return False
+    
+    def _show_desktop_notification(self, notification: Dict[str, Any]):
+        """Show a notification with the platform backend (runs on the desktop sink's worker)"""
+        title = notification['title']
+        message = notification['message']
+        priority = notification.get('priority', NotificationPriority.MEDIUM)
+        
+        if self.backend == "win10toast":
+            self._send_windows_notification(title, message, priority)
+        else:
+            self._send_basic_notification(title, message, priority)
     
     def _send_windows_notification(self, title: str, message: str, priority: NotificationPriority):
         """Send Windows 10 toast notification"""
@@ -428,22 +678,27 @@ class BasicNotificationSystem:
         except Exception as e:
             logger.error(f"Error sending basic notification: {e}")
     
-    def _log_notification(self, notification: Dict[str, Any]):
-        """Log notification to database for history tracking"""
+    def _log_notifications(self, notifications: List[Dict[str, Any]]):
+        """Log notifications to database for history tracking in one batch"""
+        if not notifications:
+            return
+        
+        created_at = datetime.now().isoformat()
         try:
             with self.db_manager.get_connection() as conn:
-                conn.execute("""
+                conn.executemany("""
                     INSERT INTO notification_history 
-                    (notification_type, title, message, priority, task_id, garden_id, sent_date)
-                    VALUES (?, ?, ?, ?, ?, ?, datetime('now'))
-                """, (
+                    (notification_type, title, message, priority, task_id, garden_id, sent_date, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, datetime('now'), ?)
+                """, [(
                     notification['type'].value,
                     notification['title'],
                     notification['message'],
                     notification.get('priority', NotificationPriority.MEDIUM).value,
                     notification.get('task_id'),
-                    notification.get('garden_id')
-                ))
+                    notification.get('garden_id'),
+                    created_at
+                ) for notification in notifications])
                 conn.commit()
                 
         except Exception as e:
@@ -464,12 +719,19 @@ class BasicNotificationSystem:
     def update_preferences(self, new_preferences: Dict[str, Any]):
         """Update notification preferences"""
         try:
+            now = datetime.now().isoformat()
             with self.db_manager.get_connection() as conn:
                 for key, value in new_preferences.items():
+                    if isinstance(value, bool):
+                        setting_value, setting_type = str(value).lower(), "boolean"
+                    elif isinstance(value, int):
+                        setting_value, setting_type = str(value), "integer"
+                    else:
+                        setting_value, setting_type = str(value), "string"
                     conn.execute("""
-                        INSERT OR REPLACE INTO user_settings (setting_key, setting_value)
-                        VALUES (?, ?)
-                    """, (f"notification_{key}", str(value).lower() if isinstance(value, bool) else str(value)))
+                        INSERT OR REPLACE INTO user_settings (setting_name, setting_value, setting_type, last_updated)
+                        VALUES (?, ?, ?, ?)
+                    """, (f"notification_{key}", setting_value, setting_type, now))
                 
                 conn.commit()
             
@@ -522,17 +784,45 @@ class BasicNotificationSystem:
                         task_id INTEGER,
                         garden_id INTEGER,
                         sent_date TEXT NOT NULL,
+                        created_at TEXT,
                         FOREIGN KEY (task_id) REFERENCES tasks (id),
                         FOREIGN KEY (garden_id) REFERENCES gardens (id)
                     )
                 """)
                 
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS notification_dedupe (
+                        dedupe_key TEXT PRIMARY KEY,
+                        notification_type TEXT NOT NULL,
+                        entity TEXT NOT NULL,
+                        window_hours REAL NOT NULL,
+                        sent_at TEXT NOT NULL,
+                        expires_at TEXT NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_notification_dedupe_expires ON notification_dedupe (expires_at)")
+                
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS notification_dead_letters (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        sink TEXT NOT NULL,
+                        payload TEXT NOT NULL,
+                        attempts INTEGER NOT NULL,
+                        last_error TEXT,
+                        failed_at TEXT NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_notification_dead_letters_failed ON notification_dead_letters (failed_at)")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_notifications_sent_date ON notification_history (sent_date)")
+                
                 # User settings table (if not exists)
                 conn.execute("""
                     CREATE TABLE IF NOT EXISTS user_settings (
-                        setting_key TEXT PRIMARY KEY,
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        setting_name TEXT NOT NULL UNIQUE,
                         setting_value TEXT NOT NULL,
-                        updated_date TEXT DEFAULT CURRENT_TIMESTAMP
+                        setting_type TEXT NOT NULL DEFAULT 'string',
+                        last_updated TEXT NOT NULL
                     )
                 """)
                 
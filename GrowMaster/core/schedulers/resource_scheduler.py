@@ -0,0 +1,263 @@
+"""
+GrowMaster Pro - Resource-Constrained Scheduler
+Rolling-horizon, multi-day task placement with resource capacities and load leveling
+"""
+
+import logging
+import random
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Any
+
+from .multi_garden_coordinator import ResourceType, ResourceRequirement, priority_key
+
+logger = logging.getLogger(__name__)
+
+# How many days a task may move away from its due date, keyed by priority_key
+PRIORITY_FLEXIBILITY_DAYS = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
+
+# Relative cost of moving a task one day away from its due date, keyed by priority_key
+PRIORITY_DELAY_COST = {'critical': 8.0, 'high': 4.0, 'medium': 2.0, 'low': 1.0}
+
+# Objective penalty per unit of utilization above capacity
+OVERLOAD_PENALTY = 1000.0
+
+class ResourceConstrainedScheduler:
+    """Assign tasks to days over a rolling horizon without exceeding daily resource capacity
+    
+    A greedy pass places the most constrained, highest priority tasks first on
+    the feasible day with the lowest cost. A time-boxed local search then moves
+    and swaps tasks between days to level the load. The objective is the sum of
+    squared daily utilization per resource plus a priority-weighted penalty for
+    each day a task moves from its due date.
+    """
+    
+    def __init__(self, daily_capacity: Dict[ResourceType, float], seed: int = 0):
+        self.daily_capacity = {r: c for r, c in daily_capacity.items() if c > 0}
+        self.random = random.Random(seed)
+    
+    @staticmethod
+    def daily_demand(requirements: List[ResourceRequirement]) -> Dict[ResourceType, float]:
+        """Convert a task's resource requirements into daily capacity usage"""
+        demand: Dict[ResourceType, float] = {}
+        for req in requirements:
+            if req.resource_type == ResourceType.TIME:
+                amount = float(req.duration_minutes)  # labour minutes
+            elif req.resource_type == ResourceType.EQUIPMENT:
+                amount = float(req.quantity) * req.duration_minutes  # equipment minutes
+            else:
+                amount = float(req.quantity)
+            demand[req.resource_type] = demand.get(req.resource_type, 0.0) + amount
+        return demand
+    
+    def schedule(self, tasks: List[Dict[str, Any]], task_resources: Dict[int, List[ResourceRequirement]],
+                 start_date: date, horizon_days: int = 14,
+                 time_limit_seconds: float = 0.5) -> Dict[str, Any]:
+        """Place tasks on days within [start_date, start_date + horizon_days)"""
+        horizon_days = max(1, horizon_days)
+        days = [start_date + timedelta(days=offset) for offset in range(horizon_days)]
+        
+        items = [self._prepare_item(task, task_resources.get(task['id'], []), start_date, horizon_days)
+                 for task in tasks]
+        
+        # Per day, per resource utilization (load / capacity)
+        load = [{resource: 0.0 for resource in self.daily_capacity} for _ in days]
+        assignment: Dict[int, int] = {}
+        
+        self._greedy_assign(items, load, assignment)
+        iterations = self._local_search(items, load, assignment, time.monotonic() + time_limit_seconds)
+        
+        return self._build_result(items, days, load, assignment, iterations)
+    
+    def _prepare_item(self, task: Dict[str, Any], requirements: List[ResourceRequirement],
+                      start_date: date, horizon_days: int) -> Dict[str, Any]:
+        """Pre-compute a task's window and normalized daily demand"""
+        due_day = datetime.fromisoformat(str(task['due_date'])).date()
+        due_offset = (due_day - start_date).days
+        priority = priority_key(task.get('priority'))
+        flexibility = task.get('flexibility_days', PRIORITY_FLEXIBILITY_DAYS.get(priority, 2))
+        
+        earliest = max(0, min(due_offset - flexibility, horizon_days - 1))
+        latest = max(earliest, min(due_offset + flexibility, horizon_days - 1))
+        
+        demand = self.daily_demand(requirements)
+        utilization = {resource: amount / self.daily_capacity[resource]
+                       for resource, amount in demand.items() if resource in self.daily_capacity}
+        
+        return {
+            'task': task,
+            'due_offset': max(0, due_offset),
+            'window': (earliest, latest),
+            'utilization': utilization,
+            'delay_cost': PRIORITY_DELAY_COST.get(priority, 1.0)
+        }
+    
+    def _day_cost(self, day_load: Dict[ResourceType, float]) -> float:
+        """Load leveling cost of one day"""
+        cost = 0.0
+        for used in day_load.values():
+            cost += used * used
+            if used > 1.0:
+                cost += (used - 1.0) * OVERLOAD_PENALTY
+        return cost
+    
+    def _placement_delta(self, item: Dict[str, Any], day_load: Dict[ResourceType, float], sign: float) -> float:
+        """Change in a day's cost when adding (sign=1) or removing (sign=-1) an item"""
+        delta = 0.0
+        for resource, used in item['utilization'].items():
+            before = day_load[resource]
+            after = before + sign * used
+            delta += after * after - before * before
+            delta += (max(0.0, after - 1.0) - max(0.0, before - 1.0)) * OVERLOAD_PENALTY
+        return delta
+    
+    def _delay_cost(self, item: Dict[str, Any], day: int) -> float:
+        """Cost of placing an item away from its due day"""
+        return abs(day - item['due_offset']) * item['delay_cost']
+    
+    def _fits(self, item: Dict[str, Any], day_load: Dict[ResourceType, float]) -> bool:
+        """Check whether an item fits within the remaining capacity of a day"""
+        return all(day_load[resource] + used <= 1.0 + 1e-9 for resource, used in item['utilization'].items())
+    
+    def _apply(self, item: Dict[str, Any], day_load: Dict[ResourceType, float], sign: float):
+        """Add or remove an item's utilization on a day"""
+        for resource, used in item['utilization'].items():
+            day_load[resource] += sign * used
+    
+    def _greedy_assign(self, items: List[Dict[str, Any]], load: List[Dict[ResourceType, float]],
+                       assignment: Dict[int, int]):
+        """Place the most constrained, highest priority items first on their cheapest feasible day"""
+        order = sorted(range(len(items)), key=lambda i: (
+            -items[i]['delay_cost'],
+            items[i]['window'][1] - items[i]['window'][0],
+            -sum(items[i]['utilization'].values()),
+            items[i]['due_offset']
+        ))
+        
+        for i in order:
+            item = items[i]
+            earliest, latest = item['window']
+            best_day, best_key = earliest, None
+            
+            # Prefer days with room left, then the lowest added cost
+            for day in range(earliest, latest + 1):
+                cost = self._placement_delta(item, load[day], 1.0) + self._delay_cost(item, day)
+                key = (not self._fits(item, load[day]), cost)
+                if best_key is None or key < best_key:
+                    best_day, best_key = day, key
+            
+            self._apply(item, load[best_day], 1.0)
+            assignment[i] = best_day
+    
+    def _local_search(self, items: List[Dict[str, Any]], load: List[Dict[ResourceType, float]],
+                      assignment: Dict[int, int], deadline: float) -> int:
+        """Improve the greedy plan with random moves and swaps until the deadline"""
+        movable = [i for i, item in enumerate(items) if item['window'][0] < item['window'][1]]
+        if not movable:
+            return 0
+        
+        iterations = 0
+        attempts_without_gain = 0
+        patience = 50 * len(movable)
+        while time.monotonic() < deadline and attempts_without_gain < patience:
+            for _ in range(200):  # Check the clock every 200 attempts
+                iterations += 1
+                i = self.random.choice(movable)
+                if self.random.random() < 0.5:
+                    improved = self._try_move(items, load, assignment, i)
+                else:
+                    improved = self._try_swap(items, load, assignment, i, self.random.choice(movable))
+                attempts_without_gain = 0 if improved else attempts_without_gain + 1
+        
+        return iterations
+    
+    def _try_move(self, items: List[Dict[str, Any]], load: List[Dict[ResourceType, float]],
+                  assignment: Dict[int, int], i: int) -> bool:
+        """Move one item to another day in its window if that lowers the objective"""
+        item = items[i]
+        current = assignment[i]
+        target = self.random.randint(item['window'][0], item['window'][1])
+        if target == current:
+            return False
+        
+        delta = (self._placement_delta(item, load[current], -1.0) - self._delay_cost(item, current) +
+                 self._placement_delta(item, load[target], 1.0) + self._delay_cost(item, target))
+        if delta >= -1e-12:
+            return False
+        
+        self._apply(item, load[current], -1.0)
+        self._apply(item, load[target], 1.0)
+        assignment[i] = target
+        return True
+    
+    def _try_swap(self, items: List[Dict[str, Any]], load: List[Dict[ResourceType, float]],
+                  assignment: Dict[int, int], i: int, j: int) -> bool:
+        """Exchange the days of two items if both stay in their windows and the objective drops"""
+        day_i, day_j = assignment[i], assignment[j]
+        if i == j or day_i == day_j:
+            return False
+        
+        item_i, item_j = items[i], items[j]
+        if not (item_i['window'][0] <= day_j <= item_i['window'][1] and
+                item_j['window'][0] <= day_i <= item_j['window'][1]):
+            return False
+        
+        before = self._day_cost(load[day_i]) + self._day_cost(load[day_j])
+        before += self._delay_cost(item_i, day_i) + self._delay_cost(item_j, day_j)
+        
+        self._apply(item_i, load[day_i], -1.0)
+        self._apply(item_j, load[day_i], 1.0)
+        self._apply(item_j, load[day_j], -1.0)
+        self._apply(item_i, load[day_j], 1.0)
+        
+        after = self._day_cost(load[day_i]) + self._day_cost(load[day_j])
+        after += self._delay_cost(item_i, day_j) + self._delay_cost(item_j, day_i)
+        
+        if after < before - 1e-12:
+            assignment[i], assignment[j] = day_j, day_i
+            return True
+        
+        # Revert
+        self._apply(item_i, load[day_j], -1.0)
+        self._apply(item_j, load[day_j], 1.0)
+        self._apply(item_j, load[day_i], -1.0)
+        self._apply(item_i, load[day_i], 1.0)
+        return False
+    
+    def _build_result(self, items: List[Dict[str, Any]], days: List[date],
+                      load: List[Dict[ResourceType, float]], assignment: Dict[int, int],
+                      iterations: int) -> Dict[str, Any]:
+        """Summarize the plan per task and per day"""
+        scheduled_tasks = []
+        moved = 0
+        for i, item in enumerate(items):
+            day = assignment[i]
+            task = dict(item['task'])
+            task['scheduled_date'] = days[day].isoformat()
+            task['rescheduled'] = day != item['due_offset']
+            moved += task['rescheduled']
+            scheduled_tasks.append(task)
+        
+        daily_load = {}
+        overloaded_days = []
+        for day, day_load in zip(days, load):
+            utilization = {resource.value: round(max(0.0, used) * 100, 1) for resource, used in day_load.items()}
+            daily_load[day.isoformat()] = utilization
+            if any(used > 1.0 + 1e-9 for used in day_load.values()):
+                overloaded_days.append(day.isoformat())
+        
+        peak = max((max(day_load.values(), default=0.0) for day_load in load), default=0.0)
+        objective = sum(self._day_cost(day_load) for day_load in load)
+        objective += sum(self._delay_cost(item, assignment[i]) for i, item in enumerate(items))
+        
+        return {
+            'start_date': days[0].isoformat(),
+            'horizon_days': len(days),
+            'tasks': scheduled_tasks,
+            'daily_utilization': daily_load,
+            'overloaded_days': overloaded_days,
+            'peak_utilization': round(peak * 100, 1),
+            'tasks_moved': moved,
+            'objective': round(objective, 3),
+            'search_iterations': iterations
+        }
@@ -0,0 +1,312 @@
+"""
+GrowMaster Pro - Route Planner
+Travel-aware ordering of task batches across tents and sites
+"""
+
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Travel time between two different locations when nothing more specific is configured
+DEFAULT_TRAVEL_MINUTES = 15
+
+# Walking speed used to turn configured coordinates (meters) into minutes
+DEFAULT_WALKING_SPEED = 80.0  # meters per minute
+
+# Route cost per minute a batch starts after its window closes, per unit of urgency
+LATENESS_PENALTY = 10.0
+
+# Small pull towards batches whose window closes soonest when choosing the next stop
+SLACK_WEIGHT = 0.1
+
+# Longest segment 2-opt tries to reverse (keeps each pass close to linear)
+MAX_SEGMENT_LENGTH = 40
+
+# Number of location sets whose matrices are kept
+MATRIX_CACHE_SIZE = 32
+
+class LocationDistanceMatrix:
+    """Travel minutes between garden locations
+    
+    Times come from explicit pairs first, then from coordinates in meters at
+    walking speed, then from the default. Matrices for a set of locations are
+    cached until the configuration changes. A location of None means the spot
+    is unknown and costs no travel.
+    """
+    
+    def __init__(self, travel_minutes: Optional[Dict[str, Dict[str, float]]] = None,
+                 coordinates: Optional[Dict[str, Tuple[float, float]]] = None,
+                 default_minutes: float = DEFAULT_TRAVEL_MINUTES,
+                 walking_speed: float = DEFAULT_WALKING_SPEED):
+        self.pairs: Dict[Tuple[str, str], float] = {}
+        self.coordinates: Dict[str, Tuple[float, float]] = {}
+        self.default_minutes = float(default_minutes)
+        self.walking_speed = float(walking_speed) if walking_speed > 0 else DEFAULT_WALKING_SPEED
+        self.matrix_cache: Dict[Tuple[str, ...], np.ndarray] = {}
+        
+        for origin, targets in (travel_minutes or {}).items():
+            for target, minutes in targets.items():
+                self.set_travel_minutes(origin, target, minutes)
+        for location, point in (coordinates or {}).items():
+            self.set_coordinates(location, point[0], point[1])
+    
+    @classmethod
+    def from_settings(cls, db_manager) -> 'LocationDistanceMatrix':
+        """Build the matrix from the travel settings in user_settings"""
+        settings = {}
+        try:
+            with db_manager.get_connection() as conn:
+                rows = conn.execute("""
+                    SELECT setting_name, setting_value FROM user_settings
+                    WHERE setting_name IN ('default_travel_minutes', 'walking_speed',
+                                           'location_travel_minutes', 'location_coordinates')
+                """).fetchall()
+                settings = {row[0]: row[1] for row in rows}
+        except Exception as e:
+            logger.warning(f"Could not load location travel settings, using defaults: {e}")
+        
+        try:
+            return cls(
+                travel_minutes=json.loads(settings.get('location_travel_minutes') or '{}'),
+                coordinates=json.loads(settings.get('location_coordinates') or '{}'),
+                default_minutes=float(settings.get('default_travel_minutes', DEFAULT_TRAVEL_MINUTES)),
+                walking_speed=float(settings.get('walking_speed', DEFAULT_WALKING_SPEED))
+            )
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.error(f"Invalid location travel settings, using defaults: {e}")
+            return cls()
+    
+    def set_travel_minutes(self, origin: str, target: str, minutes: float):
+        """Set the travel time between two locations (both directions)"""
+        self.pairs[(origin, target)] = float(minutes)
+        self.pairs[(target, origin)] = float(minutes)
+        self.matrix_cache.clear()
+    
+    def set_coordinates(self, location: str, x_meters: float, y_meters: float):
+        """Place a location on the site plan"""
+        self.coordinates[location] = (float(x_meters), float(y_meters))
+        self.matrix_cache.clear()
+    
+    def travel_minutes(self, origin: Optional[str], target: Optional[str]) -> float:
+        """Get the travel time between two locations"""
+        if origin is None or target is None or origin == target:
+            return 0.0
+        if (origin, target) in self.pairs:
+            return self.pairs[(origin, target)]
+        if origin in self.coordinates and target in self.coordinates:
+            (x1, y1), (x2, y2) = self.coordinates[origin], self.coordinates[target]
+            return float(np.hypot(x2 - x1, y2 - y1)) / self.walking_speed
+        return self.default_minutes
+    
+    def matrix(self, locations: List[Optional[str]]) -> np.ndarray:
+        """Get the travel time matrix for a list of locations"""
+        key = tuple(locations)
+        cached = self.matrix_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        size = len(locations)
+        known = np.array([location is not None for location in locations], dtype=bool)
+        matrix = np.full((size, size), self.default_minutes)
+        
+        # Coordinates for every location that has them, in one vectorized pass
+        has_point = np.array([location in self.coordinates for location in locations], dtype=bool)
+        if has_point.any():
+            points = np.array([self.coordinates.get(location, (0.0, 0.0)) for location in locations])
+            walk = np.hypot(points[:, None, 0] - points[None, :, 0],
+                            points[:, None, 1] - points[None, :, 1]) / self.walking_speed
+            both = has_point[:, None] & has_point[None, :]
+            matrix[both] = walk[both]
+        
+        # Explicit pairs override coordinates
+        if self.pairs:
+            index = {location: i for i, location in enumerate(locations)}
+            for (origin, target), minutes in self.pairs.items():
+                if origin in index and target in index:
+                    matrix[index[origin], index[target]] = minutes
+        
+        # Same spot or unknown spot costs nothing
+        same = np.array([[a == b for b in locations] for a in locations], dtype=bool)
+        matrix[same | ~known[:, None] | ~known[None, :]] = 0.0
+        
+        if len(self.matrix_cache) >= MATRIX_CACHE_SIZE:
+            self.matrix_cache.pop(next(iter(self.matrix_cache)))
+        self.matrix_cache[key] = matrix
+        return matrix
+
+class RoutePlanner:
+    """Order stops (task batches) to cut travel while respecting their time windows
+    
+    A nearest-neighbour pass builds the route, picking the next stop by travel
+    plus waiting time, lateness penalty and a small pull towards stops whose
+    window closes soonest; the cheaper of that route and plain deadline order
+    is kept. A time-boxed 2-opt pass then reverses segments when that lowers
+    travel plus weighted lateness.
+    """
+    
+    def __init__(self, distances: LocationDistanceMatrix, time_limit_seconds: float = 0.05):
+        self.distances = distances
+        self.time_limit_seconds = time_limit_seconds
+    
+    def plan(self, stops: List[Dict[str, Any]], start_time: datetime,
+             start_location: Optional[str] = None) -> Dict[str, Any]:
+        """Plan a route through stops
+        
+        Each stop needs 'location', 'duration' (minutes), 'open' and 'close'
+        (datetimes bounding the start time) and 'weight' (urgency).
+        """
+        if not stops:
+            return {'order': [], 'start_times': [], 'travel_minutes': [], 'total_travel_minutes': 0.0,
+                    'total_lateness_minutes': 0.0}
+        
+        # Node 0 is the starting point, stops are nodes 1..n
+        locations = [start_location] + [stop['location'] for stop in stops]
+        unique_locations = list(dict.fromkeys(locations))
+        location_index = np.array([unique_locations.index(location) for location in locations])
+        travel = self.distances.matrix(unique_locations)[np.ix_(location_index, location_index)]
+        
+        def minutes(moment: datetime) -> float:
+            return (moment - start_time).total_seconds() / 60.0
+        
+        duration = np.array([0.0] + [float(stop['duration']) for stop in stops])
+        opens = np.array([0.0] + [max(0.0, minutes(stop['open'])) for stop in stops])
+        closes = np.array([np.inf] + [minutes(stop['close']) for stop in stops])
+        weight = np.array([0.0] + [float(stop.get('weight', 1.0)) for stop in stops])
+        
+        # On overloaded days deadline order can beat nearest neighbour; improve the better start
+        starts = [self._nearest_neighbour(travel, duration, opens, closes, weight),
+                  [int(node) + 1 for node in np.argsort(closes[1:], kind='stable')]]
+        order = min(starts, key=lambda route: self._suffix_cost(route, 0, 0, 0.0, travel, duration,
+                                                                 opens, closes, weight))
+        order = self._two_opt(order, travel, duration, opens, closes, weight,
+                              time.monotonic() + self.time_limit_seconds)
+        
+        starts, legs, lateness = self._simulate(order, travel, duration, opens, closes)
+        return {
+            'order': [node - 1 for node in order],
+            'start_times': [start_time + timedelta(minutes=float(start)) for start in starts],
+            'travel_minutes': [float(leg) for leg in legs],
+            'total_travel_minutes': round(float(legs.sum()), 1),
+            'total_lateness_minutes': round(float(lateness.sum()), 1)
+        }
+    
+    def _nearest_neighbour(self, travel: np.ndarray, duration: np.ndarray, opens: np.ndarray,
+                           closes: np.ndarray, weight: np.ndarray) -> List[int]:
+        """Build a route by always going to the cheapest next stop"""
+        size = len(duration)
+        unvisited = np.ones(size, dtype=bool)
+        unvisited[0] = False
+        current, clock = 0, 0.0
+        order = []
+        
+        for _ in range(size - 1):
+            candidates = np.flatnonzero(unvisited)
+            start = np.maximum(clock + travel[current, candidates], opens[candidates])
+            late = np.maximum(0.0, start - closes[candidates])
+            slack = np.maximum(0.0, closes[candidates] - start)
+            slack[np.isinf(slack)] = 0.0
+            cost = (start - clock) + LATENESS_PENALTY * weight[candidates] * late + SLACK_WEIGHT * slack
+            
+            best = int(np.argmin(cost))
+            node = int(candidates[best])
+            order.append(node)
+            unvisited[node] = False
+            clock = start[best] + duration[node]
+            current = node
+        
+        return order
+    
+    def _simulate(self, order: List[int], travel: np.ndarray, duration: np.ndarray,
+                  opens: np.ndarray, closes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Walk a route and return start times, travel legs and lateness per stop"""
+        starts = np.empty(len(order))
+        legs = np.empty(len(order))
+        previous, clock = 0, 0.0
+        for position, node in enumerate(order):
+            legs[position] = travel[previous, node]
+            starts[position] = max(clock + legs[position], opens[node])
+            clock = starts[position] + duration[node]
+            previous = node
+        
+        lateness = np.maximum(0.0, starts - closes[order])
+        return starts, legs, lateness
+    
+    def _suffix_cost(self, order: List[int], first: int, previous: int, clock: float,
+                     travel: np.ndarray, duration: np.ndarray, opens: np.ndarray,
+                     closes: np.ndarray, weight: np.ndarray) -> float:
+        """Travel plus weighted lateness of the route from position first onwards"""
+        cost = 0.0
+        for node in order[first:]:
+            leg = travel[previous, node]
+            start = max(clock + leg, opens[node])
+            cost += leg + LATENESS_PENALTY * weight[node] * max(0.0, start - closes[node])
+            clock = start + duration[node]
+            previous = node
+        return cost
+    
+    def _route_state(self, order: List[int], travel: np.ndarray, duration: np.ndarray, opens: np.ndarray,
+                     closes: np.ndarray, weight: np.ndarray) -> Tuple[List[int], List[float], np.ndarray]:
+        """Previous node and clock before each position, and weighted lateness from each position on"""
+        prefix_node, prefix_clock = [0] * len(order), [0.0] * len(order)
+        late = np.zeros(len(order))
+        previous, clock = 0, 0.0
+        for position, node in enumerate(order):
+            prefix_node[position], prefix_clock[position] = previous, clock
+            start = max(clock + travel[previous, node], opens[node])
+            late[position] = weight[node] * max(0.0, start - closes[node])
+            clock = start + duration[node]
+            previous = node
+        return prefix_node, prefix_clock, np.cumsum(late[::-1])[::-1]
+    
+    def _two_opt(self, order: List[int], travel: np.ndarray, duration: np.ndarray, opens: np.ndarray,
+                 closes: np.ndarray, weight: np.ndarray, deadline: float) -> List[int]:
+        """Reverse route segments while that lowers the cost, until no gain or the deadline"""
+        size = len(order)
+        if size < 3:
+            return order
+        
+        improved = True
+        while improved and time.monotonic() < deadline:
+            improved = False
+            prefix_node, prefix_clock, suffix_late = self._route_state(order, travel, duration, opens, closes, weight)
+            
+            i = 0
+            while i < size - 1 and time.monotonic() < deadline:
+                before = prefix_node[i]
+                current_cost = None
+                accepted = False
+                for j in range(i + 1, min(size, i + MAX_SEGMENT_LENGTH)):
+                    # Travel change of reversing order[i..j] (only the two boundary legs move)
+                    delta = travel[before, order[j]] - travel[before, order[i]]
+                    if j + 1 < size:
+                        delta += travel[order[i], order[j + 1]] - travel[order[j], order[j + 1]]
+                    
+                    # Without shorter travel only a late stop further on can make the move pay off
+                    if delta >= -1e-9 and suffix_late[i] <= 0.0:
+                        continue
+                    
+                    if current_cost is None:
+                        current_cost = self._suffix_cost(order, i, before, prefix_clock[i],
+                                                         travel, duration, opens, closes, weight)
+                    candidate = order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+                    new_cost = self._suffix_cost(candidate, i, before, prefix_clock[i],
+                                                 travel, duration, opens, closes, weight)
+                    if new_cost < current_cost - 1e-9:
+                        order = candidate
+                        accepted = improved = True
+                        break
+                
+                if accepted:
+                    # Positions before i are unchanged; refresh the state and retry from i
+                    prefix_node, prefix_clock, suffix_late = self._route_state(order, travel, duration,
+                                                                              opens, closes, weight)
+                else:
+                    i += 1
+        
+        return order
@@ -0,0 +1,163 @@
+"""
+GrowMaster Pro - Stage Timelines
+Growth stage transition dates computed once per plant from the knowledge base
+"""
+
+import bisect
+import json
+import logging
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple
+
+from data.knowledge_base.growing_guides import growing_knowledge
+
+logger = logging.getLogger(__name__)
+
+# Stage a plant stays in after the last timed stage
+FINAL_STAGE = 'harvest'
+
+def detect_profile(plant_type: Optional[str], strain: Optional[str] = None) -> str:
+    """Autoflower when the plant type or strain says so, photoperiod otherwise"""
+    text = f"{plant_type or ''} {strain or ''}".lower()
+    return 'autoflower' if 'auto' in text else 'photoperiod'
+
+@lru_cache(maxsize=None)
+def stage_start_days(plant_type: str = 'cannabis', profile: str = 'photoperiod') -> Tuple[Tuple[str, int], ...]:
+    """(stage, day after planting it starts) in growth order, ending with the final stage"""
+    starts = []
+    day = 0
+    for stage, duration in growing_knowledge.get_stage_durations(plant_type, profile):
+        starts.append((stage, day))
+        day += duration
+    starts.append((FINAL_STAGE, day))
+    return tuple(starts)
+
+def stage_for_day(days_since_planting: float, plant_type: str = 'cannabis', profile: str = 'photoperiod') -> str:
+    """Growth stage on a given day after planting"""
+    starts = stage_start_days(plant_type, profile)
+    index = bisect.bisect_right([day for _, day in starts], days_since_planting) - 1
+    return starts[max(0, index)][0]
+
+def build_timeline(planted_at: datetime, plant_type: str = 'cannabis',
+                   profile: str = 'photoperiod') -> List[Tuple[str, datetime]]:
+    """(stage, start datetime) for a plant planted at the given time"""
+    return [(stage, planted_at + timedelta(days=day)) for stage, day in stage_start_days(plant_type, profile)]
+
+def _position(timeline: List[Tuple[str, str]], now: str) -> Tuple[str, Optional[str], Optional[str]]:
+    """Current stage, next stage and next transition time (ISO strings) of a stored timeline"""
+    index = bisect.bisect_right([starts_at for _, starts_at in timeline], now) - 1
+    current = timeline[max(0, index)][0]
+    if index + 1 < len(timeline):
+        return current, timeline[index + 1][0], timeline[index + 1][1]
+    return current, None, None
+
+class StageTimelineStore:
+    """Per-plant stage timelines in the stage_timelines table
+    
+    Each row holds the plant's full transition list and its next transition
+    time, which is indexed. Finding the plants whose stage changes is one
+    range query over next_transition_at instead of re-deriving every plant's
+    stage from its age.
+    """
+    
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+    
+    def sync(self) -> int:
+        """Build timelines for plants without one or whose planting date changed"""
+        now = datetime.now().isoformat()
+        try:
+            with self.db_manager.get_connection() as conn:
+                plants = conn.execute("""
+                    SELECT p.id, p.garden_id, p.plant_type, p.strain_cultivar, p.planting_date
+                    FROM plants p
+                    LEFT JOIN stage_timelines t ON t.plant_id = p.id
+                    WHERE t.plant_id IS NULL OR t.planted_at != p.planting_date
+                """).fetchall()
+                if not plants:
+                    return 0
+                
+                rows = []
+                for plant_id, garden_id, plant_type, strain, planting_date in plants:
+                    try:
+                        planted_at = datetime.fromisoformat(str(planting_date))
+                    except ValueError:
+                        logger.warning(f"Plant {plant_id} has an invalid planting date: {planting_date}")
+                        continue
+                    
+                    profile = detect_profile(plant_type, strain)
+                    timeline = build_timeline(planted_at, (plant_type or 'cannabis').lower(), profile)
+                    timeline = [(stage, starts_at.isoformat()) for stage, starts_at in timeline]
+                    current, next_stage, next_at = _position(timeline, now)
+                    rows.append((plant_id, garden_id, profile, planting_date, json.dumps(timeline),
+                                 current, next_stage, next_at))
+                
+                conn.executemany("""
+                    INSERT OR REPLACE INTO stage_timelines
+                    (plant_id, garden_id, profile, planted_at, transitions, current_stage, next_stage, next_transition_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, rows)
+                conn.commit()
+                logger.info(f"Built stage timelines for {len(rows)} plants")
+                return len(rows)
+        
+        except Exception as e:
+            logger.error(f"Error building stage timelines: {e}")
+            return 0
+    
+    def next_transition_at(self) -> Optional[datetime]:
+        """Earliest upcoming stage transition of any plant"""
+        try:
+            with self.db_manager.get_connection() as conn:
+                row = conn.execute("SELECT MIN(next_transition_at) FROM stage_timelines").fetchone()
+            return datetime.fromisoformat(row[0]) if row and row[0] else None
+        except Exception as e:
+            logger.error(f"Error getting next stage transition: {e}")
+            return None
+    
+    def advance_due(self, now: datetime = None) -> List[Dict[str, Any]]:
+        """Move plants whose transition time has passed to their new stage
+        
+        Returns one entry per garden and stage change with the plants involved.
+        """
+        now = (now or datetime.now()).isoformat()
+        try:
+            with self.db_manager.get_connection() as conn:
+                due = conn.execute("""
+                    SELECT t.plant_id, t.garden_id, g.name, p.plant_name, t.transitions, t.current_stage
+                    FROM stage_timelines t
+                    JOIN plants p ON p.id = t.plant_id
+                    JOIN gardens g ON g.id = t.garden_id
+                    WHERE t.next_transition_at <= ?
+                """, (now,)).fetchall()
+                if not due:
+                    return []
+                
+                changes: Dict[tuple, Dict[str, Any]] = {}
+                timeline_rows, plant_rows = [], []
+                for plant_id, garden_id, garden_name, plant_name, transitions, previous in due:
+                    current, next_stage, next_at = _position(json.loads(transitions), now)
+                    timeline_rows.append((current, next_stage, next_at, plant_id))
+                    plant_rows.append((current, plant_id))
+                    
+                    change = changes.setdefault((garden_id, previous, current), {
+                        'garden_id': garden_id,
+                        'garden_name': garden_name,
+                        'from_stage': previous,
+                        'to_stage': current,
+                        'plants': []
+                    })
+                    change['plants'].append({'id': plant_id, 'name': plant_name})
+                
+                conn.executemany("""
+                    UPDATE stage_timelines SET current_stage = ?, next_stage = ?, next_transition_at = ?
+                    WHERE plant_id = ?
+                """, timeline_rows)
+                conn.executemany("UPDATE plants SET growth_stage = ? WHERE id = ?", plant_rows)
+                conn.commit()
+                return list(changes.values())
+        
+        except Exception as e:
+            logger.error(f"Error advancing stage timelines: {e}")
+            return []
@@ -0,0 +1,280 @@
+"""
+GrowMaster Pro - Task Dependency Graph
+Persistent task dependency DAG with incremental readiness propagation
+"""
+
+import logging
+from collections import defaultdict, deque
+from typing import Dict, List, Any, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+class TaskDependencyGraph:
+    """Directed acyclic graph of task dependencies backed by the task_dependencies table
+    
+    An edge A -> B means task B depends on task A. Each task keeps a counter of
+    its incomplete predecessors, so completing a task only touches its direct
+    successors and reports the ones that just became ready.
+    """
+    
+    def __init__(self, db_manager=None):
+        self.db_manager = db_manager
+        self.successors: Dict[int, Set[int]] = defaultdict(set)
+        self.predecessors: Dict[int, Set[int]] = defaultdict(set)
+        self.pending_count: Dict[int, int] = {}
+        self.completed: Set[int] = set()
+        self.durations: Dict[int, int] = {}
+        
+        if self.db_manager is not None:
+            self.load_from_database()
+    
+    def load_from_database(self):
+        """Rebuild the in-memory graph from the database"""
+        try:
+            edges, tasks = self.db_manager.get_task_dependencies()
+        except Exception as e:
+            logger.error(f"Error loading task dependencies: {e}")
+            return
+        
+        self.successors.clear()
+        self.predecessors.clear()
+        self.pending_count.clear()
+        self.completed.clear()
+        self.durations.clear()
+        
+        for task in tasks:
+            self._register_task(task['id'], task.get('estimated_duration'), bool(task.get('completed')))
+        
+        for edge in edges:
+            self._link(edge['depends_on_task_id'], edge['task_id'])
+        
+        logger.info(f"Loaded dependency graph with {len(self.pending_count)} tasks and {len(edges)} edges")
+    
+    def _register_task(self, task_id: int, duration: Optional[int] = None, completed: bool = False):
+        """Make sure a task is known to the graph"""
+        if task_id not in self.pending_count:
+            self.pending_count[task_id] = 0
+        if duration is not None:
+            self.durations[task_id] = duration
+        if completed:
+            self.completed.add(task_id)
+    
+    def _link(self, depends_on_task_id: int, task_id: int):
+        """Add an edge to the in-memory graph and update the readiness counter"""
+        self._register_task(depends_on_task_id)
+        self._register_task(task_id)
+        if task_id in self.successors[depends_on_task_id]:
+            return
+        
+        self.successors[depends_on_task_id].add(task_id)
+        self.predecessors[task_id].add(depends_on_task_id)
+        if depends_on_task_id not in self.completed:
+            self.pending_count[task_id] += 1
+    
+    def _unlink(self, depends_on_task_id: int, task_id: int):
+        """Remove an edge from the in-memory graph and update the readiness counter"""
+        if task_id not in self.successors.get(depends_on_task_id, ()):
+            return
+        
+        self.successors[depends_on_task_id].discard(task_id)
+        self.predecessors[task_id].discard(depends_on_task_id)
+        if depends_on_task_id not in self.completed:
+            self.pending_count[task_id] -= 1
+    
+    def _reaches(self, start_id: int, target_id: int) -> bool:
+        """Check whether target is reachable from start along dependency edges"""
+        stack = [start_id]
+        seen = {start_id}
+        while stack:
+            node = stack.pop()
+            if node == target_id:
+                return True
+            for successor in self.successors.get(node, ()):
+                if successor not in seen:
+                    seen.add(successor)
+                    stack.append(successor)
+        return False
+    
+    def add_dependency(self, task_id: int, depends_on_task_id: int) -> bool:
+        """Make task_id wait on depends_on_task_id, rejecting edges that create a cycle"""
+        if task_id == depends_on_task_id or self._reaches(task_id, depends_on_task_id):
+            logger.warning(f"Rejected dependency {depends_on_task_id} -> {task_id}: would create a cycle")
+            return False
+        
+        if self.db_manager is not None and not self.db_manager.add_task_dependency(task_id, depends_on_task_id):
+            return False
+        
+        self._link(depends_on_task_id, task_id)
+        return True
+    
+    def remove_dependency(self, task_id: int, depends_on_task_id: int) -> bool:
+        """Remove a dependency between two tasks"""
+        if self.db_manager is not None and not self.db_manager.remove_task_dependency(task_id, depends_on_task_id):
+            return False
+        
+        self._unlink(depends_on_task_id, task_id)
+        return True
+    
+    def remove_task(self, task_id: int):
+        """Forget a deleted task and release the tasks waiting on it"""
+        for successor in list(self.successors.get(task_id, ())):
+            self._unlink(task_id, successor)
+        for predecessor in list(self.predecessors.get(task_id, ())):
+            self._unlink(predecessor, task_id)
+        
+        self.successors.pop(task_id, None)
+        self.predecessors.pop(task_id, None)
+        self.pending_count.pop(task_id, None)
+        self.durations.pop(task_id, None)
+        self.completed.discard(task_id)
+    
+    def is_ready(self, task_id: int) -> bool:
+        """Check if all dependencies of a task are completed"""
+        return self.pending_count.get(task_id, 0) == 0
+    
+    def ready_tasks(self) -> List[int]:
+        """Get incomplete tasks whose dependencies are all completed"""
+        return [task_id for task_id, count in self.pending_count.items()
+                if count == 0 and task_id not in self.completed]
+    
+    def mark_completed(self, task_id: int) -> List[int]:
+        """Record a completed task and return the tasks that just became ready
+        
+        Only the direct successors of the task are visited.
+        """
+        if task_id in self.completed:
+            return []
+        
+        self._register_task(task_id, completed=True)
+        newly_ready = []
+        for successor in self.successors.get(task_id, ()):
+            self.pending_count[successor] -= 1
+            if self.pending_count[successor] == 0 and successor not in self.completed:
+                newly_ready.append(successor)
+        
+        return newly_ready
+    
+    def mark_reopened(self, task_id: int):
+        """Record that a completed task is pending again, blocking its successors"""
+        if task_id not in self.completed:
+            return
+        
+        self.completed.discard(task_id)
+        for successor in self.successors.get(task_id, ()):
+            self.pending_count[successor] += 1
+    
+    def complete_task(self, task_id: int) -> List[int]:
+        """Complete a task in the database and propagate readiness to its successors"""
+        if task_id in self.completed:
+            return []
+        
+        # The change listener may record the completion first, so work out the answer up front
+        becoming_ready = [successor for successor in self.successors.get(task_id, ())
+                          if self.pending_count[successor] == 1 and successor not in self.completed]
+        
+        if self.db_manager is not None and not self.db_manager.complete_task(task_id):
+            return []
+        self.mark_completed(task_id)
+        return becoming_ready
+    
+    def on_task_changed(self, change_type: str, task_id: Optional[int] = None):
+        """Keep readiness current when tasks change anywhere in the app
+        
+        Registered with DatabaseManager.add_task_change_listener, so completions
+        and deletions from the GUI or the schedulers propagate incrementally.
+        Garden changes (which may cascade task deletions) reload the graph;
+        newly created tasks carry no dependencies and are ignored.
+        """
+        if change_type == 'completed' and task_id is not None:
+            newly_ready = self.mark_completed(task_id)
+            if newly_ready:
+                logger.info(f"Completing task {task_id} made tasks {sorted(newly_ready)} ready")
+        elif change_type == 'reopened' and task_id is not None:
+            self.mark_reopened(task_id)
+        elif change_type == 'deleted' and task_id is not None:
+            self.remove_task(task_id)
+        elif change_type == 'garden':
+            if self.db_manager is not None:
+                self.load_from_database()
+    
+    def topological_order(self) -> List[int]:
+        """Get all tasks in dependency order (Kahn's algorithm)
+        
+        Raises ValueError if the stored graph contains a cycle.
+        """
+        in_degree = {task_id: len(self.predecessors.get(task_id, ())) for task_id in self.pending_count}
+        queue = deque(task_id for task_id, degree in in_degree.items() if degree == 0)
+        order = []
+        
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for successor in self.successors.get(node, ()):
+                in_degree[successor] -= 1
+                if in_degree[successor] == 0:
+                    queue.append(successor)
+        
+        if len(order) != len(in_degree):
+            cyclic = sorted(task_id for task_id, degree in in_degree.items() if degree > 0)
+            raise ValueError(f"Task dependencies contain a cycle involving tasks {cyclic}")
+        
+        return order
+    
+    def find_cycle(self) -> List[int]:
+        """Return the tasks on one dependency cycle, or an empty list if the graph is acyclic"""
+        white, grey, black = 0, 1, 2
+        color = {task_id: white for task_id in self.pending_count}
+        parent: Dict[int, int] = {}
+        
+        for root in self.pending_count:
+            if color[root] != white:
+                continue
+            stack = [(root, iter(self.successors.get(root, ())))]
+            color[root] = grey
+            while stack:
+                node, children = stack[-1]
+                child = next(children, None)
+                if child is None:
+                    color[node] = black
+                    stack.pop()
+                elif color[child] == white:
+                    color[child] = grey
+                    parent[child] = node
+                    stack.append((child, iter(self.successors.get(child, ()))))
+                elif color[child] == grey:
+                    cycle = [node]
+                    while cycle[-1] != child:
+                        cycle.append(parent[cycle[-1]])
+                    return list(reversed(cycle))
+        
+        return []
+    
+    def critical_path(self, default_duration: int = 30) -> Dict[str, Any]:
+        """Find the longest chain of incomplete tasks weighted by estimated duration"""
+        finish: Dict[int, int] = {}
+        previous: Dict[int, Optional[int]] = {}
+        
+        for task_id in self.topological_order():
+            if task_id in self.completed:
+                continue
+            
+            duration = self.durations.get(task_id) or default_duration
+            best_start, best_parent = 0, None
+            for predecessor in self.predecessors.get(task_id, ()):
+                if predecessor in finish and finish[predecessor] > best_start:
+                    best_start, best_parent = finish[predecessor], predecessor
+            
+            finish[task_id] = best_start + duration
+            previous[task_id] = best_parent
+        
+        if not finish:
+            return {'path': [], 'total_duration': 0}
+        
+        end_task = max(finish, key=finish.get)
+        path = []
+        node: Optional[int] = end_task
+        while node is not None:
+            path.append(node)
+            node = previous[node]
+        
+        return {'path': list(reversed(path)), 'total_duration': finish[end_task]}
@@ -6,15 +6,52 @@ Intelligent task scheduling based on growth stages and environmental conditions
 from datetime import datetime, timedelta, date
 from typing import Dict, List, Optional, Any, Tuple
 import logging
+import re
 from enum import Enum
+from functools import lru_cache
+from types import MappingProxyType
 
 from ..models.task import Task
 from ..models import TaskType, TaskPriority as Priority, TaskStatus, GrowthStage
 from ..models.garden import Garden
+from .trigger_engine import TriggerEngine, StreamingTriggerEvaluator, load_latest_readings, readings_from_rows
 from data.knowledge_base.growing_guides import growing_knowledge
 
 logger = logging.getLogger(__name__)
 
+# Title keyword -> task type; when a title holds several keywords the one listed first wins
+TASK_TYPE_KEYWORDS = (
+    ("water", TaskType.WATERING.value),
+    ("feed", TaskType.FEEDING.value),
+    ("nutrient", TaskType.FEEDING.value),
+    ("transplant", TaskType.TRANSPLANTING.value),
+    ("prune", TaskType.PRUNING.value),
+    ("train", TaskType.TRAINING.value),
+    ("harvest", TaskType.HARVEST.value),
+    ("check", TaskType.MONITORING.value),
+    ("inspect", TaskType.INSPECTION.value),
+    ("light", TaskType.LIGHTING.value),
+    ("environment", TaskType.ENVIRONMENTAL.value)
+)
+
+# One pass finds every keyword occurrence; the lookahead keeps overlapping ones
+_TASK_TYPE_PATTERN = re.compile("(?=(" + "|".join(re.escape(keyword) for keyword, _ in TASK_TYPE_KEYWORDS) + "))")
+_TASK_TYPE_RANK = {keyword: rank for rank, (keyword, _) in enumerate(TASK_TYPE_KEYWORDS)}
+
+@lru_cache(maxsize=4096)
+def classify_task_type(title: str) -> str:
+    """Task type for a task title or template name"""
+    ranks = [_TASK_TYPE_RANK[match.group(1)] for match in _TASK_TYPE_PATTERN.finditer(title.lower())]
+    return TASK_TYPE_KEYWORDS[min(ranks)][1] if ranks else TaskType.GENERAL.value
+
+def _freeze(value: Any) -> Any:
+    """Read-only copy of nested rule data: dicts become mapping proxies and lists tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
 class SchedulingRule(Enum):
     """Task scheduling rule types"""
     GROWTH_STAGE_BASED = "growth_stage"
@@ -30,10 +67,14 @@ class TaskScheduler:
         self.db_manager = database_manager
         self.scheduling_rules = self.load_scheduling_rules()
         self.task_templates = self.load_task_templates()
+        self.trigger_engine = TriggerEngine(self.scheduling_rules["environmental_triggers"])
+        self.trigger_stream = StreamingTriggerEvaluator(self.scheduling_rules["environmental_triggers"])
     
-    def load_scheduling_rules(self) -> Dict:
-        """Load comprehensive scheduling rules"""
-        return {
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def load_scheduling_rules() -> Dict:
+        """Load comprehensive scheduling rules (built once and shared read-only by every scheduler)"""
+        return _freeze({
             "growth_stage_transitions": {
                 "germination_to_seedling": {
                     "trigger_days": 7,
@@ -76,24 +117,41 @@ class TaskScheduler:
                 ]
             },
             "environmental_triggers": {
+                # Streaming options: readings are averaged over window_seconds, the condition
+                # must hold for min_duration_seconds, the trigger re-arms once clear_condition
+                # holds and fires at most once per cooldown_seconds per garden
                 "high_temperature": {
                     "condition": "temperature > 85",
+                    "clear_condition": "temperature < 83",
+                    "window_seconds": 60,
+                    "min_duration_seconds": 300,
+                    "cooldown_seconds": 3600,
                     "tasks": ["increase_ventilation", "check_cooling", "stress_monitoring"]
                 },
                 "low_humidity": {
                     "condition": "humidity < 40",
+                    "clear_condition": "humidity > 43",
+                    "window_seconds": 60,
+                    "min_duration_seconds": 300,
+                    "cooldown_seconds": 3600,
                     "tasks": ["add_humidifier", "check_vpd", "leaf_inspection"]
                 },
                 "ph_drift": {
                     "condition": "abs(ph - target_ph) > 0.5",
+                    "clear_condition": "abs(ph - target_ph) < 0.3",
+                    "window_seconds": 300,
+                    "min_duration_seconds": 900,
+                    "cooldown_seconds": 21600,
                     "tasks": ["ph_adjustment", "reservoir_check", "nutrient_analysis"]
                 }
             }
-        }
+        })
     
-    def load_task_templates(self) -> Dict:
-        """Load comprehensive task templates"""
-        return {
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def load_task_templates() -> Dict:
+        """Load comprehensive task templates (built once and shared read-only by every scheduler)"""
+        return _freeze({
             "transplant_seedlings": {
                 "title": "Transplant Seedlings",
                 "description": "Move seedlings from starter medium to final containers",
@@ -174,9 +232,9 @@ class TaskScheduler:
                     "Monitor plants for stress response"
                 ]
             }
-        }
+        })
     
-    def create_growth_stage_schedule(self, plant_id: int, garden_id: int, 
+    def create_growth_stage_schedule(self, plant_id: Optional[int], garden_id: int, 
                                    current_stage: GrowthStage, 
                                    stage_start_date: date) -> List[Dict]:
         """Create schedule for specific growth stage"""
@@ -205,6 +263,7 @@ class TaskScheduler:
                 "priority": task_info.get("priority", "medium"),
                 "due_date": due_date,
                 "growth_stage": current_stage.value,
+                "template_name": task_info["task"],
                 "auto_generated": True
             }
             
@@ -214,26 +273,7 @@ class TaskScheduler:
     
     def _determine_task_type(self, task_description: str) -> str:
         """Determine task type from description"""
-        task_keywords = {
-            "water": TaskType.WATERING.value,
-            "feed": TaskType.FEEDING.value,
-            "nutrient": TaskType.FEEDING.value,
-            "transplant": TaskType.TRANSPLANTING.value,
-            "prune": TaskType.PRUNING.value,
-            "train": TaskType.TRAINING.value,
-            "harvest": TaskType.HARVESTING.value,
-            "check": TaskType.MONITORING.value,
-            "inspect": TaskType.INSPECTION.value,
-            "light": TaskType.LIGHTING.value,
-            "environment": TaskType.ENVIRONMENTAL.value
-        }
-        
-        task_lower = task_description.lower()
-        for keyword, task_type in task_keywords.items():
-            if keyword in task_lower:
-                return task_type
-        
-        return TaskType.GENERAL.value
+        return classify_task_type(task_description)
     
     def schedule_recurring_tasks(self, garden_id: int, start_date: date, 
                                end_date: date) -> List[Dict]:
@@ -252,6 +292,7 @@ class TaskScheduler:
                     "priority": task_template["priority"],
                     "due_date": current_date,
                     "recurring_pattern": "daily",
+                    "template_name": task_template["task"],
                     "auto_generated": True
                 }
                 scheduled_tasks.append(task_data)
@@ -266,6 +307,7 @@ class TaskScheduler:
                         "priority": task_template["priority"],
                         "due_date": current_date,
                         "recurring_pattern": "weekly",
+                        "template_name": task_template["task"],
                         "auto_generated": True
                     }
                     scheduled_tasks.append(task_data)
@@ -280,6 +322,7 @@ class TaskScheduler:
                         "priority": task_template["priority"],
                         "due_date": current_date,
                         "recurring_pattern": "monthly",
+                        "template_name": task_template["task"],
                         "auto_generated": True
                     }
                     scheduled_tasks.append(task_data)
@@ -294,40 +337,87 @@ class TaskScheduler:
         
         triggered_tasks = []
         
-        for trigger_name, trigger_config in self.scheduling_rules["environmental_triggers"].items():
-            condition = trigger_config["condition"]
-            
-            # Simple condition evaluation (in production, use safer evaluation)
+        for trigger_name in self.trigger_engine.evaluate(environmental_data):
+            triggered_tasks.extend(self._create_trigger_tasks(garden_id, trigger_name))
+        
+        return triggered_tasks
+    
+    def check_all_environmental_triggers(self, readings: Dict = None) -> List[Dict]:
+        """Check trigger conditions for every garden at once
+        
+        readings maps condition names to arrays with one value per garden plus
+        a 'garden_id' array; by default the latest stored reading of each
+        garden is used.
+        """
+        if readings is None:
+            if not self.db_manager:
+                return []
             try:
-                # Replace variables in condition with actual values
-                eval_condition = condition
-                for key, value in environmental_data.items():
-                    eval_condition = eval_condition.replace(key, str(value))
-                
-                # Add target values for comparison
-                if "target_ph" in eval_condition:
-                    eval_condition = eval_condition.replace("target_ph", "6.0")
-                
-                if eval(eval_condition):
-                    # Trigger condition met, create tasks
-                    for task_name in trigger_config["tasks"]:
-                        task_data = {
-                            "garden_id": garden_id,
-                            "title": task_name.replace("_", " ").title(),
-                            "description": f"Environmental trigger: {trigger_name}",
-                            "task_type": self._determine_task_type(task_name),
-                            "priority": "high",
-                            "due_date": datetime.now().date(),
-                            "environmental_trigger": trigger_name,
-                            "auto_generated": True
-                        }
-                        triggered_tasks.append(task_data)
-                        
+                readings = load_latest_readings(self.db_manager)
             except Exception as e:
-                logger.error(f"Error evaluating environmental trigger {trigger_name}: {e}")
+                logger.error(f"Error loading environmental readings: {e}")
+                return []
+        
+        triggered_tasks = []
+        garden_ids = readings["garden_id"]
+        for trigger_name, fired in self.trigger_engine.evaluate_batch(readings).items():
+            for garden_id in garden_ids[fired]:
+                triggered_tasks.extend(self._create_trigger_tasks(int(garden_id), trigger_name))
         
         return triggered_tasks
     
+    def process_environmental_readings(self, readings: Dict, timestamp: float = None) -> List[Dict]:
+        """Feed live sensor readings through the streaming trigger evaluator
+        
+        readings maps condition names to arrays with one value per garden plus
+        a 'garden_id' array. Only sustained conditions create tasks.
+        """
+        if timestamp is None:
+            timestamp = datetime.now().timestamp()
+        
+        triggered_tasks = []
+        for garden_id, trigger_name in self.trigger_stream.update(readings, timestamp):
+            triggered_tasks.extend(self._create_trigger_tasks(garden_id, trigger_name))
+        
+        return triggered_tasks
+    
+    def on_readings_recorded(self, readings: List[Dict]) -> List[Dict]:
+        """Stream newly recorded readings through the trigger evaluator and save the tasks they trigger
+        
+        Registered with DatabaseManager.add_reading_listener. Readings are fed
+        in reading_time order, one evaluator update per timestamp.
+        """
+        by_time: Dict[str, List[Dict]] = {}
+        for reading in readings:
+            by_time.setdefault(str(reading['reading_time']), []).append(reading)
+        
+        triggered_tasks = []
+        for reading_time in sorted(by_time):
+            timestamp = datetime.fromisoformat(reading_time).timestamp()
+            triggered_tasks.extend(self.process_environmental_readings(readings_from_rows(by_time[reading_time]),
+                                                                       timestamp))
+        
+        if triggered_tasks and self.db_manager:
+            self.db_manager.insert_generated_tasks(triggered_tasks)
+        return triggered_tasks
+    
+    def _create_trigger_tasks(self, garden_id: int, trigger_name: str) -> List[Dict]:
+        """Create the tasks of a trigger whose condition was met"""
+        tasks = []
+        for task_name in self.scheduling_rules["environmental_triggers"][trigger_name]["tasks"]:
+            tasks.append({
+                "garden_id": garden_id,
+                "title": task_name.replace("_", " ").title(),
+                "description": f"Environmental trigger: {trigger_name}",
+                "task_type": self._determine_task_type(task_name),
+                "priority": "high",
+                "due_date": datetime.now().date(),
+                "environmental_trigger": trigger_name,
+                "template_name": task_name,
+                "auto_generated": True
+            })
+        return tasks
+    
     def optimize_task_schedule(self, tasks: List[Dict], 
                              constraints: Dict = None) -> List[Dict]:
         """Optimize task schedule based on constraints and dependencies"""
@@ -340,46 +430,61 @@ class TaskScheduler:
             }
         
         optimized_tasks = []
+        max_duration = constraints["max_daily_duration"]
         
         # Group tasks by date
         tasks_by_date = {}
         for task in tasks:
-            date_str = str(task["due_date"])
-            if date_str not in tasks_by_date:
-                tasks_by_date[date_str] = []
-            tasks_by_date[date_str].append(task)
+            task_date = datetime.strptime(str(task["due_date"])[:10], "%Y-%m-%d").date()
+            tasks_by_date.setdefault(task_date, []).append(task)
+        
+        # Fill each day in order; tasks that do not fit roll over to the next day,
+        # where they compete with that day's own tasks for its capacity
+        carried_over = []
+        current_date = min(tasks_by_date) if tasks_by_date else None
         
-        # Optimize each day's schedule
-        for date_str, daily_tasks in tasks_by_date.items():
+        while current_date is not None:
+            daily_tasks = carried_over + tasks_by_date.pop(current_date, [])
+            
             # Sort by priority and estimated duration
             daily_tasks.sort(key=lambda x: (
                 self._priority_weight(x.get("priority", "medium")),
                 -x.get("estimated_duration", 30)
             ))
             
-            # Check total duration for the day
-            total_duration = sum(task.get("estimated_duration", 30) for task in daily_tasks)
-            
-            if total_duration > constraints["max_daily_duration"]:
-                # Reschedule some tasks to next available day
-                current_duration = 0
-                for i, task in enumerate(daily_tasks):
-                    task_duration = task.get("estimated_duration", 30)
-                    if current_duration + task_duration <= constraints["max_daily_duration"]:
-                        current_duration += task_duration
-                        optimized_tasks.append(task)
-                    else:
-                        # Move to next day
-                        original_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-                        new_date = original_date + timedelta(days=1)
-                        task["due_date"] = new_date
+            current_duration = 0
+            carried_over = []
+            for task in daily_tasks:
+                task_duration = task.get("estimated_duration", 30)
+                # A task longer than a whole day still gets a day to itself
+                if current_duration + task_duration <= max_duration or current_duration == 0:
+                    current_duration += task_duration
+                    if str(task["due_date"])[:10] != current_date.isoformat():
+                        task["due_date"] = current_date
                         task["rescheduled"] = True
-                        optimized_tasks.append(task)
+                    optimized_tasks.append(task)
+                else:
+                    carried_over.append(task)
+            
+            if carried_over:
+                current_date += timedelta(days=1)
             else:
-                optimized_tasks.extend(daily_tasks)
+                current_date = min(tasks_by_date) if tasks_by_date else None
         
         return optimized_tasks
     
+    def save_scheduled_tasks(self, tasks: List[Dict]) -> int:
+        """Persist generated tasks in one batch, skipping already scheduled occurrences"""
+        if not self.db_manager:
+            logger.warning("No database manager available, scheduled tasks not saved")
+            return 0
+        
+        try:
+            return self.db_manager.insert_generated_tasks(tasks)
+        except Exception as e:
+            logger.error(f"Error saving scheduled tasks: {e}")
+            return 0
+    
     def _priority_weight(self, priority: str) -> int:
         """Convert priority to numeric weight for sorting"""
         weights = {
@@ -390,10 +495,15 @@ class TaskScheduler:
         }
         return weights.get(priority, 3)
     
-    def generate_feeding_schedule(self, plant_id: int, garden_id: int, 
+    def generate_feeding_schedule(self, plant_id: Optional[int], garden_id: int, 
                                 growth_stage: GrowthStage, 
-                                feeding_frequency_days: int = 7) -> List[Dict]:
-        """Generate nutrient feeding schedule"""
+                                feeding_frequency_days: int = 7,
+                                start_date: Optional[date] = None) -> List[Dict]:
+        """Generate nutrient feeding schedule
+        
+        Weeks are counted from start_date (today by default); pass a fixed
+        anchor such as the stage start so re-running yields the same dates.
+        """
         
         feeding_tasks = []
         
@@ -401,7 +511,7 @@ class TaskScheduler:
         recipe = growing_knowledge.get_nutrient_recipe("lucas_formula", growth_stage.value)
         
         # Calculate feeding dates for next 12 weeks
-        start_date = datetime.now().date()
+        start_date = start_date or datetime.now().date()
         for week in range(12):
             feeding_date = start_date + timedelta(weeks=week)
             
@@ -416,14 +526,15 @@ class TaskScheduler:
                 "supplies_needed": list(recipe.get("nutrients", {}).keys()) if recipe else [],
                 "feeding_recipe": recipe,
                 "estimated_duration": 45,
-                "recurring_pattern": f"every_{feeding_frequency_days}_days"
+                "recurring_pattern": f"every_{feeding_frequency_days}_days",
+                "template_name": "nutrient_feeding"
             }
             
             feeding_tasks.append(task_data)
         
         return feeding_tasks
     
-    def create_harvest_schedule(self, plant_id: int, garden_id: int,
+    def create_harvest_schedule(self, plant_id: Optional[int], garden_id: int,
                               estimated_harvest_date: date) -> List[Dict]:
         """Create pre-harvest and harvest task schedule"""
         
@@ -436,7 +547,7 @@ class TaskScheduler:
             "plant_id": plant_id,
             "title": "Begin Harvest Preparation",
             "description": "Start flush, check trichomes, prepare drying space",
-            "task_type": TaskType.HARVESTING.value,
+            "task_type": TaskType.HARVEST.value,
             "priority": Priority.HIGH.value,
             "due_date": pre_harvest_date,
             "estimated_duration": 60
@@ -462,7 +573,7 @@ class TaskScheduler:
             "plant_id": plant_id,
             "title": "Harvest Day",
             "description": "Cut, weigh, and begin drying process",
-            "task_type": TaskType.HARVESTING.value,
+            "task_type": TaskType.HARVEST.value,
             "priority": Priority.CRITICAL.value,
             "due_date": estimated_harvest_date,
             "estimated_duration": 180,
@@ -475,10 +586,63 @@ class TaskScheduler:
             "plant_id": plant_id,
             "title": "Begin Curing Process",
             "description": "Move dried material to curing containers",
-            "task_type": TaskType.PROCESSING.value,
+            "task_type": TaskType.HARVEST.value,
             "priority": Priority.HIGH.value,
             "due_date": estimated_harvest_date + timedelta(days=7),
             "estimated_duration": 90
         })
         
         return harvest_tasks
+
+    def schedule_cohort(self, cohort: Dict, exceptions: Optional[List[Dict]] = None) -> List[Dict]:
+        """Create stage, feeding and harvest tasks once for a whole cohort
+        
+        Plants flagged as cohort exceptions are left out of the cohort's tasks
+        and get their own per-plant schedule instead.
+        """
+        exceptions = exceptions or []
+        garden_id = cohort['garden_id']
+        stage = GrowthStage(cohort['growth_stage'])
+        stage_start = date.fromisoformat(str(cohort.get('stage_start_date') or cohort['planting_date'])[:10])
+        harvest_date = cohort.get('expected_harvest_date')
+        harvest_date = date.fromisoformat(str(harvest_date)[:10]) if harvest_date else None
+        
+        def plan(plant_id: Optional[int]) -> List[Dict]:
+            tasks = self.create_growth_stage_schedule(plant_id, garden_id, stage, stage_start)
+            tasks += self.generate_feeding_schedule(plant_id, garden_id, stage, start_date=stage_start)
+            if harvest_date:
+                tasks += self.create_harvest_schedule(plant_id, garden_id, harvest_date)
+            return tasks
+        
+        plant_count = cohort.get('live_plants', cohort['plant_count']) - len(exceptions)
+        scheduled_tasks = []
+        if plant_count > 0:
+            for task in plan(None):
+                task["cohort_id"] = cohort['id']
+                task.setdefault("template_name", task["title"])
+                task["title"] = f"{task['title']} ({cohort['cohort_name']}, {plant_count} plants)"
+                task["description"] = f"{task.get('description', '')} - applies to {plant_count} plants of cohort {cohort['cohort_name']}"
+                scheduled_tasks.append(task)
+        
+        for plant in exceptions:
+            for task in plan(plant['id']):
+                task["title"] = f"{task['title']} ({plant['plant_name']})"
+                task["notes"] = f"Cohort exception: {plant.get('cohort_exception')}"
+                scheduled_tasks.append(task)
+        
+        return scheduled_tasks
+    
+    def schedule_garden_cohorts(self, garden_id: int) -> int:
+        """Schedule every cohort of a garden and save the tasks"""
+        if not self.db_manager:
+            logger.warning("No database manager available, cohorts not scheduled")
+            return 0
+        
+        try:
+            tasks = []
+            for cohort in self.db_manager.get_plant_cohorts(garden_id):
+                tasks.extend(self.schedule_cohort(cohort, self.db_manager.get_cohort_exceptions(cohort['id'])))
+            return self.save_scheduled_tasks(tasks)
+        except Exception as e:
+            logger.error(f"Error scheduling cohorts for garden {garden_id}: {e}")
+            return 0
@@ -0,0 +1,373 @@
+"""
+GrowMaster Pro - Environmental Trigger Engine
+Safe, compiled evaluation of environmental trigger conditions over many gardens
+"""
+
+import ast
+import logging
+import operator
+from functools import lru_cache
+from typing import Dict, List, Any, Callable, Optional, Set
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Values conditions may refer to without a reading for them
+DEFAULT_TRIGGER_CONSTANTS = {'target_ph': 6.0}
+
+# environmental_readings columns and the names conditions use for them
+READING_COLUMNS = {
+    'temperature': 'temperature',
+    'humidity': 'humidity',
+    'ph_level': 'ph',
+    'ec_ppm': 'ec',
+    'light_ppfd': 'ppfd',
+    'co2_ppm': 'co2'
+}
+
+_COMPARISONS = {
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal
+}
+
+_ARITHMETIC = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: np.true_divide
+}
+
+_FUNCTIONS = {
+    'abs': lambda *args: np.abs(*args),
+    'min': lambda *args: _reduce(np.minimum, args),
+    'max': lambda *args: _reduce(np.maximum, args)
+}
+
+def _reduce(function, args):
+    result = args[0]
+    for arg in args[1:]:
+        result = function(result, arg)
+    return result
+
+class TriggerCompileError(ValueError):
+    """Raised when a trigger condition is not a safe arithmetic/comparison expression"""
+
+class CompiledCondition:
+    """A trigger condition parsed once and compiled to a NumPy closure
+    
+    Only numbers, variable names, arithmetic (+ - * /), comparisons, and/or/not
+    and the functions abs/min/max are accepted. The compiled function works on
+    scalars and on arrays holding one value per garden; a result is False
+    wherever a referenced value is missing (NaN).
+    """
+    
+    def __init__(self, source: str):
+        self.source = source
+        try:
+            tree = ast.parse(source.strip(), mode='eval')
+        except SyntaxError as e:
+            raise TriggerCompileError(f"Invalid trigger condition '{source}': {e.msg}") from e
+        
+        self.variables: Set[str] = set()
+        self._function = self._compile(tree.body)
+    
+    def _compile(self, node: ast.AST) -> Callable[[Dict[str, Any]], Any]:
+        """Turn one whitelisted AST node into a closure over the value mapping"""
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+            value = float(node.value)
+            return lambda values: value
+        
+        if isinstance(node, ast.Name):
+            name = node.id
+            self.variables.add(name)
+            return lambda values: values[name]
+        
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd, ast.Not)):
+            operand = self._compile(node.operand)
+            if isinstance(node.op, ast.USub):
+                return lambda values: -operand(values)
+            if isinstance(node.op, ast.Not):
+                return lambda values: np.logical_not(operand(values))
+            return operand
+        
+        if isinstance(node, ast.BinOp) and type(node.op) in _ARITHMETIC:
+            function = _ARITHMETIC[type(node.op)]
+            left, right = self._compile(node.left), self._compile(node.right)
+            return lambda values: function(left(values), right(values))
+        
+        if isinstance(node, ast.BoolOp):
+            function = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            parts = [self._compile(value) for value in node.values]
+            return lambda values: _reduce(function, [part(values) for part in parts])
+        
+        if isinstance(node, ast.Compare):
+            operands = [self._compile(node.left)] + [self._compile(comparator) for comparator in node.comparators]
+            for op in node.ops:
+                if type(op) not in _COMPARISONS:
+                    raise TriggerCompileError(f"Unsupported comparison in '{self.source}'")
+            comparisons = [_COMPARISONS[type(op)] for op in node.ops]
+            
+            def compare(values):
+                evaluated = [operand(values) for operand in operands]
+                results = [comparison(evaluated[i], evaluated[i + 1]) for i, comparison in enumerate(comparisons)]
+                return _reduce(np.logical_and, results)
+            return compare
+        
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS
+                and not node.keywords and node.args):
+            function = _FUNCTIONS[node.func.id]
+            args = [self._compile(arg) for arg in node.args]
+            return lambda values: function(*[arg(values) for arg in args])
+        
+        raise TriggerCompileError(f"Unsupported {type(node).__name__} in trigger condition '{self.source}'")
+    
+    def evaluate(self, values: Dict[str, Any]) -> Any:
+        """Evaluate for scalars or per-garden arrays; missing names or NaN values give False"""
+        if any(name not in values for name in self.variables):
+            return False
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = np.asarray(self._function(values), dtype=bool)
+            for name in self.variables:
+                result = result & ~np.isnan(np.asarray(values[name], dtype=float))
+        return result if result.ndim else bool(result)
+
+@lru_cache(maxsize=256)
+def compile_condition(source: str) -> CompiledCondition:
+    """Compile a condition once; engines built from the same rules share the result"""
+    return CompiledCondition(source)
+
+class TriggerEngine:
+    """Compiled set of environmental triggers
+    
+    Conditions are compiled once when the engine is built; invalid ones are
+    logged and skipped. evaluate checks one garden's readings, evaluate_batch
+    checks arrays of readings for all gardens at once.
+    """
+    
+    def __init__(self, triggers: Dict[str, Dict[str, Any]], constants: Optional[Dict[str, float]] = None):
+        self.triggers = triggers
+        self.constants = dict(DEFAULT_TRIGGER_CONSTANTS)
+        self.constants.update(constants or {})
+        self.conditions: Dict[str, CompiledCondition] = {}
+        
+        for trigger_name, trigger_config in triggers.items():
+            try:
+                self.conditions[trigger_name] = compile_condition(trigger_config['condition'])
+            except TriggerCompileError as e:
+                logger.error(f"Skipping environmental trigger {trigger_name}: {e}")
+    
+    def _with_constants(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        merged = dict(self.constants)
+        merged.update(values)
+        return merged
+    
+    def evaluate(self, environmental_data: Dict[str, Any]) -> List[str]:
+        """Get the names of triggers whose condition holds for one set of readings"""
+        values = {}
+        for key, value in self._with_constants(environmental_data).items():
+            try:
+                values[key] = float(value) if value is not None else np.nan
+            except (TypeError, ValueError):
+                continue
+        
+        return [trigger_name for trigger_name, condition in self.conditions.items() if condition.evaluate(values)]
+    
+    def evaluate_batch(self, readings: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Evaluate every trigger over per-garden arrays and return a boolean mask per trigger"""
+        values = {key: np.asarray(value, dtype=float) for key, value in self._with_constants(readings).items()}
+        size = max((value.size for value in values.values() if value.ndim), default=0)
+        
+        masks = {}
+        for trigger_name, condition in self.conditions.items():
+            result = condition.evaluate(values)
+            masks[trigger_name] = np.broadcast_to(np.asarray(result, dtype=bool), (size,))
+        return masks
+
+class StreamingTriggerEvaluator:
+    """Streaming trigger evaluation for continuous sensor readings
+    
+    Readings are smoothed per garden with an exponential moving average over
+    the trigger's window_seconds. A trigger fires once its condition has held
+    for min_duration_seconds, then stays latched until clear_condition holds
+    (the hysteresis band; by default the condition simply stops holding) and
+    cannot fire again for a garden within cooldown_seconds. State is a fixed
+    set of arrays per trigger with one slot per garden, updated with NumPy
+    for all gardens in a batch.
+    """
+    
+    def __init__(self, triggers: Dict[str, Dict[str, Any]], constants: Optional[Dict[str, float]] = None):
+        self.constants = dict(DEFAULT_TRIGGER_CONSTANTS)
+        self.constants.update(constants or {})
+        self.slots: Dict[int, int] = {}  # garden id -> state slot
+        self.capacity = 0
+        self.states: Dict[str, Dict[str, Any]] = {}
+        
+        for trigger_name, trigger_config in triggers.items():
+            try:
+                condition = compile_condition(trigger_config['condition'])
+                clear_source = trigger_config.get('clear_condition')
+                clear = compile_condition(clear_source) if clear_source else None
+            except TriggerCompileError as e:
+                logger.error(f"Skipping streaming trigger {trigger_name}: {e}")
+                continue
+            
+            variables = sorted((condition.variables | (clear.variables if clear else set())) - set(self.constants))
+            self.states[trigger_name] = {
+                'condition': condition,
+                'clear': clear,
+                'variables': variables,
+                'window': float(trigger_config.get('window_seconds', 0)),
+                'min_duration': float(trigger_config.get('min_duration_seconds', 0)),
+                'cooldown': float(trigger_config.get('cooldown_seconds', 0)),
+                'smoothed': {name: np.empty(0) for name in variables},
+                'last_update': np.empty(0),
+                'holding_since': np.empty(0),
+                'active': np.empty(0, dtype=bool),
+                'last_fired': np.empty(0)
+            }
+    
+    def _grow(self, size: int):
+        """Make room for more gardens (amortized doubling)"""
+        if size <= self.capacity:
+            return
+        
+        new_capacity = max(size, 2 * self.capacity, 16)
+        extra = new_capacity - self.capacity
+        for state in self.states.values():
+            for name in state['variables']:
+                state['smoothed'][name] = np.concatenate([state['smoothed'][name], np.full(extra, np.nan)])
+            state['last_update'] = np.concatenate([state['last_update'], np.full(extra, np.nan)])
+            state['holding_since'] = np.concatenate([state['holding_since'], np.full(extra, np.nan)])
+            state['active'] = np.concatenate([state['active'], np.zeros(extra, dtype=bool)])
+            state['last_fired'] = np.concatenate([state['last_fired'], np.full(extra, -np.inf)])
+        self.capacity = new_capacity
+    
+    def _slots_for(self, garden_ids: np.ndarray) -> np.ndarray:
+        """Map garden ids to state slots, adding new gardens"""
+        for garden_id in garden_ids.tolist():
+            if garden_id not in self.slots:
+                self.slots[garden_id] = len(self.slots)
+        self._grow(len(self.slots))
+        return np.fromiter((self.slots[garden_id] for garden_id in garden_ids.tolist()),
+                           dtype=np.intp, count=len(garden_ids))
+    
+    def update(self, readings: Dict[str, np.ndarray], timestamp: float) -> List[tuple]:
+        """Feed one batch of readings (arrays per condition name plus 'garden_id')
+        
+        timestamp is in seconds. Returns (garden_id, trigger_name) for every
+        trigger that fired on this update.
+        """
+        garden_ids = np.asarray(readings['garden_id'])
+        if garden_ids.size == 0:
+            return []
+        slots = self._slots_for(garden_ids)
+        
+        fired = []
+        for trigger_name, state in self.states.items():
+            # Exponential moving average per variable; a missing reading keeps the previous value
+            last = state['last_update'][slots]
+            elapsed = np.where(np.isnan(last), np.inf, timestamp - last)
+            alpha = 1.0 - np.exp(-elapsed / state['window']) if state['window'] > 0 else np.ones(len(slots))
+            values = dict(self.constants)
+            for name in state['variables']:
+                previous = state['smoothed'][name][slots]
+                current = np.asarray(readings.get(name, np.full(len(slots), np.nan)), dtype=float)
+                smoothed = np.where(np.isnan(previous), current, previous + alpha * (current - previous))
+                smoothed = np.where(np.isnan(current), previous, smoothed)
+                state['smoothed'][name][slots] = smoothed
+                values[name] = smoothed
+            state['last_update'][slots] = timestamp
+            
+            holds = np.broadcast_to(np.asarray(state['condition'].evaluate(values), dtype=bool), slots.shape)
+            if state['clear'] is not None:
+                clears = np.broadcast_to(np.asarray(state['clear'].evaluate(values), dtype=bool), slots.shape)
+            else:
+                clears = ~holds
+            
+            # Track how long the condition has held; inside the hysteresis band nothing changes
+            holding_since = state['holding_since'][slots]
+            holding_since = np.where(holds & np.isnan(holding_since), timestamp, holding_since)
+            holding_since = np.where(clears, np.nan, holding_since)
+            state['holding_since'][slots] = holding_since
+            
+            active = state['active'][slots] & ~clears
+            sustained = holds & (timestamp - np.nan_to_num(holding_since, nan=np.inf) >= state['min_duration'])
+            fire = sustained & ~active & (timestamp - state['last_fired'][slots] >= state['cooldown'])
+            
+            active |= fire
+            state['active'][slots] = active
+            if fire.any():
+                state['last_fired'][slots[fire]] = timestamp
+                fired.extend((int(garden_id), trigger_name) for garden_id in garden_ids[fire])
+        
+        return fired
+    
+    def reset(self, garden_id: Optional[int] = None):
+        """Forget the state of one garden, or of all gardens"""
+        if garden_id is None:
+            self.slots.clear()
+            self.capacity = 0
+            for state in self.states.values():
+                for name in state['variables']:
+                    state['smoothed'][name] = np.empty(0)
+                state['last_update'] = np.empty(0)
+                state['holding_since'] = np.empty(0)
+                state['active'] = np.empty(0, dtype=bool)
+                state['last_fired'] = np.empty(0)
+            return
+        
+        slot = self.slots.get(garden_id)
+        if slot is None:
+            return
+        for state in self.states.values():
+            for name in state['variables']:
+                state['smoothed'][name][slot] = np.nan
+            state['last_update'][slot] = np.nan
+            state['holding_since'][slot] = np.nan
+            state['active'][slot] = False
+            state['last_fired'][slot] = -np.inf
+
+def readings_from_rows(rows: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Turn environmental_readings rows (dicts keyed by column) into arrays keyed by condition names
+    
+    The result also holds 'garden_id'. Missing values are NaN.
+    """
+    readings = {'garden_id': np.array([row['garden_id'] for row in rows], dtype=int)}
+    for column, name in READING_COLUMNS.items():
+        readings[name] = np.array([np.nan if row.get(column) is None else row[column] for row in rows],
+                                  dtype=float)
+    return readings
+
+def load_latest_readings(db_manager, garden_ids: Optional[List[int]] = None) -> Dict[str, np.ndarray]:
+    """Load the latest environmental reading of every garden as arrays keyed by condition names
+    
+    The result also holds 'garden_id'. Missing values are NaN.
+    """
+    columns = ', '.join(f"r.{column}" for column in READING_COLUMNS)
+    query = f"""
+        SELECT r.garden_id, {columns}
+        FROM environmental_readings r
+        JOIN (SELECT garden_id, MAX(reading_time) AS latest
+              FROM environmental_readings GROUP BY garden_id) last
+          ON r.garden_id = last.garden_id AND r.reading_time = last.latest
+    """
+    params: List[Any] = []
+    if garden_ids is not None:
+        query += f" WHERE r.garden_id IN ({', '.join('?' for _ in garden_ids)})"
+        params.extend(garden_ids)
+    query += " GROUP BY r.garden_id ORDER BY r.garden_id"
+    
+    with db_manager.get_connection() as conn:
+        rows = conn.execute(query, params).fetchall()
+    
+    data = np.array([[np.nan if value is None else value for value in row] for row in rows],
+                    dtype=float).reshape(len(rows), len(READING_COLUMNS) + 1)
+    readings = {'garden_id': data[:, 0].astype(int)}
+    for index, name in enumerate(READING_COLUMNS.values(), start=1):
+        readings[name] = data[:, index]
+    return readings
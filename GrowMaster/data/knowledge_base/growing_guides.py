@@ -68,6 +68,7 @@ class GrowingKnowledge:
             "cannabis_photoperiod": {
                 "germination": {
                     "duration_days": (3, 10),
+                    "typical_days": 7,
                     "conditions": {"temp": 78, "humidity": 80, "light_hours": 0},
                     "tasks": [
                         {"day": 1, "task": "Place seeds in germination medium", "priority": "critical"},
@@ -78,6 +79,7 @@ class GrowingKnowledge:
                 },
                 "seedling": {
                     "duration_days": (14, 21),
+                    "typical_days": 14,
                     "conditions": {"temp": 75, "humidity": 70, "light_hours": 18},
                     "tasks": [
                         {"day": 1, "task": "Provide gentle light (100-200 PPFD)", "priority": "critical"},
@@ -89,6 +91,7 @@ class GrowingKnowledge:
                 },
                 "vegetative": {
                     "duration_days": (28, 84),
+                    "typical_days": 35,
                     "conditions": {"temp": 78, "humidity": 60, "light_hours": 18},
                     "tasks": [
                         {"week": 1, "task": "Increase light to 300-400 PPFD", "priority": "critical"},
@@ -100,6 +103,7 @@ class GrowingKnowledge:
                 },
                 "flowering": {
                     "duration_days": (49, 84),
+                    "typical_days": 56,
                     "conditions": {"temp": 75, "humidity": 45, "light_hours": 12},
                     "phases": {
                         "transition": {
@@ -129,6 +133,32 @@ class GrowingKnowledge:
                         }
                     }
                 }
+            },
+            "cannabis_autoflower": {
+                "germination": {
+                    "duration_days": (3, 7),
+                    "typical_days": 5,
+                    "conditions": {"temp": 78, "humidity": 80, "light_hours": 0},
+                    "tasks": []
+                },
+                "seedling": {
+                    "duration_days": (7, 14),
+                    "typical_days": 10,
+                    "conditions": {"temp": 75, "humidity": 70, "light_hours": 20},
+                    "tasks": []
+                },
+                "vegetative": {
+                    "duration_days": (14, 28),
+                    "typical_days": 21,
+                    "conditions": {"temp": 78, "humidity": 60, "light_hours": 20},
+                    "tasks": []
+                },
+                "flowering": {
+                    "duration_days": (42, 63),
+                    "typical_days": 49,
+                    "conditions": {"temp": 75, "humidity": 45, "light_hours": 18},
+                    "tasks": []
+                }
             }
         }
         
@@ -258,6 +288,19 @@ class GrowingKnowledge:
             logger.warning(f"Growth stage tasks not found for {plant_type} - {growth_stage}")
             return []
     
+    def get_stage_durations(self, plant_type: str, profile: str = "photoperiod") -> List[tuple]:
+        """Get (stage, typical duration in days) in growth order"""
+        stages = self.growth_stages.get(f"{plant_type}_{profile}") or self.growth_stages.get(f"cannabis_{profile}")
+        if stages is None:
+            logger.warning(f"Growth stage timeline not found for {plant_type} - {profile}")
+            stages = self.growth_stages["cannabis_photoperiod"]
+        
+        durations = []
+        for stage, info in stages.items():
+            shortest, longest = info["duration_days"]
+            durations.append((stage, info.get("typical_days", round((shortest + longest) / 2))))
+        return durations
+    
     def get_nutrient_recipe(self, recipe_name: str, growth_stage: str) -> Dict:
         """Get nutrient mixing recipe for specific stage"""
         try:
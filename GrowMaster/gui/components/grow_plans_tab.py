@@ -575,6 +575,7 @@ class GrowPlansTab:
                     ))
                     messagebox.showinfo("Success", "Garden created successfully!")
             
+            self.db_manager.notify_garden_changed()
             self.load_gardens()
             self.show_garden_details()
             
@@ -608,6 +609,7 @@ class GrowPlansTab:
                         "planning", garden['notes'], garden['color_code']
                     ))
                 
+                self.db_manager.notify_garden_changed()
                 messagebox.showinfo("Success", f"Garden cloned successfully!")
                 self.load_gardens()
                 
@@ -628,6 +630,7 @@ class GrowPlansTab:
                     conn.execute("DELETE FROM gardens WHERE id = ?", 
                                (self.selected_garden["id"],))
                 
+                self.db_manager.notify_garden_changed()
                 messagebox.showinfo("Success", "Garden deleted successfully!")
                 self.selected_garden = None
                 self.load_gardens()
@@ -228,7 +228,8 @@ class MasterCalendarTab:
                 cursor = conn.execute("""
                     SELECT t.id, t.title, t.description, t.priority, t.due_date, t.due_time,
                            t.completed, t.task_type, t.estimated_duration, t.notes,
-                           g.name as garden_name, p.name as plant_name
+                           g.name as garden_name, p.name as plant_name,
+                           t.template_id, t.template_overrides
                     FROM tasks t
                     LEFT JOIN gardens g ON t.garden_id = g.id
                     LEFT JOIN plants p ON t.plant_id = p.id
@@ -252,8 +253,13 @@ class MasterCalendarTab:
                         "estimated_duration": task[8] or 0,
                         "notes": task[9] or "",
                         "garden_name": task[10] or "No Garden",
-                        "plant_name": task[11] or ""
+                        "plant_name": task[11] or "",
+                        "template_id": task[12],
+                        "template_overrides": task[13]
                     })
+                
+                # Template text is filled in when a task is shown; fetch the month's templates in one query
+                self.db_manager.get_task_templates([task["template_id"] for task in self.tasks_data])
             
             logger.info(f"Loaded {len(self.tasks_data)} tasks for calendar display")
             self.update_calendar_display()
@@ -539,10 +545,11 @@ class MasterCalendarTab:
                 title_label.pack(anchor="w", padx=10, pady=(10, 5))
                 
                 # Task details
-                if task.get('description'):
+                description = self.db_manager.resolve_task_description(task)
+                if description:
                     desc_label = ctk.CTkLabel(
                         task_frame,
-                        text=task['description'][:100] + "..." if len(task.get('description', '')) > 100 else task.get('description', ''),
+                        text=description[:100] + "..." if len(description) > 100 else description,
                         font=ctk.CTkFont(size=12),
                         anchor="w",
                         text_color=themes.get_color("text_secondary")
@@ -314,7 +314,7 @@ class TaskManagerTab(ctk.CTkFrame):
         self.title_var.set(task.get("title", ""))
         
         self.description_text.delete("1.0", "end")
-        self.description_text.insert("1.0", task.get("description", ""))
+        self.description_text.insert("1.0", self.db_manager.resolve_task_description(task))
         
         self.priority_var.set(task.get("priority", "Medium"))
         self.status_var.set(task.get("status", "Pending"))
@@ -380,33 +380,38 @@ class TaskManagerTab(ctk.CTkFrame):
                     messagebox.showerror("Error", "Invalid date format. Use YYYY-MM-DD")
                     return
             
-            # Save to database
+            # Save through the database manager so schedulers and caches see the change
             try:
-                with self.db_manager.get_connection() as conn:
-                    if self.selected_task:
-                        # Update existing task
-                        completed = 1 if task_data["status"] == "completed" else 0
-                        conn.execute("""
-                            UPDATE tasks 
-                            SET title = ?, description = ?, priority = ?, due_date = ?, completed = ?
-                            WHERE id = ?
-                        """, (
-                            task_data["title"], task_data["description"], 
-                            task_data["priority"], task_data["due_date"], 
-                            completed, self.selected_task["id"]
-                        ))
-                        messagebox.showinfo("Success", "Task updated successfully")
-                    else:
-                        # Create new task
-                        conn.execute("""
-                            INSERT INTO tasks (title, description, task_type, priority, due_date, completed, created_date)
-                            VALUES (?, ?, ?, ?, ?, ?, ?)
-                        """, (
-                            task_data["title"], task_data["description"], 
-                            "general", task_data["priority"], task_data["due_date"], 0,
-                            datetime.now().isoformat()
-                        ))
-                        messagebox.showinfo("Success", "Task created successfully")
+                if self.selected_task:
+                    # Update existing task
+                    task_id = self.selected_task["id"]
+                    updates = {
+                        "title": task_data["title"],
+                        "priority": task_data["priority"],
+                        "due_date": task_data["due_date"]
+                    }
+                    # Unchanged template text stays resolved from the template; edits become overrides
+                    updates.update(self.db_manager.task_description_updates(self.selected_task,
+                                                                            task_data["description"]))
+                    if not self.db_manager.update_task(task_id, updates):
+                        raise RuntimeError(f"Task {task_id} could not be updated")
+                    
+                    completed = task_data["status"] == "completed"
+                    if completed and not self.selected_task.get("completed"):
+                        self.db_manager.complete_task(task_id)
+                    elif not completed and self.selected_task.get("completed"):
+                        self.db_manager.reopen_task(task_id)
+                    messagebox.showinfo("Success", "Task updated successfully")
+                else:
+                    # Create new task
+                    self.db_manager.create_task({
+                        "title": task_data["title"],
+                        "description": task_data["description"],
+                        "task_type": "general",
+                        "priority": task_data["priority"],
+                        "due_date": task_data["due_date"]
+                    })
+                    messagebox.showinfo("Success", "Task created successfully")
                         
                 # Refresh task list
                 self.load_tasks()
@@ -430,9 +435,9 @@ class TaskManagerTab(ctk.CTkFrame):
         
         if result:
             try:
-                # Delete from database
-                with self.db_manager.get_connection() as conn:
-                    conn.execute("DELETE FROM tasks WHERE id = ?", (self.selected_task["id"],))
+                # Delete through the database manager so schedulers and caches see the change
+                if not self.db_manager.delete_task(self.selected_task["id"]):
+                    raise RuntimeError(f"Task {self.selected_task['id']} could not be deleted")
                 
                 messagebox.showinfo("Success", "Task deleted successfully")
                 self.load_tasks()
@@ -480,7 +485,7 @@ class TaskManagerTab(ctk.CTkFrame):
         if search_term:
             filtered_tasks = [t for t in filtered_tasks 
                             if search_term in t["title"].lower() 
-                            or search_term in t.get("description", "").lower()]
+                            or search_term in self.db_manager.resolve_task_description(t).lower()]
         
         self.display_tasks(filtered_tasks)
     
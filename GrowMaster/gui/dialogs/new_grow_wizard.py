@@ -587,6 +587,8 @@ Automation Features:
                 garden_id = cursor.lastrowid
                 conn.commit()
             
+            self.db_manager.notify_garden_changed()
+            
             # Setup automation features
             self.setup_automation(garden_id)
             
@@ -640,8 +642,9 @@ Automation Features:
             
             generator = IntelligentTaskGenerator(self.db_manager)
             tasks = generator.generate_tasks_for_garden(garden_id)
+            saved = generator.save_generated_tasks(tasks)
             
-            logger.info(f"Generated {len(tasks)} initial tasks for garden {garden_id}")
+            logger.info(f"Generated {saved} initial tasks for garden {garden_id}")
             
         except ImportError:
             logger.warning("Intelligent task generator not available")
@@ -409,25 +409,23 @@ class QuickTaskDialog:
             }
             
             # Handle recurrence
-            recurrence_pattern = None
+            recurrence_pattern = {}
             if self.recurring_var.get():
-                interval = int(self.recurrence_interval_var.get())
-                unit = self.recurrence_unit_var.get()
-                recurrence_pattern = f"every_{interval}_{unit}"
+                recurrence_pattern = {
+                    "interval": int(self.recurrence_interval_var.get()),
+                    "unit": self.recurrence_unit_var.get()
+                }
             
-            with self.db_manager.get_connection() as conn:
-                cursor = conn.execute("""
-                    INSERT INTO tasks 
-                    (title, description, due_date, priority, category, status, 
-                     garden_id, created_date, recurrence_pattern)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    task_data["title"], task_data["description"], task_data["due_date"],
-                    task_data["priority"], task_data["category"], task_data["status"],
-                    task_data["garden_id"], task_data["created_date"], recurrence_pattern
-                ))
-                
-                task_id = cursor.lastrowid
+            # Create through the database manager so schedulers and caches see the new task
+            task_id = self.db_manager.create_task({
+                "title": task_data["title"],
+                "description": task_data["description"],
+                "task_type": task_data["category"],
+                "priority": task_data["priority"],
+                "due_date": task_data["due_date"],
+                "garden_id": task_data["garden_id"],
+                "recurring_pattern": recurrence_pattern
+            })
             
             logger.info(f"Quick task created: {task_data['title']} (ID: {task_id})")
             messagebox.showinfo("Success", f"Task '{task_data['title']}' created successfully!")
@@ -15,6 +15,8 @@ from core.database.database_manager import DatabaseManager
 from core.schedulers.intelligent_task_generator import IntelligentTaskGenerator
 from core.schedulers.multi_garden_coordinator import MultiGardenTaskCoordinator
 from core.schedulers.notification_system import BasicNotificationSystem
+from core.schedulers.task_dependency_graph import TaskDependencyGraph
+from core.schedulers.task_scheduler import TaskScheduler
 from .components.dashboard_tab import DashboardTab
 from .components.master_calendar_tab import MasterCalendarTab
 from .components.grow_plans_tab import GrowPlansTab
@@ -104,8 +106,17 @@ class MainWindow:
             logger.info("Intelligent task generator initialized")
             
             self.task_coordinator = MultiGardenTaskCoordinator(self.db_manager)
+            self.db_manager.add_task_change_listener(self.task_coordinator.on_task_changed)
             logger.info("Multi-garden task coordinator initialized")
             
+            self.dependency_graph = TaskDependencyGraph(self.db_manager)
+            self.db_manager.add_task_change_listener(self.dependency_graph.on_task_changed)
+            logger.info("Task dependency graph initialized")
+            
+            self.task_scheduler = TaskScheduler(self.db_manager)
+            self.db_manager.add_reading_listener(self.task_scheduler.on_readings_recorded)
+            logger.info("Environmental trigger scheduler initialized")
+            
             self.notification_system = BasicNotificationSystem(self.db_manager)
             logger.info("Notification system initialized")
             
@@ -118,6 +129,8 @@ class MainWindow:
             self.db_manager = DatabaseManager()
             self.task_generator = None
             self.task_coordinator = None
+            self.dependency_graph = None
+            self.task_scheduler = None
             self.notification_system = None
     
     def start_automation_services(self):
@@ -203,7 +216,9 @@ class MainWindow:
                 command=self.generate_tasks_for_all,
                 **themes.get_button_styles()["accent"]
             )
-            gen_tasks_btn.pack(side="right", padx=5)    def create_main_interface(self):
+            gen_tasks_btn.pack(side="right", padx=5)
+    
+    def create_main_interface(self):
         """Create main tabbed interface"""
         # Main container
         self.main_container = ctk.CTkFrame(self.root, corner_radius=0)
@@ -306,20 +321,6 @@ class MainWindow:
             return f"Automation: {' | '.join(status_parts)}"
         else:
             return "Automation: Disabled"
-            text="Ready",
-            font=ctk.CTkFont(size=10)
-        )
-        self.status_left.grid(row=0, column=0, sticky="w", padx=10, pady=5)
-        
-        self.status_right = ctk.CTkLabel(
-            self.status_frame,
-            text="Active Gardens: 0 | Pending Tasks: 0",
-            font=ctk.CTkFont(size=10)
-        )
-        self.status_right.grid(row=0, column=2, sticky="e", padx=10, pady=5)
-        
-        # Update status periodically
-        self.update_status()
     
     def update_status(self):
         """Update status bar information"""
@@ -445,7 +446,7 @@ class MainWindow:
             for garden in gardens:
                 try:
                     tasks = self.task_generator.generate_tasks_for_garden(garden['id'])
-                    total_tasks += len(tasks)
+                    total_tasks += self.task_generator.save_generated_tasks(tasks)
                 except Exception as e:
                     logger.error(f"Failed to generate tasks for garden {garden['name']}: {e}")
             